@@ -0,0 +1,98 @@
+-- ============================================================
+-- CIERRE DE SESIONES Y REGISTRO DE AUSENCIAS
+-- ============================================================
+-- Base de datos: prototipoPG_v2
+-- Requiere: indices_consultas_frecuentes.sql (restricción única
+-- asistencias_academicas (id_sesion, id_estudiante))
+-- ============================================================
+-- Al cerrar una sesión, cada estudiante inscrito en su curso que no
+-- tiene registro queda como 'ausente'. Todas las sesiones que cierran
+-- juntas se procesan con un único INSERT ... SELECT, sin importar
+-- cuántas sean ni cuántos inscritos tengan. Volver a ejecutarlo no
+-- duplica nada.
+-- ============================================================
+
+-- Las ausencias generadas al cerrar se distinguen de las manuales
+ALTER TABLE asistencias_academicas DROP CONSTRAINT IF EXISTS asistencias_academicas_metodo_check;
+ALTER TABLE asistencias_academicas ADD CONSTRAINT asistencias_academicas_metodo_check
+    CHECK ((metodo_registro IN ('reconocimiento_facial', 'manual', 'qr_code', 'cierre_sesion')));
+
+COMMENT ON COLUMN asistencias_academicas.metodo_registro IS 'Método usado: reconocimiento_facial, manual, qr_code, cierre_sesion (ausencia automática)';
+
+-- Sesiones vencidas sin cerrar (cerrar_sesiones)
+CREATE INDEX IF NOT EXISTS idx_sesiones_acad_abiertas
+    ON sesiones_academicas (fecha_programada, hora_fin)
+    WHERE estado IN ('programada', 'activa', 'en_curso');
+
+-- Ausencias de los inscritos sin registro en las sesiones indicadas
+CREATE OR REPLACE FUNCTION marcar_ausencias(p_sesiones INTEGER[])
+RETURNS INTEGER AS $$
+DECLARE
+    v_insertadas INTEGER;
+BEGIN
+    INSERT INTO asistencias_academicas (
+        id_sesion, id_estudiante, fecha_registro, metodo_registro,
+        confidence_score, estado, minutos_tardanza
+    )
+    SELECT sa.id_sesion, i.id_estudiante, sa.fecha_programada + sa.hora_fin,
+           'cierre_sesion', NULL, 'ausente', 0
+    FROM sesiones_academicas sa
+    JOIN inscripciones i ON i.id_curso = sa.id_curso AND i.estado = 'activo'
+    WHERE sa.id_sesion = ANY (p_sesiones)
+    AND NOT EXISTS (
+        SELECT 1 FROM asistencias_academicas aa
+        WHERE aa.id_sesion = sa.id_sesion AND aa.id_estudiante = i.id_estudiante
+    )
+    -- Un reconocimiento que llega en el mismo instante gana sobre la ausencia
+    ON CONFLICT (id_sesion, id_estudiante) DO NOTHING;
+
+    GET DIAGNOSTICS v_insertadas = ROW_COUNT;
+    RETURN v_insertadas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Cierra todas las sesiones cuyo horario terminó antes de p_hasta y marca sus ausencias
+CREATE OR REPLACE FUNCTION cerrar_sesiones(p_hasta TIMESTAMP DEFAULT LOCALTIMESTAMP)
+RETURNS TABLE (sesiones_cerradas INTEGER, ausencias INTEGER) AS $$
+DECLARE
+    v_sesiones INTEGER[];
+BEGIN
+    WITH cerradas AS (
+        UPDATE sesiones_academicas
+        SET estado = 'finalizada',
+            asistencia_habilitada = false,
+            actualizada_en = CURRENT_TIMESTAMP
+        WHERE estado IN ('programada', 'activa', 'en_curso')
+        AND fecha_programada <= p_hasta::date
+        AND fecha_programada + hora_fin <= p_hasta
+        RETURNING id_sesion
+    )
+    SELECT COALESCE(array_agg(id_sesion), '{}') INTO v_sesiones FROM cerradas;
+
+    sesiones_cerradas := cardinality(v_sesiones);
+    ausencias := marcar_ausencias(v_sesiones);
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reabrir una sesión finalizada (dashboard o reconocimiento) descarta las
+-- ausencias que dejó el cierre; si se vuelve a cerrar se generan de nuevo
+CREATE OR REPLACE FUNCTION quitar_ausencias_cierre()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM asistencias_academicas
+    WHERE id_sesion = NEW.id_sesion AND metodo_registro = 'cierre_sesion';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_quitar_ausencias_cierre ON sesiones_academicas;
+CREATE TRIGGER trigger_quitar_ausencias_cierre
+    AFTER UPDATE ON sesiones_academicas
+    FOR EACH ROW
+    WHEN (OLD.estado = 'finalizada' AND NEW.estado IS DISTINCT FROM 'finalizada')
+    EXECUTE FUNCTION quitar_ausencias_cierre();
+
+-- ============================================================
+-- FIN DEL CIERRE DE SESIONES
+-- ============================================================
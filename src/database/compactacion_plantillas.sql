@@ -0,0 +1,35 @@
+-- ============================================================
+-- COMPACTACIÓN DE PLANTILLAS FACIALES
+-- ============================================================
+-- Base de datos: prototipoPG_v2
+-- Requiere: schema.sql
+-- ============================================================
+-- Con reinscripciones, ráfagas y registro masivo cada estudiante
+-- acumula embeddings. src/utils/compactar_plantillas.py elige por
+-- estudiante 1 a 3 medoides (plantillas, las únicas activas), marca
+-- los atípicos (lejos del resto del estudiante) y desactiva los
+-- redundantes. Los embeddings no se borran: la siguiente compactación
+-- vuelve a considerarlos junto con los nuevos.
+--
+-- Un embedding desactivado a mano (rol_compactacion NULL) no vuelve a
+-- activarse. La firma (md5 de los id_embedding considerados) permite
+-- recompactar solo a los estudiantes cuyos embeddings cambiaron.
+-- ============================================================
+
+ALTER TABLE embeddings_faciales
+    ADD COLUMN IF NOT EXISTS rol_compactacion VARCHAR(20) NULL;
+
+COMMENT ON COLUMN embeddings_faciales.rol_compactacion IS 'plantilla, redundante o atipico según la última compactación (NULL = sin compactar)';
+
+CREATE TABLE IF NOT EXISTS compactacion_plantillas (
+    id_usuario INTEGER NOT NULL,
+    firma CHAR(32) NOT NULL,
+    embeddings INTEGER NOT NULL,
+    plantillas INTEGER NOT NULL,
+    atipicos INTEGER NOT NULL,
+    compactado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP NULL,
+    PRIMARY KEY (id_usuario),
+    CONSTRAINT compactacion_plantillas_id_usuario_fkey FOREIGN KEY (id_usuario) REFERENCES usuarios(id_usuario) ON DELETE CASCADE
+);
+
+COMMENT ON TABLE compactacion_plantillas IS 'Última compactación de plantillas por estudiante (firma de los embeddings considerados)';
@@ -0,0 +1,80 @@
+-- ============================================================
+-- ASIGNACIÓN DE numero_sesion SIN MAX()
+-- ============================================================
+-- Base de datos: prototipoPG_v2
+-- Requiere: schema_sesiones_academicas.sql
+-- ============================================================
+-- Un contador por (año, semestre, corte, id_curso). Asignar un número
+-- es un UPSERT ... RETURNING sobre una sola fila: dos escritores del
+-- mismo curso y período se ordenan por el bloqueo de esa fila hasta el
+-- COMMIT, y los de otros cursos o períodos no se esperan entre sí.
+-- Nunca se recorre sesiones_academicas buscando el máximo.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS contadores_sesion (
+    año INTEGER NOT NULL,
+    semestre VARCHAR(20) NOT NULL,
+    corte INTEGER NOT NULL,
+    id_curso INTEGER NOT NULL,
+    ultimo_numero INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (año, semestre, corte, id_curso)
+);
+
+COMMENT ON TABLE contadores_sesion IS 'Último numero_sesion asignado por período y curso (id_curso 0 = sin curso)';
+
+-- Inicializar desde las sesiones existentes
+INSERT INTO contadores_sesion (año, semestre, corte, id_curso, ultimo_numero)
+SELECT año, semestre, corte, COALESCE(id_curso, 0), MAX(numero_sesion)
+FROM sesiones_academicas
+GROUP BY año, semestre, corte, COALESCE(id_curso, 0)
+ON CONFLICT (año, semestre, corte, id_curso)
+DO UPDATE SET ultimo_numero = GREATEST(contadores_sesion.ultimo_numero, EXCLUDED.ultimo_numero);
+
+-- Reserva p_cantidad números consecutivos y devuelve el primero
+CREATE OR REPLACE FUNCTION siguiente_numero_sesion(
+    p_año INTEGER,
+    p_semestre VARCHAR,
+    p_corte INTEGER,
+    p_id_curso INTEGER,
+    p_cantidad INTEGER DEFAULT 1
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_ultimo INTEGER;
+BEGIN
+    INSERT INTO contadores_sesion (año, semestre, corte, id_curso, ultimo_numero)
+    VALUES (p_año, p_semestre, p_corte, COALESCE(p_id_curso, 0), p_cantidad)
+    ON CONFLICT (año, semestre, corte, id_curso)
+    DO UPDATE SET ultimo_numero = contadores_sesion.ultimo_numero + EXCLUDED.ultimo_numero
+    RETURNING ultimo_numero INTO v_ultimo;
+
+    RETURN v_ultimo - p_cantidad + 1;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Sin numero_sesion: tomar el siguiente del contador.
+-- Con numero_sesion explícito: adelantar el contador para que no se repita.
+CREATE OR REPLACE FUNCTION asignar_numero_sesion()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.numero_sesion IS NULL THEN
+        NEW.numero_sesion := siguiente_numero_sesion(NEW.año, NEW.semestre, NEW.corte, NEW.id_curso);
+    ELSE
+        INSERT INTO contadores_sesion (año, semestre, corte, id_curso, ultimo_numero)
+        VALUES (NEW.año, NEW.semestre, NEW.corte, COALESCE(NEW.id_curso, 0), NEW.numero_sesion)
+        ON CONFLICT (año, semestre, corte, id_curso)
+        DO UPDATE SET ultimo_numero = GREATEST(contadores_sesion.ultimo_numero, EXCLUDED.ultimo_numero);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_asignar_numero_sesion ON sesiones_academicas;
+CREATE TRIGGER trigger_asignar_numero_sesion
+    BEFORE INSERT ON sesiones_academicas
+    FOR EACH ROW
+    EXECUTE FUNCTION asignar_numero_sesion();
+
+-- ============================================================
+-- FIN DE CONTADORES DE SESIÓN
+-- ============================================================
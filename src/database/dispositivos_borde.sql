@@ -0,0 +1,48 @@
+-- ============================================================
+-- DISPOSITIVOS DE BORDE (KIOSCOS QUE ENVÍAN EMBEDDINGS)
+-- ============================================================
+-- Base de datos: prototipoPG_v2
+-- Requiere: schema_sesiones_academicas.sql
+-- ============================================================
+-- Los kioscos de las puertas calculan los embeddings con el mismo
+-- codificador (face_recognition) y los envían en lotes binarios a
+-- POST /api/ingest/embeddings (src/utils/ingesta_embeddings.py).
+-- Cada dispositivo se autentica con su id y un token; solo se guarda
+-- el SHA-256 del token. El aula asocia el dispositivo a las sesiones
+-- de ese salón (subgalería de inscritos del curso).
+-- Cada cambio de un dispositivo (revocación, token nuevo) se publica en
+-- el canal 'dispositivos_borde': los workers de main.py lo escuchan y
+-- olvidan ese dispositivo de su cache al instante.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS dispositivos_borde (
+    id_dispositivo VARCHAR(64) NOT NULL,
+    nombre VARCHAR(100) NOT NULL,
+    aula VARCHAR(100) NULL,
+    token_hash CHAR(64) NOT NULL,
+    activo BOOLEAN DEFAULT true NOT NULL,
+    creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP NULL,
+    PRIMARY KEY (id_dispositivo)
+);
+
+COMMENT ON TABLE dispositivos_borde IS 'Kioscos autorizados para enviar embeddings faciales al servidor';
+COMMENT ON COLUMN dispositivos_borde.token_hash IS 'SHA-256 (hex) del token del dispositivo; el token no se guarda';
+COMMENT ON COLUMN dispositivos_borde.aula IS 'Aula donde está instalado (sesión activa y subgalería del curso)';
+
+CREATE OR REPLACE FUNCTION notificar_cambio_dispositivo()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('dispositivos_borde', OLD.id_dispositivo);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_notificar_dispositivo ON dispositivos_borde;
+CREATE TRIGGER trigger_notificar_dispositivo
+    AFTER UPDATE OR DELETE ON dispositivos_borde
+    FOR EACH ROW
+    EXECUTE FUNCTION notificar_cambio_dispositivo();
+
+-- ============================================================
+-- FIN DE DISPOSITIVOS DE BORDE
+-- ============================================================
@@ -0,0 +1,39 @@
+-- ============================================================
+-- ESTADO DE ASISTENCIA (PRESENTE / TARDANZA) COMPARTIDO
+-- ============================================================
+-- Base de datos: prototipoPG_v2
+-- Requiere: schema_sesiones_academicas.sql
+-- ============================================================
+-- La regla de presente/tardanza vive en calcular_estado_asistencia y la
+-- usan tanto el registro en vivo (registrar_asistencia_reconocimiento)
+-- como el registro por lotes desde video (src/utils/asistencia_video.py),
+-- que inserta todos los estudiantes de una grabación en una sentencia
+-- con el momento de su primera aparición.
+-- ============================================================
+
+-- Presente si llegó dentro de la tolerancia; si no, tardanza con los minutos
+-- completos que excedió la tolerancia
+CREATE OR REPLACE FUNCTION calcular_estado_asistencia(
+    p_momento TIMESTAMP,
+    p_inicio_sesion TIMESTAMP,
+    p_tolerancia_minutos INTEGER,
+    OUT estado VARCHAR,
+    OUT minutos_tardanza INTEGER
+) AS $$
+DECLARE
+    v_tolerancia INTEGER := COALESCE(p_tolerancia_minutos, 15);
+    v_diferencia DOUBLE PRECISION := EXTRACT(EPOCH FROM (p_momento - p_inicio_sesion)) / 60;
+BEGIN
+    IF v_diferencia <= v_tolerancia THEN
+        estado := 'presente';
+        minutos_tardanza := 0;
+    ELSE
+        estado := 'tardanza';
+        minutos_tardanza := trunc(v_diferencia - v_tolerancia)::int;
+    END IF;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- ============================================================
+-- FIN DEL ESTADO DE ASISTENCIA
+-- ============================================================
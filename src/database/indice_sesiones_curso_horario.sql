@@ -0,0 +1,21 @@
+-- ============================================================
+-- ÍNDICE DE SESIONES POR CURSO Y HORARIO
+-- ============================================================
+-- Base de datos: prototipoPG_v2
+-- Requiere: schema_sesiones_academicas.sql
+-- ============================================================
+-- El generador de horarios (src/utils/generador_horarios.py) identifica
+-- cada sesión por (id_curso, fecha_programada, hora_inicio) para no
+-- crearla dos veces; este índice resuelve esa búsqueda por rango de
+-- fechas de un curso.
+-- ============================================================
+
+CREATE INDEX IF NOT EXISTS idx_sesiones_acad_curso_fecha_hora
+    ON sesiones_academicas (id_curso, fecha_programada, hora_inicio);
+
+-- El índice de una sola columna queda cubierto por el anterior
+DROP INDEX IF EXISTS idx_sesiones_acad_curso;
+
+-- ============================================================
+-- FIN DEL ÍNDICE
+-- ============================================================
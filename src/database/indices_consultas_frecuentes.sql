@@ -0,0 +1,93 @@
+-- ============================================================
+-- ÍNDICES PARA LAS CONSULTAS FRECUENTES
+-- ============================================================
+-- Base de datos: prototipoPG_v2
+-- Requiere: schema.sql y schema_sesiones_academicas.sql
+-- ============================================================
+-- Cada índice corresponde a una consulta de main.py o de
+-- GestorAcademicoAutomatico; `python src/database/migraciones.py verificar`
+-- comprueba con EXPLAIN que siguen usándose.
+-- ============================================================
+
+-- Sesión activa ahora: fecha + período + rango horario (obtener_sesion_activa_actual)
+CREATE INDEX IF NOT EXISTS idx_sesiones_acad_fecha_periodo_horario
+    ON sesiones_academicas (fecha_programada, año, semestre, corte, hora_inicio, hora_fin);
+
+-- Sesiones con asistencia habilitada (finalizar todas, limpiar_asistencias.py)
+CREATE INDEX IF NOT EXISTS idx_sesiones_acad_habilitadas
+    ON sesiones_academicas (fecha_programada DESC)
+    WHERE asistencia_habilitada = true;
+
+-- El índice de una sola columna queda cubierto por idx_sesiones_acad_habilitadas
+DROP INDEX IF EXISTS idx_sesiones_acad_activa;
+
+-- El índice de una sola columna queda cubierto por idx_sesiones_acad_fecha_periodo_horario
+DROP INDEX IF EXISTS idx_sesiones_acad_fecha;
+
+-- Asistencias: una por estudiante y sesión (restricción, no solo índice)
+-- Si ya hay asistencias duplicadas la migración se detiene y las informa:
+-- decidir cuál conservar (estado, confidence_score) no le corresponde a la migración
+DO $$
+DECLARE
+    v_grupos INTEGER;
+    v_ejemplos TEXT;
+BEGIN
+    SELECT COUNT(*), string_agg(format('(sesión %s, estudiante %s: %s)', id_sesion, id_estudiante, ids), ', ')
+    INTO v_grupos, v_ejemplos
+    FROM (
+        SELECT id_sesion, id_estudiante, string_agg(id_asistencia::text, ', ' ORDER BY id_asistencia) AS ids
+        FROM asistencias_academicas
+        GROUP BY id_sesion, id_estudiante
+        HAVING COUNT(*) > 1
+        ORDER BY id_sesion, id_estudiante
+        LIMIT 10
+    ) d;
+
+    IF v_grupos > 0 THEN
+        SELECT COUNT(*) INTO v_grupos
+        FROM (
+            SELECT 1 FROM asistencias_academicas
+            GROUP BY id_sesion, id_estudiante
+            HAVING COUNT(*) > 1
+        ) d;
+
+        RAISE EXCEPTION '% pares (id_sesion, id_estudiante) con asistencias duplicadas; primeros: %', v_grupos, v_ejemplos
+            USING HINT = 'Elimine los registros sobrantes de asistencias_academicas y vuelva a ejecutar la migración';
+    END IF;
+END $$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS asistencias_academicas_id_sesion_id_estudiante_key
+    ON asistencias_academicas (id_sesion, id_estudiante);
+
+DO $$ BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'asistencias_academicas_id_sesion_id_estudiante_key'
+    ) THEN
+        ALTER TABLE asistencias_academicas
+            ADD CONSTRAINT asistencias_academicas_id_sesion_id_estudiante_key
+            UNIQUE USING INDEX asistencias_academicas_id_sesion_id_estudiante_key;
+    END IF;
+END $$;
+
+-- El índice por id_sesion queda cubierto por la restricción única
+DROP INDEX IF EXISTS idx_asistencias_acad_sesion;
+
+-- Asistencias por estudiante en orden cronológico (historial, exportación por estudiante)
+CREATE INDEX IF NOT EXISTS idx_asistencias_acad_estudiante_fecha
+    ON asistencias_academicas (id_estudiante, fecha_registro);
+DROP INDEX IF EXISTS idx_asistencias_acad_estudiante;
+
+-- Embeddings activos por usuario, mejor calidad primero (load_face_encodings)
+CREATE INDEX IF NOT EXISTS idx_embeddings_usuario_activos
+    ON embeddings_faciales (id_usuario, quality_score DESC)
+    WHERE activo = true;
+
+-- Búsqueda de estudiante por nombre completo (mark_attendance)
+CREATE INDEX IF NOT EXISTS idx_usuarios_nombre_completo_estudiantes
+    ON usuarios ((nombre || ' ' || apellido))
+    WHERE rol = 'estudiante';
+
+-- ============================================================
+-- FIN DE ÍNDICES
+-- ============================================================
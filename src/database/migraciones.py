@@ -0,0 +1,350 @@
+"""
+Migraciones versionadas del esquema de base de datos
+Aplica en orden los scripts SQL de src/database y registra cada versión en
+schema_migraciones. Incluye una verificación basada en EXPLAIN que comprueba
+que las consultas frecuentes de main.py y GestorAcademicoAutomatico usan índices.
+
+Uso:
+    python src/database/migraciones.py migrar          # aplicar migraciones pendientes
+    python src/database/migraciones.py estado          # ver versiones aplicadas
+    python src/database/migraciones.py marcar 2        # BD existente: marcar 1..2 como aplicadas
+    python src/database/migraciones.py verificar       # EXPLAIN de las consultas frecuentes
+"""
+
+import json
+import os
+import sys
+from datetime import date, time
+
+import psycopg2
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+DIRECTORIO_SQL = os.path.dirname(os.path.abspath(__file__))
+
+# (versión, nombre, archivo SQL). Nunca reordenar: solo agregar al final.
+MIGRACIONES = [
+    (1, 'schema_principal', 'schema.sql'),
+    (2, 'sesiones_academicas', 'schema_sesiones_academicas.sql'),
+    (3, 'estadisticas_corte', 'schema_estadisticas_corte.sql'),
+    (4, 'resumen_asistencia', 'schema_resumen_asistencia.sql'),
+    (5, 'indices_consultas_frecuentes', 'indices_consultas_frecuentes.sql'),
+    (6, 'contadores_sesion', 'contadores_sesion.sql'),
+    (7, 'cierre_sesiones', 'cierre_sesiones.sql'),
+    (8, 'notificaciones_sesiones', 'notificaciones_sesiones.sql'),
+    (9, 'indice_sesiones_curso_horario', 'indice_sesiones_curso_horario.sql'),
+    (10, 'estado_asistencia', 'estado_asistencia.sql'),
+    (11, 'registro_asistencia', 'registro_asistencia.sql'),
+    (12, 'dispositivos_borde', 'dispositivos_borde.sql'),
+    (13, 'compactacion_plantillas', 'compactacion_plantillas.sql'),
+    (14, 'sesion_aula', 'sesion_aula.sql'),
+]
+
+# Consultas frecuentes: (nombre, origen, sql, parámetros, índices que deben aparecer en el plan)
+# Deben mantenerse iguales a las consultas del código indicado en "origen"
+CONSULTAS_FRECUENTES = [
+    (
+        'sesion_activa_actual',
+        'GestorAcademicoAutomatico.obtener_sesion_activa_actual',
+        """
+        SELECT id_sesion, nombre_sesion, descripcion, fecha_programada, hora_inicio,
+               hora_fin, aula, estado, asistencia_habilitada
+        FROM sesiones_academicas
+        WHERE fecha_programada = %s AND año = %s AND semestre = %s AND corte = %s
+        AND hora_inicio <= %s AND hora_fin >= %s
+        LIMIT 1
+        """,
+        (date(2025, 10, 20), 2025, '2025-2', 2, time(9, 0), time(9, 0)),
+        ['idx_sesiones_acad_fecha_periodo_horario'],
+    ),
+    (
+        'sesiones_del_dia',
+        'GestorAcademicoAutomatico.obtener_sesiones_del_dia',
+        """
+        SELECT sa.id_sesion, COUNT(aa.id_asistencia)
+        FROM sesiones_academicas sa
+        LEFT JOIN asistencias_academicas aa ON aa.id_sesion = sa.id_sesion
+        WHERE sa.fecha_programada = %s
+        GROUP BY sa.id_sesion
+        """,
+        (date(2025, 10, 20),),
+        ['idx_sesiones_acad_fecha_periodo_horario', 'asistencias_academicas_id_sesion_id_estudiante_key'],
+    ),
+    (
+        'asistencia_existente',
+        'registrar_asistencia_reconocimiento / registrar_asistencia_automatica',
+        """
+        SELECT id_asistencia, estado, minutos_tardanza
+        FROM asistencias_academicas
+        WHERE id_sesion = %s AND id_estudiante = %s
+        """,
+        (1, 1),
+        ['asistencias_academicas_id_sesion_id_estudiante_key'],
+    ),
+    (
+        'estudiante_por_nombre',
+        'registrar_asistencia_reconocimiento',
+        """
+        SELECT id_usuario FROM usuarios
+        WHERE nombre || ' ' || apellido = %s AND rol = 'estudiante'
+        """,
+        ('Ana Pérez',),
+        ['idx_usuarios_nombre_completo_estudiantes'],
+    ),
+    (
+        'asistencias_de_hoy',
+        'main.get_attendance / main.recognition_status',
+        """
+        SELECT aa.id_asistencia
+        FROM asistencias_academicas aa
+        JOIN sesiones_academicas sa ON aa.id_sesion = sa.id_sesion
+        WHERE aa.fecha_registro >= %s AND aa.fecha_registro < %s
+        ORDER BY aa.fecha_registro DESC
+        """,
+        (date(2025, 10, 20), date(2025, 10, 21)),
+        ['idx_asistencias_acad_fecha'],
+    ),
+    (
+        'asistencias_recientes',
+        'GestorAcademicoAutomatico.obtener_asistencias_recientes',
+        """
+        SELECT aa.id_asistencia
+        FROM asistencias_academicas aa
+        ORDER BY aa.fecha_registro DESC
+        LIMIT %s
+        """,
+        (50,),
+        ['idx_asistencias_acad_fecha'],
+    ),
+    (
+        'embeddings_activos',
+        'main.load_face_encodings',
+        """
+        SELECT e.embedding_vector
+        FROM embeddings_faciales e
+        WHERE e.id_usuario = %s AND e.activo = true
+        ORDER BY e.quality_score DESC
+        """,
+        (1,),
+        ['idx_embeddings_usuario_activos'],
+    ),
+    (
+        'estadisticas_corte',
+        'GestorAcademicoAutomatico.obtener_estadisticas_corte_actual',
+        """
+        SELECT total_sesiones FROM estadisticas_corte
+        WHERE año = %s AND semestre = %s AND corte = %s AND id_curso = %s
+        """,
+        (2025, '2025-2', 2, 0),
+        ['estadisticas_corte_pkey'],
+    ),
+    (
+        'resumen_estudiantes_curso',
+        'GestorAcademicoAutomatico.obtener_resumen_estudiantes',
+        """
+        SELECT id_estudiante FROM resumen_asistencia_estudiante r
+        WHERE r.año = %s AND r.semestre = %s AND r.corte = %s AND r.id_curso = %s
+        AND r.porcentaje_asistencia < %s
+        ORDER BY r.porcentaje_asistencia, r.id_estudiante, r.id_curso
+        LIMIT 50
+        """,
+        (2025, '2025-2', 2, 1, 80),
+        ['idx_resumen_curso_porcentaje'],
+    ),
+    (
+        'resumen_estudiantes_corte',
+        'GestorAcademicoAutomatico.obtener_resumen_estudiantes',
+        """
+        SELECT id_estudiante FROM resumen_asistencia_estudiante r
+        WHERE r.año = %s AND r.semestre = %s AND r.corte = %s
+        AND (r.porcentaje_asistencia, r.id_estudiante, r.id_curso) > (%s, %s, %s)
+        ORDER BY r.porcentaje_asistencia, r.id_estudiante, r.id_curso
+        LIMIT 50
+        """,
+        (2025, '2025-2', 2, 75, 10, 1),
+        ['idx_resumen_corte_porcentaje'],
+    ),
+]
+
+
+def conectar():
+    return psycopg2.connect(**DATABASE_CONFIG)
+
+
+def asegurar_tabla_migraciones(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migraciones (
+            version INTEGER PRIMARY KEY,
+            nombre VARCHAR(200) NOT NULL,
+            aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def versiones_aplicadas(cursor):
+    asegurar_tabla_migraciones(cursor)
+    cursor.execute("SELECT version FROM schema_migraciones")
+    return {fila[0] for fila in cursor.fetchall()}
+
+
+def migrar(hasta=None):
+    """Aplica las migraciones pendientes, cada una en su propia transacción"""
+    conn = conectar()
+    cursor = conn.cursor()
+
+    try:
+        aplicadas = versiones_aplicadas(cursor)
+        conn.commit()
+
+        pendientes = [m for m in MIGRACIONES
+                      if m[0] not in aplicadas and (hasta is None or m[0] <= hasta)]
+        if not pendientes:
+            print("✅ El esquema está al día")
+            return True
+
+        for version, nombre, archivo in pendientes:
+            print(f"🔄 Aplicando {version:03d} {nombre} ({archivo})...")
+            with open(os.path.join(DIRECTORIO_SQL, archivo), encoding='utf-8') as f:
+                cursor.execute(f.read())
+            cursor.execute(
+                "INSERT INTO schema_migraciones (version, nombre) VALUES (%s, %s)",
+                (version, nombre)
+            )
+            conn.commit()
+            print(f"✅ Migración {version:03d} aplicada")
+
+        return True
+
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error aplicando migraciones: {e}")
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def marcar_aplicadas(hasta):
+    """Registra las versiones 1..hasta sin ejecutarlas (BD creada antes de las migraciones)"""
+    conn = conectar()
+    cursor = conn.cursor()
+
+    try:
+        asegurar_tabla_migraciones(cursor)
+        for version, nombre, _ in MIGRACIONES:
+            if version <= hasta:
+                cursor.execute("""
+                    INSERT INTO schema_migraciones (version, nombre) VALUES (%s, %s)
+                    ON CONFLICT (version) DO NOTHING
+                """, (version, nombre))
+        conn.commit()
+        print(f"✅ Versiones hasta {hasta:03d} marcadas como aplicadas")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def mostrar_estado():
+    conn = conectar()
+    cursor = conn.cursor()
+
+    try:
+        aplicadas = versiones_aplicadas(cursor)
+        conn.commit()
+        print("📋 MIGRACIONES")
+        print("-"*60)
+        for version, nombre, archivo in MIGRACIONES:
+            icono = "✅" if version in aplicadas else "⏳"
+            print(f"{icono} {version:03d} {nombre:<32} {archivo}")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def nodos_plan(nodo):
+    """Recorre recursivamente los nodos de un plan EXPLAIN (FORMAT JSON)"""
+    yield nodo
+    for hijo in nodo.get('Plans', []):
+        yield from nodos_plan(hijo)
+
+
+def verificar_indices():
+    """
+    Ejecuta EXPLAIN sobre cada consulta frecuente y falla si en el plan no
+    aparece alguno de los índices que se crearon para ella.
+
+    Se desactiva enable_seqscan para que el resultado no dependa del tamaño
+    actual de las tablas; como con eso casi cualquier índice sirve, no basta
+    con que no haya Seq Scan: se exige el índice por su nombre.
+
+    Returns:
+        bool: True si todas las consultas usan sus índices
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    fallos = []
+
+    try:
+        cursor.execute("SET enable_seqscan = off")
+
+        for nombre, origen, sql, parametros, esperados in CONSULTAS_FRECUENTES:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, parametros)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+
+            indices = sorted({
+                nodo['Index Name'] for nodo in nodos_plan(plan[0]['Plan'])
+                if 'Index Name' in nodo
+            })
+            faltantes = [indice for indice in esperados if indice not in indices]
+
+            if faltantes:
+                fallos.append(nombre)
+                print(f"❌ {nombre} ({origen}): no usa {', '.join(faltantes)} "
+                      f"(plan: {', '.join(indices) or 'sin índices'})")
+            else:
+                print(f"✅ {nombre}: {', '.join(indices)}")
+
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+    if fallos:
+        print(f"\n❌ {len(fallos)} consultas sin su índice: {', '.join(fallos)}")
+        return False
+
+    print(f"\n✅ Las {len(CONSULTAS_FRECUENTES)} consultas frecuentes usan sus índices")
+    return True
+
+
+def main():
+    comando = sys.argv[1] if len(sys.argv) > 1 else 'migrar'
+
+    if comando == 'migrar':
+        ok = migrar()
+    elif comando == 'estado':
+        mostrar_estado()
+        ok = True
+    elif comando == 'marcar' and len(sys.argv) > 2:
+        marcar_aplicadas(int(sys.argv[2]))
+        ok = True
+    elif comando == 'verificar':
+        ok = verificar_indices()
+    else:
+        print(__doc__)
+        ok = False
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
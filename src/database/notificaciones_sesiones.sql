@@ -0,0 +1,42 @@
+-- ============================================================
+-- NOTIFICACIONES DE CAMBIOS EN SESIONES
+-- ============================================================
+-- Base de datos: prototipoPG_v2
+-- Requiere: schema_sesiones_academicas.sql
+-- ============================================================
+-- Publica el id de cada sesión creada, reprogramada o reabierta en el
+-- canal 'sesiones_academicas'. El planificador de main.py
+-- (src/utils/planificador_sesiones.py) escucha el canal con LISTEN y
+-- agrega solo esas sesiones a su heap, sin volver a consultar la tabla.
+-- Las notificaciones se entregan al hacer COMMIT.
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION notificar_cambio_sesion()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('sesiones_academicas', NEW.id_sesion::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_notificar_sesion_insert ON sesiones_academicas;
+CREATE TRIGGER trigger_notificar_sesion_insert
+    AFTER INSERT ON sesiones_academicas
+    FOR EACH ROW
+    EXECUTE FUNCTION notificar_cambio_sesion();
+
+DROP TRIGGER IF EXISTS trigger_notificar_sesion_update ON sesiones_academicas;
+CREATE TRIGGER trigger_notificar_sesion_update
+    AFTER UPDATE ON sesiones_academicas
+    FOR EACH ROW
+    WHEN (
+        OLD.fecha_programada IS DISTINCT FROM NEW.fecha_programada
+        OR OLD.hora_inicio IS DISTINCT FROM NEW.hora_inicio
+        OR OLD.hora_fin IS DISTINCT FROM NEW.hora_fin
+        OR (OLD.estado IN ('finalizada', 'cancelada') AND NEW.estado NOT IN ('finalizada', 'cancelada'))
+    )
+    EXECUTE FUNCTION notificar_cambio_sesion();
+
+-- ============================================================
+-- FIN DE NOTIFICACIONES DE SESIONES
+-- ============================================================
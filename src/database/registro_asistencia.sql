@@ -0,0 +1,176 @@
+-- ============================================================
+-- REGISTRO DE ASISTENCIA EN UN SOLO VIAJE A LA BASE DE DATOS
+-- ============================================================
+-- Base de datos: prototipoPG_v2
+-- Requiere: indices_consultas_frecuentes.sql (restricción única
+-- asistencias_academicas (id_sesion, id_estudiante)),
+-- contadores_sesion.sql (trigger asignar_numero_sesion) y
+-- estado_asistencia.sql (calcular_estado_asistencia)
+-- ============================================================
+-- registrar_asistencia_reconocimiento() reemplaza la secuencia de
+-- mark_attendance (buscar estudiante, buscar/crear sesión, habilitarla,
+-- verificar duplicado, leer tolerancia, insertar) por una sola llamada.
+--
+-- Con varias cámaras cada una registra en la sesión de su aula:
+--   p_id_sesion: la sesión activa del aula que resolvió la cámara
+--                (CacheAcademico.obtener_sesion_activa(aula=...))
+--   p_aula:      sin p_id_sesion, solo se buscan sesiones de esa aula y,
+--                si no hay ninguna, se crea la automática en esa aula
+--   p_id_curso:  curso de la sesión automática (NULL si la cámara no
+--                tiene uno configurado)
+-- Una cámara sin aula busca en cualquier aula.
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION registrar_asistencia_reconocimiento(
+    p_nombre_completo TEXT,
+    p_año INTEGER,
+    p_semestre VARCHAR,
+    p_corte INTEGER,
+    p_momento TIMESTAMP DEFAULT LOCALTIMESTAMP,
+    p_confidence DOUBLE PRECISION DEFAULT NULL,
+    p_metodo VARCHAR DEFAULT 'reconocimiento_facial',
+    p_id_curso INTEGER DEFAULT NULL,
+    p_id_sesion INTEGER DEFAULT NULL,
+    p_aula VARCHAR DEFAULT NULL
+)
+RETURNS TABLE (
+    resultado VARCHAR,
+    estudiante INTEGER,
+    sesion INTEGER,
+    sesion_creada BOOLEAN,
+    sesion_habilitada BOOLEAN,
+    estado_registro VARCHAR,
+    tardanza_minutos INTEGER
+) AS $$
+DECLARE
+    v_fecha DATE := p_momento::date;
+    v_hora TIME := p_momento::time;
+    v_sesion RECORD;
+    v_id_asistencia INTEGER;
+BEGIN
+    sesion_creada := false;
+    sesion_habilitada := false;
+
+    -- 1. Estudiante (índice idx_usuarios_nombre_completo_estudiantes)
+    SELECT u.id_usuario INTO estudiante
+    FROM usuarios u
+    WHERE u.nombre || ' ' || u.apellido = p_nombre_completo AND u.rol = 'estudiante'
+    LIMIT 1;
+
+    IF estudiante IS NULL THEN
+        resultado := 'estudiante_no_encontrado';
+        RETURN NEXT;
+        RETURN;
+    END IF;
+
+    -- 2. La sesión que resolvió la cámara (sesión activa de su aula) si sigue
+    --    abierta y su horario contiene el momento: la cache de main.py puede
+    --    traer una sesión que el planificador o cerrar_sesiones() ya cerró, y
+    --    habilitarla la reabriría (y quitaría sus ausencias). Si no la indicó o
+    --    ya no vale, la de hoy en esa aula cuyo horario contiene el momento
+    IF p_id_sesion IS NOT NULL THEN
+        SELECT sa.id_sesion, sa.hora_inicio, sa.tolerancia_minutos, sa.asistencia_habilitada
+        INTO v_sesion
+        FROM sesiones_academicas sa
+        WHERE sa.id_sesion = p_id_sesion
+        AND sa.fecha_programada = v_fecha
+        AND sa.hora_inicio <= v_hora AND sa.hora_fin >= v_hora
+        AND sa.estado NOT IN ('finalizada', 'cancelada');
+    END IF;
+
+    IF p_id_sesion IS NULL OR NOT FOUND THEN
+        SELECT sa.id_sesion, sa.hora_inicio, sa.tolerancia_minutos, sa.asistencia_habilitada
+        INTO v_sesion
+        FROM sesiones_academicas sa
+        WHERE sa.fecha_programada = v_fecha
+        AND sa.año = p_año AND sa.semestre = p_semestre AND sa.corte = p_corte
+        AND sa.hora_inicio <= v_hora AND sa.hora_fin >= v_hora
+        AND sa.estado NOT IN ('finalizada', 'cancelada')
+        AND (p_aula IS NULL OR sa.aula = p_aula)
+        ORDER BY sa.asistencia_habilitada DESC, sa.hora_inicio
+        LIMIT 1;
+    END IF;
+
+    IF NOT FOUND THEN
+        -- Serializar solo la creación automática de ese día en esa aula (dos cámaras a la vez)
+        PERFORM pg_advisory_xact_lock(hashtext('sesion_automatica:' || v_fecha::text || ':' || COALESCE(p_aula, '')));
+
+        SELECT sa.id_sesion, sa.hora_inicio, sa.tolerancia_minutos, sa.asistencia_habilitada
+        INTO v_sesion
+        FROM sesiones_academicas sa
+        WHERE sa.fecha_programada = v_fecha
+        AND sa.año = p_año AND sa.semestre = p_semestre AND sa.corte = p_corte
+        AND sa.hora_inicio <= v_hora AND sa.hora_fin >= v_hora
+        AND sa.estado NOT IN ('finalizada', 'cancelada')
+        AND (p_aula IS NULL OR sa.aula = p_aula)
+        ORDER BY sa.asistencia_habilitada DESC, sa.hora_inicio
+        LIMIT 1;
+    END IF;
+
+    IF NOT FOUND THEN
+        -- Solo si el aula no tiene ninguna sesión abierta en este momento; el curso es el
+        -- configurado para la cámara (NULL si no tiene), nunca uno fijo.
+        -- numero_sesion lo asigna el trigger asignar_numero_sesion
+        INSERT INTO sesiones_academicas (
+            año, semestre, corte, id_curso, nombre_sesion,
+            descripcion, fecha_programada, hora_inicio, hora_fin, dia_semana,
+            aula, estado, asistencia_habilitada, tolerancia_minutos,
+            duracion_horas, tipo_clase, creada_en
+        ) VALUES (
+            p_año, p_semestre, p_corte, p_id_curso,
+            'Sesión Automática - ' || to_char(v_fecha, 'DD/MM/YYYY'),
+            'Sesión creada automáticamente por reconocimiento facial',
+            -- TIME + INTERVAL da la vuelta a medianoche: después de las 23:00 la sesión termina a las 23:59:59
+            v_fecha, v_hora, CASE WHEN v_hora >= TIME '23:00' THEN TIME '23:59:59' ELSE v_hora + INTERVAL '1 hour' END,
+            (ARRAY['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo'])[EXTRACT(ISODOW FROM v_fecha)::int],
+            COALESCE(p_aula, 'Aula Reconocimiento Facial'), 'activa', true, 15,
+            1.0, 'reconocimiento', p_momento
+        )
+        RETURNING id_sesion, hora_inicio, tolerancia_minutos, asistencia_habilitada
+        INTO v_sesion;
+
+        sesion_creada := true;
+    ELSIF NOT v_sesion.asistencia_habilitada THEN
+        -- 3. Habilitar la asistencia automáticamente
+        UPDATE sesiones_academicas
+        SET asistencia_habilitada = true,
+            estado = 'activa',
+            actualizada_en = CURRENT_TIMESTAMP
+        WHERE id_sesion = v_sesion.id_sesion;
+
+        sesion_habilitada := true;
+    END IF;
+
+    sesion := v_sesion.id_sesion;
+
+    -- 4. Presente o tardanza según la tolerancia de la sesión
+    SELECT e.estado, e.minutos_tardanza INTO estado_registro, tardanza_minutos
+    FROM calcular_estado_asistencia(p_momento, v_fecha + v_sesion.hora_inicio, v_sesion.tolerancia_minutos) e;
+
+    -- 5. Insertar salvo que ya exista (restricción única id_sesion, id_estudiante)
+    INSERT INTO asistencias_academicas (
+        id_sesion, id_estudiante, fecha_registro, metodo_registro,
+        confidence_score, estado, minutos_tardanza
+    ) VALUES (
+        sesion, estudiante, p_momento, p_metodo,
+        p_confidence, estado_registro, tardanza_minutos
+    )
+    ON CONFLICT (id_sesion, id_estudiante) DO NOTHING
+    RETURNING id_asistencia INTO v_id_asistencia;
+
+    IF v_id_asistencia IS NULL THEN
+        resultado := 'ya_registrada';
+        SELECT aa.estado, aa.minutos_tardanza INTO estado_registro, tardanza_minutos
+        FROM asistencias_academicas aa
+        WHERE aa.id_sesion = sesion AND aa.id_estudiante = estudiante;
+    ELSE
+        resultado := 'registrada';
+    END IF;
+
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================
+-- FIN DEL REGISTRO DE ASISTENCIA
+-- ============================================================
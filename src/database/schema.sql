@@ -11,22 +11,47 @@
 -- ============================================================
 
 -- Tipo para roles de usuario
-CREATE TYPE rol_usuario AS ENUM ('estudiante', 'profesor', 'administrador');
+DO $$ BEGIN
+    CREATE TYPE rol_usuario AS ENUM ('estudiante', 'profesor', 'administrador');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
 
 -- Tipo para estados de usuario
-CREATE TYPE estado_usuario AS ENUM ('activo', 'inactivo', 'suspendido');
+DO $$ BEGIN
+    CREATE TYPE estado_usuario AS ENUM ('activo', 'inactivo', 'suspendido');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
 
 -- Tipo para estados de curso
-CREATE TYPE estado_curso AS ENUM ('activo', 'finalizado', 'cancelado');
+DO $$ BEGIN
+    CREATE TYPE estado_curso AS ENUM ('activo', 'finalizado', 'cancelado');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
 
 -- Tipo para métodos de registro (backup)
-CREATE TYPE metodo_registro AS ENUM ('reconocimiento_facial', 'manual', 'qr_code');
+DO $$ BEGIN
+    CREATE TYPE metodo_registro AS ENUM ('reconocimiento_facial', 'manual', 'qr_code');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
 
 -- Tipo para estados de asistencia (backup)
-CREATE TYPE estado_asistencia AS ENUM ('presente', 'tardanza', 'ausente', 'justificado');
+DO $$ BEGIN
+    CREATE TYPE estado_asistencia AS ENUM ('presente', 'tardanza', 'ausente', 'justificado');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
 
 -- Tipo para tipos de sesión (backup)
-CREATE TYPE tipo_sesion AS ENUM ('teorica', 'practica', 'laboratorio', 'evaluacion', 'taller');
+DO $$ BEGIN
+    CREATE TYPE tipo_sesion AS ENUM ('teorica', 'practica', 'laboratorio', 'evaluacion', 'taller');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+-- ============================================================
+-- SECUENCIAS
+-- ============================================================
+
+CREATE SEQUENCE IF NOT EXISTS usuarios_id_usuario_seq;
+CREATE SEQUENCE IF NOT EXISTS embeddings_faciales_id_embedding_seq;
 
 -- ============================================================
 -- TABLAS PRINCIPALES
@@ -118,7 +143,7 @@ CREATE TABLE IF NOT EXISTS backup_sesiones (
     creada_en TIMESTAMP NULL,
     hora_inicio TIME WITHOUT TIME ZONE NULL,
     hora_fin TIME WITHOUT TIME ZONE NULL,
-    dias_semana ARRAY NULL,
+    dias_semana TEXT[] NULL,
     fecha_creacion TIMESTAMP NULL,
     estado_sesion VARCHAR(20) NULL,
     id_corte INTEGER NULL,
@@ -127,26 +152,6 @@ CREATE TABLE IF NOT EXISTS backup_sesiones (
     backup_fecha TIMESTAMPTZ NULL
 );
 
--- Tabla: inscripciones
-CREATE TABLE IF NOT EXISTS inscripciones (
-    id_inscripcion INTEGER DEFAULT nextval('inscripciones_id_inscripcion_seq'::regclass) NOT NULL,
-    id_estudiante INTEGER NULL,
-    id_curso INTEGER NULL,
-    fecha_inscripcion TIMESTAMP DEFAULT CURRENT_TIMESTAMP NULL,
-    estado ESTADO_USUARIO DEFAULT 'activo'::estado_usuario NULL,
-    PRIMARY KEY (id_inscripcion),
-    CONSTRAINT inscripciones_id_estudiante_fkey FOREIGN KEY (id_estudiante) REFERENCES usuarios(id_usuario) ON DELETE CASCADE ON UPDATE CASCADE,
-    CONSTRAINT inscripciones_id_curso_fkey FOREIGN KEY (id_curso) REFERENCES cursos(id_curso) ON DELETE CASCADE ON UPDATE CASCADE,
-    CONSTRAINT inscripciones_estudiante_curso_unique UNIQUE (id_estudiante, id_curso)
-);
-
-CREATE INDEX IF NOT EXISTS idx_inscripciones_curso ON inscripciones (id_curso);
-CREATE INDEX IF NOT EXISTS idx_inscripciones_estudiante ON inscripciones (id_estudiante);
-CREATE UNIQUE INDEX IF NOT EXISTS inscripciones_id_estudiante_id_curso_key ON inscripciones (id_estudiante, id_curso);
-
-COMMENT ON TABLE inscripciones IS 'Relación entre estudiantes y cursos (matrícula)';
-COMMENT ON COLUMN inscripciones.estado IS 'Estado de la inscripción: activo, inactivo';
-
 -- ============================================================
 -- FUNCIONES AUXILIARES
 -- ============================================================
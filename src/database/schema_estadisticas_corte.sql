@@ -0,0 +1,398 @@
+-- ============================================================
+-- SCHEMA DE ESTADÍSTICAS POR CORTE (ROLLUP INCREMENTAL)
+-- ============================================================
+-- Base de datos: prototipoPG_v2
+-- Requiere: schema.sql y schema_sesiones_academicas.sql
+-- ============================================================
+-- Mantiene contadores por (año, semestre, corte, id_curso) que se
+-- actualizan con cada sentencia que escribe asistencias o cambia el
+-- estado de sesiones. La fila con id_curso = 0 acumula el total del corte.
+-- Para recalcular desde cero: python src/utils/reconstruir_estadisticas.py
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS estadisticas_corte (
+    año INTEGER NOT NULL,
+    semestre VARCHAR(20) NOT NULL,
+    corte INTEGER NOT NULL,
+    id_curso INTEGER DEFAULT 0 NOT NULL,
+    total_sesiones INTEGER DEFAULT 0 NOT NULL,
+    sesiones_programadas INTEGER DEFAULT 0 NOT NULL,
+    sesiones_activas INTEGER DEFAULT 0 NOT NULL,
+    sesiones_finalizadas INTEGER DEFAULT 0 NOT NULL,
+    total_asistencias INTEGER DEFAULT 0 NOT NULL,
+    asistencias_puntuales INTEGER DEFAULT 0 NOT NULL,
+    asistencias_tardias INTEGER DEFAULT 0 NOT NULL,
+    ausencias INTEGER DEFAULT 0 NOT NULL,
+    registros_tardanza INTEGER DEFAULT 0 NOT NULL,
+    suma_minutos_tardanza BIGINT DEFAULT 0 NOT NULL,
+    actualizada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP NULL,
+    PRIMARY KEY (año, semestre, corte, id_curso)
+);
+
+COMMENT ON TABLE estadisticas_corte IS 'Rollup incremental de sesiones y asistencias por corte y curso';
+COMMENT ON COLUMN estadisticas_corte.id_curso IS 'Curso de las sesiones; 0 = total del corte';
+COMMENT ON COLUMN estadisticas_corte.registros_tardanza IS 'Asistencias con minutos_tardanza no nulo (denominador del promedio)';
+COMMENT ON COLUMN estadisticas_corte.suma_minutos_tardanza IS 'Suma de minutos_tardanza (numerador del promedio)';
+
+-- ============================================================
+-- FUNCIONES DE MANTENIMIENTO
+-- ============================================================
+
+-- Aplica un delta a la fila del curso y a la fila total (id_curso = 0)
+CREATE OR REPLACE FUNCTION ajustar_estadisticas_corte(
+    p_año INTEGER, p_semestre VARCHAR, p_corte INTEGER, p_id_curso INTEGER,
+    d_sesiones INTEGER, d_programadas INTEGER, d_activas INTEGER, d_finalizadas INTEGER,
+    d_asistencias INTEGER, d_puntuales INTEGER, d_tardias INTEGER, d_ausencias INTEGER,
+    d_registros_tardanza INTEGER, d_minutos BIGINT
+)
+RETURNS VOID AS $$
+DECLARE
+    v_curso INTEGER;
+BEGIN
+    FOR v_curso IN SELECT DISTINCT unnest(ARRAY[0, COALESCE(p_id_curso, 0)]) LOOP
+        INSERT INTO estadisticas_corte AS ec (
+            año, semestre, corte, id_curso,
+            total_sesiones, sesiones_programadas, sesiones_activas, sesiones_finalizadas,
+            total_asistencias, asistencias_puntuales, asistencias_tardias, ausencias,
+            registros_tardanza, suma_minutos_tardanza
+        ) VALUES (
+            p_año, p_semestre, p_corte, v_curso,
+            d_sesiones, d_programadas, d_activas, d_finalizadas,
+            d_asistencias, d_puntuales, d_tardias, d_ausencias,
+            d_registros_tardanza, d_minutos
+        )
+        ON CONFLICT (año, semestre, corte, id_curso) DO UPDATE SET
+            total_sesiones = ec.total_sesiones + EXCLUDED.total_sesiones,
+            sesiones_programadas = ec.sesiones_programadas + EXCLUDED.sesiones_programadas,
+            sesiones_activas = ec.sesiones_activas + EXCLUDED.sesiones_activas,
+            sesiones_finalizadas = ec.sesiones_finalizadas + EXCLUDED.sesiones_finalizadas,
+            total_asistencias = ec.total_asistencias + EXCLUDED.total_asistencias,
+            asistencias_puntuales = ec.asistencias_puntuales + EXCLUDED.asistencias_puntuales,
+            asistencias_tardias = ec.asistencias_tardias + EXCLUDED.asistencias_tardias,
+            ausencias = ec.ausencias + EXCLUDED.ausencias,
+            registros_tardanza = ec.registros_tardanza + EXCLUDED.registros_tardanza,
+            suma_minutos_tardanza = ec.suma_minutos_tardanza + EXCLUDED.suma_minutos_tardanza,
+            actualizada_en = CURRENT_TIMESTAMP;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Contribución de una sesión (signo = 1 suma, -1 resta)
+CREATE OR REPLACE FUNCTION aplicar_sesion_estadisticas(s sesiones_academicas, signo INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM ajustar_estadisticas_corte(
+        s.año, s.semestre, s.corte, s.id_curso,
+        signo,
+        signo * CASE WHEN s.estado = 'programada' THEN 1 ELSE 0 END,
+        signo * CASE WHEN s.estado = 'activa' THEN 1 ELSE 0 END,
+        signo * CASE WHEN s.estado = 'finalizada' THEN 1 ELSE 0 END,
+        0, 0, 0, 0, 0, 0
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Contribución de todas las asistencias de una sesión (al borrar la sesión)
+CREATE OR REPLACE FUNCTION aplicar_asistencias_sesion_estadisticas(s sesiones_academicas, signo INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    t RECORD;
+BEGIN
+    SELECT
+        COUNT(*) AS total,
+        COUNT(CASE WHEN estado = 'presente' THEN 1 END) AS puntuales,
+        COUNT(CASE WHEN estado = 'tardanza' THEN 1 END) AS tardias,
+        COUNT(CASE WHEN estado = 'ausente' THEN 1 END) AS ausencias,
+        COUNT(minutos_tardanza) AS registros,
+        COALESCE(SUM(minutos_tardanza), 0) AS minutos
+    INTO t
+    FROM asistencias_academicas
+    WHERE id_sesion = s.id_sesion;
+
+    IF t.total > 0 THEN
+        PERFORM ajustar_estadisticas_corte(
+            s.año, s.semestre, s.corte, s.id_curso,
+            0, 0, 0, 0,
+            signo * t.total, signo * t.puntuales, signo * t.tardias, signo * t.ausencias,
+            signo * t.registros, signo * t.minutos
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Delta de una sesión en forma de fila de estadisticas_corte (signo = 1 suma, -1 resta)
+CREATE OR REPLACE FUNCTION delta_sesion_estadisticas(
+    p_año INTEGER, p_semestre VARCHAR, p_corte INTEGER, p_id_curso INTEGER,
+    p_estado VARCHAR, signo INTEGER
+)
+RETURNS estadisticas_corte AS $$
+    SELECT ROW(
+        p_año, p_semestre, p_corte, COALESCE(p_id_curso, 0),
+        signo,
+        signo * CASE WHEN p_estado = 'programada' THEN 1 ELSE 0 END,
+        signo * CASE WHEN p_estado = 'activa' THEN 1 ELSE 0 END,
+        signo * CASE WHEN p_estado = 'finalizada' THEN 1 ELSE 0 END,
+        0, 0, 0, 0, 0, 0, NULL
+    )::estadisticas_corte;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Delta de una asistencia de una sesión del período dado
+CREATE OR REPLACE FUNCTION delta_asistencia_estadisticas(
+    p_año INTEGER, p_semestre VARCHAR, p_corte INTEGER, p_id_curso INTEGER,
+    p_estado VARCHAR, p_minutos_tardanza INTEGER, signo INTEGER
+)
+RETURNS estadisticas_corte AS $$
+    SELECT ROW(
+        p_año, p_semestre, p_corte, COALESCE(p_id_curso, 0),
+        0, 0, 0, 0,
+        signo,
+        signo * CASE WHEN p_estado = 'presente' THEN 1 ELSE 0 END,
+        signo * CASE WHEN p_estado = 'tardanza' THEN 1 ELSE 0 END,
+        signo * CASE WHEN p_estado = 'ausente' THEN 1 ELSE 0 END,
+        signo * CASE WHEN p_minutos_tardanza IS NOT NULL THEN 1 ELSE 0 END,
+        signo * COALESCE(p_minutos_tardanza, 0),
+        NULL
+    )::estadisticas_corte;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Aplica de una vez los deltas de toda una sentencia: los agrega por curso y
+-- por corte (fila id_curso = 0) y hace un solo upsert por fila afectada, en
+-- el mismo orden en todas las transacciones. Así la fila total del corte se
+-- bloquea una vez por sentencia y no una vez por asistencia.
+CREATE OR REPLACE FUNCTION ajustar_estadisticas_corte_lote(p_deltas estadisticas_corte[])
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO estadisticas_corte AS ec (
+        año, semestre, corte, id_curso,
+        total_sesiones, sesiones_programadas, sesiones_activas, sesiones_finalizadas,
+        total_asistencias, asistencias_puntuales, asistencias_tardias, ausencias,
+        registros_tardanza, suma_minutos_tardanza
+    )
+    SELECT
+        d.año, d.semestre, d.corte, COALESCE(d.id_curso, 0),
+        SUM(d.total_sesiones), SUM(d.sesiones_programadas), SUM(d.sesiones_activas), SUM(d.sesiones_finalizadas),
+        SUM(d.total_asistencias), SUM(d.asistencias_puntuales), SUM(d.asistencias_tardias), SUM(d.ausencias),
+        SUM(d.registros_tardanza), SUM(d.suma_minutos_tardanza)
+    FROM unnest(p_deltas) d
+    GROUP BY GROUPING SETS ((d.año, d.semestre, d.corte, d.id_curso), (d.año, d.semestre, d.corte))
+    -- Las sesiones sin curso (id_curso = 0) solo cuentan en la fila total
+    HAVING GROUPING(d.id_curso) = 1 OR d.id_curso <> 0
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (año, semestre, corte, id_curso) DO UPDATE SET
+        total_sesiones = ec.total_sesiones + EXCLUDED.total_sesiones,
+        sesiones_programadas = ec.sesiones_programadas + EXCLUDED.sesiones_programadas,
+        sesiones_activas = ec.sesiones_activas + EXCLUDED.sesiones_activas,
+        sesiones_finalizadas = ec.sesiones_finalizadas + EXCLUDED.sesiones_finalizadas,
+        total_asistencias = ec.total_asistencias + EXCLUDED.total_asistencias,
+        asistencias_puntuales = ec.asistencias_puntuales + EXCLUDED.asistencias_puntuales,
+        asistencias_tardias = ec.asistencias_tardias + EXCLUDED.asistencias_tardias,
+        ausencias = ec.ausencias + EXCLUDED.ausencias,
+        registros_tardanza = ec.registros_tardanza + EXCLUDED.registros_tardanza,
+        suma_minutos_tardanza = ec.suma_minutos_tardanza + EXCLUDED.suma_minutos_tardanza,
+        actualizada_en = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================
+-- TRIGGERS
+-- ============================================================
+-- Inserciones y actualizaciones usan triggers por sentencia con tablas de
+-- transición (nuevas / anteriores): un lote de asistencias o un cambio de
+-- estado de muchas sesiones ajusta las estadísticas una sola vez.
+
+CREATE OR REPLACE FUNCTION trigger_estadisticas_sesiones_insertadas()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM ajustar_estadisticas_corte_lote(ARRAY(
+        SELECT delta_sesion_estadisticas(n.año, n.semestre, n.corte, n.id_curso, n.estado, 1)
+        FROM nuevas n
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trigger_estadisticas_sesiones_actualizadas()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM ajustar_estadisticas_corte_lote(ARRAY(
+        SELECT v.delta
+        FROM anteriores a
+        JOIN nuevas n ON n.id_sesion = a.id_sesion
+        CROSS JOIN LATERAL (VALUES
+            (delta_sesion_estadisticas(a.año, a.semestre, a.corte, a.id_curso, a.estado, -1)),
+            (delta_sesion_estadisticas(n.año, n.semestre, n.corte, n.id_curso, n.estado, 1))
+        ) v(delta)
+        WHERE (a.estado, a.año, a.semestre, a.corte, a.id_curso)
+              IS DISTINCT FROM (n.estado, n.año, n.semestre, n.corte, n.id_curso)
+        UNION ALL
+        -- Si la sesión cambia de período o curso, sus asistencias la acompañan
+        SELECT v.delta
+        FROM anteriores a
+        JOIN nuevas n ON n.id_sesion = a.id_sesion
+        JOIN asistencias_academicas aa ON aa.id_sesion = n.id_sesion
+        CROSS JOIN LATERAL (VALUES
+            (delta_asistencia_estadisticas(a.año, a.semestre, a.corte, a.id_curso, aa.estado, aa.minutos_tardanza, -1)),
+            (delta_asistencia_estadisticas(n.año, n.semestre, n.corte, n.id_curso, aa.estado, aa.minutos_tardanza, 1))
+        ) v(delta)
+        WHERE (a.año, a.semestre, a.corte, a.id_curso)
+              IS DISTINCT FROM (n.año, n.semestre, n.corte, n.id_curso)
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- El borrado de sesiones es por fila y BEFORE: las asistencias se
+-- borran en cascada y hay que descontarlas mientras la sesión todavía existe
+-- (después el trigger de asistencias ya no encuentra su período)
+CREATE OR REPLACE FUNCTION trigger_estadisticas_sesion()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM aplicar_sesion_estadisticas(OLD, -1);
+    PERFORM aplicar_asistencias_sesion_estadisticas(OLD, -1);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_estadisticas_sesion_insert ON sesiones_academicas;
+CREATE TRIGGER trigger_estadisticas_sesion_insert
+    AFTER INSERT ON sesiones_academicas
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION trigger_estadisticas_sesiones_insertadas();
+
+DROP TRIGGER IF EXISTS trigger_estadisticas_sesion_update ON sesiones_academicas;
+CREATE TRIGGER trigger_estadisticas_sesion_update
+    AFTER UPDATE ON sesiones_academicas
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION trigger_estadisticas_sesiones_actualizadas();
+
+DROP TRIGGER IF EXISTS trigger_estadisticas_sesion_delete ON sesiones_academicas;
+CREATE TRIGGER trigger_estadisticas_sesion_delete
+    BEFORE DELETE ON sesiones_academicas
+    FOR EACH ROW
+    EXECUTE FUNCTION trigger_estadisticas_sesion();
+
+CREATE OR REPLACE FUNCTION trigger_estadisticas_asistencias_insertadas()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM ajustar_estadisticas_corte_lote(ARRAY(
+        SELECT delta_asistencia_estadisticas(s.año, s.semestre, s.corte, s.id_curso, n.estado, n.minutos_tardanza, 1)
+        FROM nuevas n
+        JOIN sesiones_academicas s ON s.id_sesion = n.id_sesion
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trigger_estadisticas_asistencias_borradas()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Las asistencias borradas en cascada con su sesión ya no la encuentran:
+    -- su aporte se descontó en el BEFORE DELETE de la sesión
+    PERFORM ajustar_estadisticas_corte_lote(ARRAY(
+        SELECT delta_asistencia_estadisticas(s.año, s.semestre, s.corte, s.id_curso, a.estado, a.minutos_tardanza, -1)
+        FROM anteriores a
+        JOIN sesiones_academicas s ON s.id_sesion = a.id_sesion
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trigger_estadisticas_asistencias_actualizadas()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM ajustar_estadisticas_corte_lote(ARRAY(
+        SELECT v.delta
+        FROM anteriores a
+        JOIN nuevas n ON n.id_asistencia = a.id_asistencia
+        JOIN sesiones_academicas sa ON sa.id_sesion = a.id_sesion
+        JOIN sesiones_academicas sn ON sn.id_sesion = n.id_sesion
+        CROSS JOIN LATERAL (VALUES
+            (delta_asistencia_estadisticas(sa.año, sa.semestre, sa.corte, sa.id_curso, a.estado, a.minutos_tardanza, -1)),
+            (delta_asistencia_estadisticas(sn.año, sn.semestre, sn.corte, sn.id_curso, n.estado, n.minutos_tardanza, 1))
+        ) v(delta)
+        WHERE (a.id_sesion, a.estado, a.minutos_tardanza)
+              IS DISTINCT FROM (n.id_sesion, n.estado, n.minutos_tardanza)
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_estadisticas_asistencia_insert ON asistencias_academicas;
+CREATE TRIGGER trigger_estadisticas_asistencia_insert
+    AFTER INSERT ON asistencias_academicas
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION trigger_estadisticas_asistencias_insertadas();
+
+DROP TRIGGER IF EXISTS trigger_estadisticas_asistencia_delete ON asistencias_academicas;
+CREATE TRIGGER trigger_estadisticas_asistencia_delete
+    AFTER DELETE ON asistencias_academicas
+    REFERENCING OLD TABLE AS anteriores
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION trigger_estadisticas_asistencias_borradas();
+
+DROP TRIGGER IF EXISTS trigger_estadisticas_asistencia_update ON asistencias_academicas;
+CREATE TRIGGER trigger_estadisticas_asistencia_update
+    AFTER UPDATE ON asistencias_academicas
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION trigger_estadisticas_asistencias_actualizadas();
+
+-- ============================================================
+-- RECONSTRUCCIÓN COMPLETA (BACKFILL)
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION reconstruir_estadisticas_corte()
+RETURNS INTEGER AS $$
+DECLARE
+    v_filas INTEGER;
+BEGIN
+    -- Bloquear escrituras mientras se recalcula para no perder deltas
+    LOCK TABLE sesiones_academicas, asistencias_academicas IN SHARE MODE;
+    DELETE FROM estadisticas_corte;
+
+    INSERT INTO estadisticas_corte (
+        año, semestre, corte, id_curso,
+        total_sesiones, sesiones_programadas, sesiones_activas, sesiones_finalizadas,
+        total_asistencias, asistencias_puntuales, asistencias_tardias, ausencias,
+        registros_tardanza, suma_minutos_tardanza
+    )
+    WITH por_sesion AS (
+        SELECT
+            sa.año, sa.semestre, sa.corte, COALESCE(sa.id_curso, 0) AS id_curso, sa.estado,
+            COUNT(aa.id_asistencia) AS total,
+            COUNT(CASE WHEN aa.estado = 'presente' THEN 1 END) AS puntuales,
+            COUNT(CASE WHEN aa.estado = 'tardanza' THEN 1 END) AS tardias,
+            COUNT(CASE WHEN aa.estado = 'ausente' THEN 1 END) AS ausencias,
+            COUNT(aa.minutos_tardanza) AS registros,
+            COALESCE(SUM(aa.minutos_tardanza), 0) AS minutos
+        FROM sesiones_academicas sa
+        LEFT JOIN asistencias_academicas aa ON aa.id_sesion = sa.id_sesion
+        GROUP BY sa.id_sesion
+    )
+    SELECT
+        año, semestre, corte, COALESCE(id_curso, 0),
+        COUNT(*),
+        COUNT(CASE WHEN estado = 'programada' THEN 1 END),
+        COUNT(CASE WHEN estado = 'activa' THEN 1 END),
+        COUNT(CASE WHEN estado = 'finalizada' THEN 1 END),
+        SUM(total), SUM(puntuales), SUM(tardias), SUM(ausencias),
+        SUM(registros), SUM(minutos)
+    FROM por_sesion
+    GROUP BY GROUPING SETS ((año, semestre, corte, id_curso), (año, semestre, corte))
+    -- Las sesiones sin curso (id_curso = 0) solo cuentan en la fila total
+    HAVING GROUPING(id_curso) = 1 OR id_curso <> 0;
+
+    GET DIAGNOSTICS v_filas = ROW_COUNT;
+    RETURN v_filas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Los triggers solo cuentan escrituras nuevas: cargar lo que ya existe
+SELECT reconstruir_estadisticas_corte();
+
+-- ============================================================
+-- FIN DEL SCHEMA DE ESTADÍSTICAS
+-- ============================================================
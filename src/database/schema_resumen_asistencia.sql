@@ -0,0 +1,284 @@
+-- ============================================================
+-- SCHEMA DE RESUMEN DE ASISTENCIA POR ESTUDIANTE
+-- ============================================================
+-- Base de datos: prototipoPG_v2
+-- Requiere: schema.sql y schema_sesiones_academicas.sql
+-- ============================================================
+-- Contadores por (año, semestre, corte, id_curso, id_estudiante):
+--   * sesiones_dictadas: sesiones del curso que pasaron a 'activa' o
+--     'finalizada', contadas para cada estudiante inscrito (inscripciones)
+--   * presentes / tardanzas / ausentes / minutos_tardanza_total: se
+--     actualizan con cada escritura en asistencias_academicas
+-- Los cambios en inscripciones no se propagan a sesiones ya dictadas;
+-- para recalcular: python src/utils/reconstruir_estadisticas.py
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS resumen_asistencia_estudiante (
+    año INTEGER NOT NULL,
+    semestre VARCHAR(20) NOT NULL,
+    corte INTEGER NOT NULL,
+    id_curso INTEGER DEFAULT 0 NOT NULL,
+    id_estudiante INTEGER NOT NULL,
+    sesiones_dictadas INTEGER DEFAULT 0 NOT NULL,
+    presentes INTEGER DEFAULT 0 NOT NULL,
+    tardanzas INTEGER DEFAULT 0 NOT NULL,
+    ausentes INTEGER DEFAULT 0 NOT NULL,
+    minutos_tardanza_total BIGINT DEFAULT 0 NOT NULL,
+    porcentaje_asistencia NUMERIC(5,2) GENERATED ALWAYS AS (
+        CASE
+            WHEN GREATEST(sesiones_dictadas, presentes + tardanzas + ausentes) = 0 THEN 100
+            ELSE ROUND(100.0 * (presentes + tardanzas)
+                       / GREATEST(sesiones_dictadas, presentes + tardanzas + ausentes), 2)
+        END
+    ) STORED,
+    actualizada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP NULL,
+    PRIMARY KEY (año, semestre, corte, id_curso, id_estudiante),
+    CONSTRAINT resumen_asistencia_id_estudiante_fkey FOREIGN KEY (id_estudiante) REFERENCES usuarios(id_usuario) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+-- Índices para paginar por porcentaje (keyset) sin agregar
+CREATE INDEX IF NOT EXISTS idx_resumen_curso_porcentaje ON resumen_asistencia_estudiante (año, semestre, corte, id_curso, porcentaje_asistencia, id_estudiante);
+-- Sin filtro de curso un estudiante tiene una fila por curso: id_curso completa la clave del cursor
+CREATE INDEX IF NOT EXISTS idx_resumen_corte_porcentaje ON resumen_asistencia_estudiante (año, semestre, corte, porcentaje_asistencia, id_estudiante, id_curso);
+CREATE INDEX IF NOT EXISTS idx_resumen_estudiante ON resumen_asistencia_estudiante (id_estudiante);
+
+COMMENT ON TABLE resumen_asistencia_estudiante IS 'Contadores de asistencia por estudiante, curso y corte';
+COMMENT ON COLUMN resumen_asistencia_estudiante.sesiones_dictadas IS 'Sesiones del curso iniciadas (activa/finalizada) en el corte';
+COMMENT ON COLUMN resumen_asistencia_estudiante.porcentaje_asistencia IS 'Presentes + tardanzas sobre sesiones dictadas (100 si aún no hay sesiones)';
+
+-- ============================================================
+-- FUNCIONES DE MANTENIMIENTO
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION ajustar_resumen_estudiante(
+    p_año INTEGER, p_semestre VARCHAR, p_corte INTEGER, p_id_curso INTEGER, p_id_estudiante INTEGER,
+    d_sesiones INTEGER, d_presentes INTEGER, d_tardanzas INTEGER, d_ausentes INTEGER, d_minutos BIGINT
+)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO resumen_asistencia_estudiante AS r (
+        año, semestre, corte, id_curso, id_estudiante,
+        sesiones_dictadas, presentes, tardanzas, ausentes, minutos_tardanza_total
+    ) VALUES (
+        p_año, p_semestre, p_corte, COALESCE(p_id_curso, 0), p_id_estudiante,
+        d_sesiones, d_presentes, d_tardanzas, d_ausentes, d_minutos
+    )
+    ON CONFLICT (año, semestre, corte, id_curso, id_estudiante) DO UPDATE SET
+        sesiones_dictadas = r.sesiones_dictadas + EXCLUDED.sesiones_dictadas,
+        presentes = r.presentes + EXCLUDED.presentes,
+        tardanzas = r.tardanzas + EXCLUDED.tardanzas,
+        ausentes = r.ausentes + EXCLUDED.ausentes,
+        minutos_tardanza_total = r.minutos_tardanza_total + EXCLUDED.minutos_tardanza_total,
+        actualizada_en = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Una sesión dictada suma 1 a cada estudiante inscrito en su curso (un solo INSERT ... SELECT)
+CREATE OR REPLACE FUNCTION aplicar_sesion_resumen(s sesiones_academicas, signo INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    IF s.id_curso IS NULL OR s.estado NOT IN ('activa', 'finalizada') THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO resumen_asistencia_estudiante AS r (
+        año, semestre, corte, id_curso, id_estudiante, sesiones_dictadas
+    )
+    SELECT s.año, s.semestre, s.corte, s.id_curso, i.id_estudiante, signo
+    FROM inscripciones i
+    WHERE i.id_curso = s.id_curso AND i.estado = 'activo'
+    ON CONFLICT (año, semestre, corte, id_curso, id_estudiante) DO UPDATE SET
+        sesiones_dictadas = r.sesiones_dictadas + EXCLUDED.sesiones_dictadas,
+        actualizada_en = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Todas las asistencias de una sesión, agrupadas por estudiante
+CREATE OR REPLACE FUNCTION aplicar_asistencias_sesion_resumen(s sesiones_academicas, signo INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO resumen_asistencia_estudiante AS r (
+        año, semestre, corte, id_curso, id_estudiante,
+        presentes, tardanzas, ausentes, minutos_tardanza_total
+    )
+    SELECT
+        s.año, s.semestre, s.corte, COALESCE(s.id_curso, 0), aa.id_estudiante,
+        signo * COUNT(CASE WHEN aa.estado = 'presente' THEN 1 END),
+        signo * COUNT(CASE WHEN aa.estado = 'tardanza' THEN 1 END),
+        signo * COUNT(CASE WHEN aa.estado = 'ausente' THEN 1 END),
+        signo * COALESCE(SUM(aa.minutos_tardanza), 0)
+    FROM asistencias_academicas aa
+    WHERE aa.id_sesion = s.id_sesion AND aa.id_estudiante IS NOT NULL
+    GROUP BY aa.id_estudiante
+    ON CONFLICT (año, semestre, corte, id_curso, id_estudiante) DO UPDATE SET
+        presentes = r.presentes + EXCLUDED.presentes,
+        tardanzas = r.tardanzas + EXCLUDED.tardanzas,
+        ausentes = r.ausentes + EXCLUDED.ausentes,
+        minutos_tardanza_total = r.minutos_tardanza_total + EXCLUDED.minutos_tardanza_total,
+        actualizada_en = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION aplicar_asistencia_resumen(a asistencias_academicas, signo INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    s RECORD;
+BEGIN
+    IF a.id_estudiante IS NULL THEN
+        RETURN;
+    END IF;
+
+    SELECT año, semestre, corte, id_curso INTO s
+    FROM sesiones_academicas
+    WHERE id_sesion = a.id_sesion;
+
+    -- Borrado en cascada de la sesión: su aporte se descontó antes
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    PERFORM ajustar_resumen_estudiante(
+        s.año, s.semestre, s.corte, s.id_curso, a.id_estudiante,
+        0,
+        signo * CASE WHEN a.estado = 'presente' THEN 1 ELSE 0 END,
+        signo * CASE WHEN a.estado = 'tardanza' THEN 1 ELSE 0 END,
+        signo * CASE WHEN a.estado = 'ausente' THEN 1 ELSE 0 END,
+        signo * COALESCE(a.minutos_tardanza, 0)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================
+-- TRIGGERS
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION trigger_resumen_sesion()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM aplicar_sesion_resumen(NEW, 1);
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        PERFORM aplicar_sesion_resumen(OLD, -1);
+        PERFORM aplicar_asistencias_sesion_resumen(OLD, -1);
+        RETURN OLD;
+    END IF;
+
+    PERFORM aplicar_sesion_resumen(OLD, -1);
+    PERFORM aplicar_sesion_resumen(NEW, 1);
+
+    IF (OLD.año, OLD.semestre, OLD.corte, OLD.id_curso)
+        IS DISTINCT FROM (NEW.año, NEW.semestre, NEW.corte, NEW.id_curso) THEN
+        PERFORM aplicar_asistencias_sesion_resumen(OLD, -1);
+        PERFORM aplicar_asistencias_sesion_resumen(NEW, 1);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_resumen_sesion_insert ON sesiones_academicas;
+CREATE TRIGGER trigger_resumen_sesion_insert
+    AFTER INSERT ON sesiones_academicas
+    FOR EACH ROW
+    EXECUTE FUNCTION trigger_resumen_sesion();
+
+DROP TRIGGER IF EXISTS trigger_resumen_sesion_update ON sesiones_academicas;
+CREATE TRIGGER trigger_resumen_sesion_update
+    AFTER UPDATE ON sesiones_academicas
+    FOR EACH ROW
+    WHEN ((OLD.estado, OLD.año, OLD.semestre, OLD.corte, OLD.id_curso)
+          IS DISTINCT FROM (NEW.estado, NEW.año, NEW.semestre, NEW.corte, NEW.id_curso))
+    EXECUTE FUNCTION trigger_resumen_sesion();
+
+DROP TRIGGER IF EXISTS trigger_resumen_sesion_delete ON sesiones_academicas;
+CREATE TRIGGER trigger_resumen_sesion_delete
+    BEFORE DELETE ON sesiones_academicas
+    FOR EACH ROW
+    EXECUTE FUNCTION trigger_resumen_sesion();
+
+CREATE OR REPLACE FUNCTION trigger_resumen_asistencia()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM aplicar_asistencia_resumen(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM aplicar_asistencia_resumen(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_resumen_asistencia_insert ON asistencias_academicas;
+CREATE TRIGGER trigger_resumen_asistencia_insert
+    AFTER INSERT OR DELETE ON asistencias_academicas
+    FOR EACH ROW
+    EXECUTE FUNCTION trigger_resumen_asistencia();
+
+DROP TRIGGER IF EXISTS trigger_resumen_asistencia_update ON asistencias_academicas;
+CREATE TRIGGER trigger_resumen_asistencia_update
+    AFTER UPDATE ON asistencias_academicas
+    FOR EACH ROW
+    WHEN ((OLD.id_sesion, OLD.id_estudiante, OLD.estado, OLD.minutos_tardanza)
+          IS DISTINCT FROM (NEW.id_sesion, NEW.id_estudiante, NEW.estado, NEW.minutos_tardanza))
+    EXECUTE FUNCTION trigger_resumen_asistencia();
+
+-- ============================================================
+-- RECONSTRUCCIÓN COMPLETA (BACKFILL)
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION reconstruir_resumen_asistencia()
+RETURNS INTEGER AS $$
+DECLARE
+    v_filas INTEGER;
+BEGIN
+    LOCK TABLE sesiones_academicas, asistencias_academicas, inscripciones IN SHARE MODE;
+    DELETE FROM resumen_asistencia_estudiante;
+
+    INSERT INTO resumen_asistencia_estudiante (
+        año, semestre, corte, id_curso, id_estudiante,
+        sesiones_dictadas, presentes, tardanzas, ausentes, minutos_tardanza_total
+    )
+    WITH dictadas AS (
+        SELECT sa.año, sa.semestre, sa.corte, sa.id_curso, i.id_estudiante,
+               COUNT(*) AS sesiones
+        FROM sesiones_academicas sa
+        JOIN inscripciones i ON i.id_curso = sa.id_curso AND i.estado = 'activo'
+        WHERE sa.estado IN ('activa', 'finalizada')
+        GROUP BY sa.año, sa.semestre, sa.corte, sa.id_curso, i.id_estudiante
+    ),
+    registradas AS (
+        SELECT sa.año, sa.semestre, sa.corte, COALESCE(sa.id_curso, 0) AS id_curso, aa.id_estudiante,
+               COUNT(CASE WHEN aa.estado = 'presente' THEN 1 END) AS presentes,
+               COUNT(CASE WHEN aa.estado = 'tardanza' THEN 1 END) AS tardanzas,
+               COUNT(CASE WHEN aa.estado = 'ausente' THEN 1 END) AS ausentes,
+               COALESCE(SUM(aa.minutos_tardanza), 0) AS minutos
+        FROM asistencias_academicas aa
+        JOIN sesiones_academicas sa ON sa.id_sesion = aa.id_sesion
+        WHERE aa.id_estudiante IS NOT NULL
+        GROUP BY sa.año, sa.semestre, sa.corte, COALESCE(sa.id_curso, 0), aa.id_estudiante
+    )
+    SELECT
+        COALESCE(d.año, r.año), COALESCE(d.semestre, r.semestre), COALESCE(d.corte, r.corte),
+        COALESCE(d.id_curso, r.id_curso), COALESCE(d.id_estudiante, r.id_estudiante),
+        COALESCE(d.sesiones, 0), COALESCE(r.presentes, 0), COALESCE(r.tardanzas, 0),
+        COALESCE(r.ausentes, 0), COALESCE(r.minutos, 0)
+    FROM dictadas d
+    FULL OUTER JOIN registradas r
+        ON r.año = d.año AND r.semestre = d.semestre AND r.corte = d.corte
+        AND r.id_curso = d.id_curso AND r.id_estudiante = d.id_estudiante;
+
+    GET DIAGNOSTICS v_filas = ROW_COUNT;
+    RETURN v_filas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Los triggers solo cuentan escrituras nuevas: cargar lo que ya existe
+SELECT reconstruir_resumen_asistencia();
+
+-- ============================================================
+-- FIN DEL SCHEMA DE RESUMEN DE ASISTENCIA
+-- ============================================================
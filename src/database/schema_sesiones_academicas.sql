@@ -11,6 +11,15 @@
 -- Si no existen, ejecutar primero schema.sql
 -- ============================================================
 
+-- ============================================================
+-- SECUENCIAS
+-- ============================================================
+
+CREATE SEQUENCE IF NOT EXISTS cursos_id_curso_seq;
+CREATE SEQUENCE IF NOT EXISTS inscripciones_id_inscripcion_seq;
+CREATE SEQUENCE IF NOT EXISTS sesiones_academicas_id_sesion_seq;
+CREATE SEQUENCE IF NOT EXISTS asistencias_academicas_id_asistencia_seq;
+
 -- ============================================================
 -- TABLAS ACADÉMICAS
 -- ============================================================
@@ -43,6 +52,26 @@ COMMENT ON COLUMN cursos.codigo IS 'Código único del curso (ej: PROG101)';
 COMMENT ON COLUMN cursos.creditos IS 'Número de créditos académicos del curso';
 COMMENT ON COLUMN cursos.estado IS 'Estado actual del curso: activo, finalizado, cancelado';
 
+-- Tabla: inscripciones (después de cursos por la foreign key)
+CREATE TABLE IF NOT EXISTS inscripciones (
+    id_inscripcion INTEGER DEFAULT nextval('inscripciones_id_inscripcion_seq'::regclass) NOT NULL,
+    id_estudiante INTEGER NULL,
+    id_curso INTEGER NULL,
+    fecha_inscripcion TIMESTAMP DEFAULT CURRENT_TIMESTAMP NULL,
+    estado ESTADO_USUARIO DEFAULT 'activo'::estado_usuario NULL,
+    PRIMARY KEY (id_inscripcion),
+    CONSTRAINT inscripciones_id_estudiante_fkey FOREIGN KEY (id_estudiante) REFERENCES usuarios(id_usuario) ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT inscripciones_id_curso_fkey FOREIGN KEY (id_curso) REFERENCES cursos(id_curso) ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT inscripciones_estudiante_curso_unique UNIQUE (id_estudiante, id_curso)
+);
+
+CREATE INDEX IF NOT EXISTS idx_inscripciones_curso ON inscripciones (id_curso);
+CREATE INDEX IF NOT EXISTS idx_inscripciones_estudiante ON inscripciones (id_estudiante);
+CREATE UNIQUE INDEX IF NOT EXISTS inscripciones_id_estudiante_id_curso_key ON inscripciones (id_estudiante, id_curso);
+
+COMMENT ON TABLE inscripciones IS 'Relación entre estudiantes y cursos (matrícula)';
+COMMENT ON COLUMN inscripciones.estado IS 'Estado de la inscripción: activo, inactivo';
+
 -- Tabla: sesiones_academicas
 CREATE TABLE IF NOT EXISTS sesiones_academicas (
     id_sesion INTEGER DEFAULT nextval('sesiones_academicas_id_sesion_seq'::regclass) NOT NULL,
@@ -70,8 +99,8 @@ CREATE TABLE IF NOT EXISTS sesiones_academicas (
     PRIMARY KEY (id_sesion),
     CONSTRAINT sesiones_academicas_id_curso_fkey FOREIGN KEY (id_curso) REFERENCES cursos(id_curso) ON DELETE CASCADE ON UPDATE CASCADE,
     CONSTRAINT sesiones_academicas_corte_check CHECK ((corte = ANY (ARRAY[1, 2, 3]))),
-    CONSTRAINT sesiones_academicas_semestre_check CHECK ((semestre IN ('1', '2', 'verano'))),
-    CONSTRAINT sesiones_academicas_estado_check CHECK ((estado IN ('programada', 'en_curso', 'finalizada', 'cancelada')))
+    CONSTRAINT sesiones_academicas_semestre_check CHECK ((semestre ~ '^([0-9]{4}-)?(1|2|verano)$')),
+    CONSTRAINT sesiones_academicas_estado_check CHECK ((estado IN ('programada', 'activa', 'en_curso', 'finalizada', 'cancelada')))
 );
 
 CREATE INDEX IF NOT EXISTS idx_sesiones_acad_activa ON sesiones_academicas (asistencia_habilitada);
@@ -82,12 +111,12 @@ CREATE UNIQUE INDEX IF NOT EXISTS sesiones_academicas_año_semestre_corte_id_cur
 
 COMMENT ON TABLE sesiones_academicas IS 'Sesiones de clase programadas por periodo académico';
 COMMENT ON COLUMN sesiones_academicas.año IS 'Año académico (ej: 2025)';
-COMMENT ON COLUMN sesiones_academicas.semestre IS 'Semestre académico: 1, 2 o verano';
+COMMENT ON COLUMN sesiones_academicas.semestre IS 'Semestre académico: 1, 2 o verano, con o sin prefijo de año (ej: 2025-1)';
 COMMENT ON COLUMN sesiones_academicas.corte IS 'Número de corte académico (1, 2 o 3)';
 COMMENT ON COLUMN sesiones_academicas.numero_sesion IS 'Número consecutivo de la sesión en el corte';
 COMMENT ON COLUMN sesiones_academicas.asistencia_habilitada IS 'Indica si la sesión está activa para tomar asistencia';
 COMMENT ON COLUMN sesiones_academicas.tolerancia_minutos IS 'Minutos de tolerancia antes de marcar tardanza';
-COMMENT ON COLUMN sesiones_academicas.estado IS 'Estado de la sesión: programada, en_curso, finalizada, cancelada';
+COMMENT ON COLUMN sesiones_academicas.estado IS 'Estado de la sesión: programada, activa, en_curso, finalizada, cancelada';
 
 -- Tabla: asistencias_academicas
 CREATE TABLE IF NOT EXISTS asistencias_academicas (
@@ -0,0 +1,88 @@
+-- ============================================================
+-- SESIÓN DEL AULA (BUSCAR O CREAR) PARA REGISTROS POR LOTES
+-- ============================================================
+-- Base de datos: prototipoPG_v2
+-- Requiere: contadores_sesion.sql
+-- ============================================================
+-- Los kioscos de borde registran por lotes con registrar_asistencias_lote,
+-- que necesita una sesión. Si el aula del kiosco no tiene ninguna en ese
+-- momento, obtener_sesion_aula la crea con la misma regla que el registro
+-- en vivo (registrar_asistencia_reconocimiento): en esa aula, con el curso
+-- indicado o sin curso, y serializada por aula y día.
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION obtener_sesion_aula(
+    p_año INTEGER,
+    p_semestre VARCHAR,
+    p_corte INTEGER,
+    p_momento TIMESTAMP DEFAULT LOCALTIMESTAMP,
+    p_aula VARCHAR DEFAULT NULL,
+    p_id_curso INTEGER DEFAULT NULL
+)
+RETURNS TABLE (
+    sesion INTEGER,
+    hora_inicio TIME,
+    hora_fin TIME,
+    sesion_creada BOOLEAN
+) AS $$
+DECLARE
+    v_fecha DATE := p_momento::date;
+    v_hora TIME := p_momento::time;
+BEGIN
+    sesion_creada := false;
+
+    SELECT sa.id_sesion, sa.hora_inicio, sa.hora_fin
+    INTO sesion, hora_inicio, hora_fin
+    FROM sesiones_academicas sa
+    WHERE sa.fecha_programada = v_fecha
+    AND sa.año = p_año AND sa.semestre = p_semestre AND sa.corte = p_corte
+    AND sa.hora_inicio <= v_hora AND sa.hora_fin >= v_hora
+    AND sa.estado NOT IN ('finalizada', 'cancelada')
+    AND (p_aula IS NULL OR sa.aula = p_aula)
+    ORDER BY sa.asistencia_habilitada DESC, sa.hora_inicio
+    LIMIT 1;
+
+    IF NOT FOUND THEN
+        -- Mismo candado que registrar_asistencia_reconocimiento
+        PERFORM pg_advisory_xact_lock(hashtext('sesion_automatica:' || v_fecha::text || ':' || COALESCE(p_aula, '')));
+
+        SELECT sa.id_sesion, sa.hora_inicio, sa.hora_fin
+        INTO sesion, hora_inicio, hora_fin
+        FROM sesiones_academicas sa
+        WHERE sa.fecha_programada = v_fecha
+        AND sa.año = p_año AND sa.semestre = p_semestre AND sa.corte = p_corte
+        AND sa.hora_inicio <= v_hora AND sa.hora_fin >= v_hora
+        AND sa.estado NOT IN ('finalizada', 'cancelada')
+        AND (p_aula IS NULL OR sa.aula = p_aula)
+        ORDER BY sa.asistencia_habilitada DESC, sa.hora_inicio
+        LIMIT 1;
+    END IF;
+
+    IF NOT FOUND THEN
+        INSERT INTO sesiones_academicas (
+            año, semestre, corte, id_curso, nombre_sesion,
+            descripcion, fecha_programada, hora_inicio, hora_fin, dia_semana,
+            aula, estado, asistencia_habilitada, tolerancia_minutos,
+            duracion_horas, tipo_clase, creada_en
+        ) VALUES (
+            p_año, p_semestre, p_corte, p_id_curso,
+            'Sesión Automática - ' || to_char(v_fecha, 'DD/MM/YYYY'),
+            'Sesión creada automáticamente por reconocimiento facial',
+            v_fecha, v_hora, CASE WHEN v_hora >= TIME '23:00' THEN TIME '23:59:59' ELSE v_hora + INTERVAL '1 hour' END,
+            (ARRAY['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo'])[EXTRACT(ISODOW FROM v_fecha)::int],
+            COALESCE(p_aula, 'Aula Reconocimiento Facial'), 'activa', true, 15,
+            1.0, 'reconocimiento', p_momento
+        )
+        RETURNING id_sesion, sesiones_academicas.hora_inicio, sesiones_academicas.hora_fin
+        INTO sesion, hora_inicio, hora_fin;
+
+        sesion_creada := true;
+    END IF;
+
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================
+-- FIN DE LA SESIÓN DEL AULA
+-- ============================================================
@@ -0,0 +1,364 @@
+"""
+Asistencia por lotes desde el video grabado de una clase
+Divide el video en segmentos de tiempo que procesa un pool de procesos
+(decodificar -> detectar -> codificar -> buscar en la galería), une las
+apariciones de cada estudiante de todos los segmentos y registra la asistencia
+de la sesión en un solo INSERT, con la hora de su primera aparición como
+fecha_registro para que la tardanza sea la real.
+
+Usa el mismo reconocimiento que la cámara en vivo (procesamiento_rostros y
+GaleriaRostros, primero los inscritos del curso de la sesión) y la misma
+regla de presente/tardanza (calcular_estado_asistencia, estado_asistencia.sql,
+a través de GestorAcademicoAutomatico.registrar_asistencias_lote).
+Las ausencias que el cierre de la sesión ya había marcado se reemplazan; los
+registros existentes por otro método se conservan.
+
+Uso:
+    python src/utils/asistencia_video.py clase.mp4 --sesion 123
+    python src/utils/asistencia_video.py clase.mp4 --sesion 123 --inicio "2025-09-01 08:02:00"
+    python src/utils/asistencia_video.py clase.mp4 --sesion 123 --procesos 8 --simular
+    python src/utils/asistencia_video.py clase.mp4 --escalado      # frames/s con 1, 2, 4... procesos
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+
+import cv2
+import psycopg2
+
+try:
+    from src.utils.gestor_academico_automatico import GestorAcademicoAutomatico
+    from src.utils.galeria_rostros import GaleriaRostros
+    from src.utils.procesamiento_rostros import (
+        CONFIANZA_MINIMA, PERFILES_DETECCION, TOLERANCIA, detectar_y_codificar
+    )
+except ImportError:
+    # Ejecutado como script desde src/utils
+    from gestor_academico_automatico import GestorAcademicoAutomatico
+    from galeria_rostros import GaleriaRostros
+    from procesamiento_rostros import (
+        CONFIANZA_MINIMA, PERFILES_DETECCION, TOLERANCIA, detectar_y_codificar
+    )
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+SEGUNDOS_SEGMENTO = 60
+FPS_ANALISIS = 2
+MIN_APARICIONES = 2
+
+# ------------------------------------------------------------
+# Procesos de trabajo
+# ------------------------------------------------------------
+
+_trabajo = {}
+
+
+def _inicializar_trabajador(embeddings, nombres, ids, id_curso, inscritos, ruta, perfil, paso, fps):
+    """Cada proceso arma su copia de la galería una sola vez"""
+    galeria = GaleriaRostros(tolerancia=TOLERANCIA)
+    galeria.cargar(embeddings, nombres, ids)
+    if id_curso is not None:
+        galeria.cargar_inscritos(id_curso, inscritos)
+
+    _trabajo.update({
+        'galeria': galeria, 'id_curso': id_curso, 'ruta': ruta,
+        'perfil': PERFILES_DETECCION[perfil], 'paso': paso, 'fps': fps,
+    })
+
+
+def _procesar_segmento(segmento):
+    """
+    Analiza los frames [inicio, fin) del video, uno de cada `paso`
+
+    Returns:
+        dict: frames leídos y analizados, segundos, y apariciones por estudiante
+              {id_usuario: [primera marca (s), mejor confianza, apariciones, nombre]}
+    """
+    inicio, fin = segmento
+    galeria = _trabajo['galeria']
+    paso = _trabajo['paso']
+    fps = _trabajo['fps']
+
+    cronometro = time.perf_counter()
+    cap = cv2.VideoCapture(_trabajo['ruta'])
+    cap.set(cv2.CAP_PROP_POS_FRAMES, inicio)
+
+    apariciones = {}
+    leidos = 0
+    analizados = 0
+    try:
+        for indice in range(inicio, fin):
+            if indice % paso:
+                # Frames intermedios: avanzar sin decodificar la imagen
+                if not cap.grab():
+                    break
+                leidos += 1
+                continue
+
+            ok, frame = cap.read()
+            if not ok:
+                break
+            leidos += 1
+            analizados += 1
+
+            _, encodings = detectar_y_codificar(frame, _trabajo['perfil'])
+            marca = indice / fps
+            for encoding in encodings:
+                resultado = galeria.buscar(encoding, _trabajo['id_curso'])
+                if not resultado or not resultado['coincide'] or resultado['confianza'] < CONFIANZA_MINIMA:
+                    continue
+
+                aparicion = apariciones.get(resultado['id_usuario'])
+                if aparicion is None:
+                    apariciones[resultado['id_usuario']] = [marca, resultado['confianza'], 1, resultado['nombre']]
+                else:
+                    aparicion[1] = max(aparicion[1], resultado['confianza'])
+                    aparicion[2] += 1
+    finally:
+        cap.release()
+
+    return {
+        'segmento': segmento,
+        'frames_leidos': leidos,
+        'frames_analizados': analizados,
+        'segundos': time.perf_counter() - cronometro,
+        'apariciones': apariciones,
+    }
+
+
+# ------------------------------------------------------------
+# Proceso principal
+# ------------------------------------------------------------
+
+def propiedades_video(ruta):
+    """(frames totales, fps) del video"""
+    cap = cv2.VideoCapture(ruta)
+    if not cap.isOpened():
+        raise ValueError(f"No se pudo abrir el video: {ruta}")
+    try:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    finally:
+        cap.release()
+    return total, fps
+
+
+def dividir_en_segmentos(total_frames, fps, segundos_segmento, paso):
+    """
+    Rangos [inicio, fin) de frames, alineados al paso de análisis para que los
+    frames analizados sean los mismos con cualquier número de procesos
+    """
+    tamano = max(paso, int(round(segundos_segmento * fps / paso)) * paso)
+    return [(inicio, min(inicio + tamano, total_frames)) for inicio in range(0, total_frames, tamano)]
+
+
+def fusionar_apariciones(resultados):
+    """Primera aparición, mejor confianza y total de apariciones por estudiante"""
+    fusion = {}
+    for resultado in resultados:
+        for id_usuario, (marca, confianza, cantidad, nombre) in resultado['apariciones'].items():
+            actual = fusion.get(id_usuario)
+            if actual is None:
+                fusion[id_usuario] = [marca, confianza, cantidad, nombre]
+            else:
+                actual[0] = min(actual[0], marca)
+                actual[1] = max(actual[1], confianza)
+                actual[2] += cantidad
+    return fusion
+
+
+def procesar_video(ruta, galeria, id_curso=None, inscritos=(), procesos=None,
+                   segundos_segmento=SEGUNDOS_SEGMENTO, fps_analisis=FPS_ANALISIS, perfil='rapido'):
+    """
+    Procesa el video completo con un pool de procesos
+
+    Returns:
+        dict: apariciones fusionadas y métricas (frames/s, segundos, procesos)
+    """
+    procesos = procesos or os.cpu_count() or 1
+    total_frames, fps = propiedades_video(ruta)
+    paso = max(1, int(round(fps / fps_analisis)))
+    segmentos = dividir_en_segmentos(total_frames, fps, segundos_segmento, paso)
+
+    inicializacion = (
+        galeria.matriz, list(galeria.nombres), [int(i) for i in galeria.ids],
+        id_curso, list(inscritos), ruta, perfil, paso, fps,
+    )
+
+    inicio = time.perf_counter()
+    with Pool(processes=min(procesos, len(segmentos)) or 1,
+              initializer=_inicializar_trabajador, initargs=inicializacion) as pool:
+        resultados = []
+        for resultado in pool.imap_unordered(_procesar_segmento, segmentos):
+            resultados.append(resultado)
+            print(f"   🎞️ Segmento {len(resultados)}/{len(segmentos)}: "
+                  f"{resultado['frames_analizados']} frames en {resultado['segundos']:.1f}s, "
+                  f"{len(resultado['apariciones'])} estudiantes")
+    segundos = time.perf_counter() - inicio
+
+    leidos = sum(r['frames_leidos'] for r in resultados)
+    analizados = sum(r['frames_analizados'] for r in resultados)
+    return {
+        'apariciones': fusionar_apariciones(resultados),
+        'procesos': procesos,
+        'segmentos': len(segmentos),
+        'segundos': segundos,
+        'segundos_video': leidos / fps,
+        'frames_leidos': leidos,
+        'frames_analizados': analizados,
+        'fps_analisis': analizados / segundos if segundos else 0.0,
+        'velocidad': (leidos / fps) / segundos if segundos else 0.0,
+    }
+
+
+def obtener_sesion(cursor, id_sesion):
+    cursor.execute("""
+        SELECT id_sesion, id_curso, fecha_programada, hora_inicio, hora_fin,
+               tolerancia_minutos, nombre_sesion
+        FROM sesiones_academicas
+        WHERE id_sesion = %s
+    """, (id_sesion,))
+    fila = cursor.fetchone()
+    if fila is None:
+        return None
+    return {
+        'id_sesion': fila[0], 'id_curso': fila[1],
+        'inicio': datetime.combine(fila[2], fila[3]), 'fin': datetime.combine(fila[2], fila[4]),
+        'tolerancia_minutos': fila[5], 'nombre_sesion': fila[6],
+    }
+
+
+def obtener_inscritos(cursor, id_curso):
+    if id_curso is None:
+        return []
+    cursor.execute("""
+        SELECT id_estudiante FROM inscripciones
+        WHERE id_curso = %s AND estado = 'activo'
+    """, (id_curso,))
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+def registros_por_aparicion(apariciones, inicio_video, min_apariciones=MIN_APARICIONES):
+    """
+    (id_estudiante, momento de la primera aparición, confianza) de los
+    estudiantes vistos al menos min_apariciones veces
+
+    Args:
+        apariciones: {id_usuario: [primera marca (s), confianza, apariciones, nombre]}
+        inicio_video: Momento real del primer frame
+    """
+    return [
+        (id_usuario, inicio_video + timedelta(seconds=marca), confianza)
+        for id_usuario, (marca, confianza, cantidad, _) in apariciones.items()
+        if cantidad >= min_apariciones
+    ]
+
+
+def mostrar_metricas(resultado):
+    print(f"⏱️ {resultado['frames_analizados']} frames analizados ({resultado['frames_leidos']} leídos) "
+          f"en {resultado['segundos']:.1f}s con {resultado['procesos']} procesos")
+    print(f"📈 {resultado['fps_analisis']:.1f} frames analizados/s, "
+          f"{resultado['velocidad']:.1f}x la duración del video")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Registrar la asistencia de una sesión desde un video grabado')
+    parser.add_argument('video', help='Archivo de video de la clase')
+    parser.add_argument('--sesion', type=int, help='id_sesion a la que corresponde el video')
+    parser.add_argument('--inicio', help='Hora real del primer frame "YYYY-MM-DD HH:MM:SS" (por defecto, el inicio de la sesión)')
+    parser.add_argument('--procesos', type=int, default=os.cpu_count(), help='Procesos de trabajo')
+    parser.add_argument('--segmento', type=float, default=SEGUNDOS_SEGMENTO, help='Segundos de video por segmento')
+    parser.add_argument('--fps-analisis', type=float, default=FPS_ANALISIS, help='Frames analizados por segundo de video')
+    parser.add_argument('--perfil', choices=sorted(PERFILES_DETECCION), default='rapido', help='Perfil de detección')
+    parser.add_argument('--min-apariciones', type=int, default=MIN_APARICIONES, help='Apariciones mínimas para registrar')
+    parser.add_argument('--simular', action='store_true', help='Mostrar el resultado sin escribir')
+    parser.add_argument('--escalado', action='store_true', help='Medir frames/s con 1, 2, 4... procesos (sin escribir)')
+    args = parser.parse_args()
+
+    if args.sesion is None and not args.escalado:
+        parser.error('--sesion es obligatorio salvo con --escalado')
+
+    print("🎬 ASISTENCIA DESDE VIDEO")
+    print("="*60)
+
+    conn = None
+    try:
+        galeria = GaleriaRostros(tolerancia=TOLERANCIA)
+        print(f"🧠 Galería: {galeria.cargar_desde_bd()} estudiantes")
+
+        conn = psycopg2.connect(**DATABASE_CONFIG)
+        cursor = conn.cursor()
+
+        sesion = None
+        inscritos = []
+        if args.sesion is not None:
+            sesion = obtener_sesion(cursor, args.sesion)
+            if sesion is None:
+                print(f"❌ No existe la sesión {args.sesion}")
+                sys.exit(1)
+            inscritos = obtener_inscritos(cursor, sesion['id_curso'])
+            print(f"📚 {sesion['nombre_sesion']} ({sesion['inicio']:%Y-%m-%d %H:%M}), {len(inscritos)} inscritos")
+
+        opciones = {
+            'id_curso': sesion['id_curso'] if sesion else None, 'inscritos': inscritos,
+            'segundos_segmento': args.segmento, 'fps_analisis': args.fps_analisis, 'perfil': args.perfil,
+        }
+
+        if args.escalado:
+            print("\n📊 ESCALADO POR PROCESOS")
+            base = None
+            procesos = 1
+            while True:
+                resultado = procesar_video(args.video, galeria, procesos=procesos, **opciones)
+                base = base or resultado['fps_analisis']
+                print(f"   {procesos:>3} procesos: {resultado['fps_analisis']:.1f} frames/s "
+                      f"(x{resultado['fps_analisis'] / base:.2f})")
+                if procesos >= args.procesos:
+                    break
+                procesos = min(procesos * 2, args.procesos)
+            return
+
+        resultado = procesar_video(args.video, galeria, procesos=args.procesos, **opciones)
+        mostrar_metricas(resultado)
+
+        inicio_video = datetime.strptime(args.inicio, '%Y-%m-%d %H:%M:%S') if args.inicio else sesion['inicio']
+        apariciones = resultado['apariciones']
+        print(f"\n👥 Estudiantes vistos: {len(apariciones)}")
+        for id_usuario, (marca, confianza, cantidad, nombre) in sorted(apariciones.items(), key=lambda a: a[1][0]):
+            momento = inicio_video + timedelta(seconds=marca)
+            aviso = "" if cantidad >= args.min_apariciones else " (pocas apariciones, no se registra)"
+            print(f"   👤 {nombre}: {momento:%H:%M:%S}, confianza {confianza:.2f}, {cantidad} apariciones{aviso}")
+
+        if args.simular:
+            print("ℹ️ Simulación: no se escribió nada")
+            return
+
+        registros = registros_por_aparicion(apariciones, inicio_video, args.min_apariciones)
+        resultado = GestorAcademicoAutomatico().registrar_asistencias_lote(sesion['id_sesion'], registros)
+        if not resultado['exito']:
+            print(f"❌ {resultado['mensaje']}")
+            sys.exit(1)
+        tardanzas = sum(1 for fila in resultado['registradas'] if fila['estado'] == 'tardanza')
+        print(f"✅ {resultado['mensaje']} ({tardanzas} tardanzas) en la sesión {sesion['id_sesion']}")
+
+    except (ValueError, psycopg2.Error) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        if conn:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark del pipeline de reconocimiento sin cámara
+Corre el mismo GestorCamaras que main.py (un hilo por fuente, detección,
+codificación y búsqueda en la galería) sobre grabaciones, carpetas de imágenes o
+frames sintéticos, sin interfaz y sin registrar asistencia, para medir el
+rendimiento de forma repetible en cualquier máquina.
+
+Por defecto las fuentes se leen tan rápido como el pipeline las consume y se
+analizan todos los frames; con --tiempo-real se respetan las marcas de tiempo
+y el presupuesto de FPS (como con una cámara en vivo).
+
+Uso:
+    python src/utils/benchmark_reconocimiento.py grabaciones/clase.mp4
+    python src/utils/benchmark_reconocimiento.py clase1.mp4 clase2.mp4 --perfil lejano
+    python src/utils/benchmark_reconocimiento.py students/ --repeticiones 20
+    python src/utils/benchmark_reconocimiento.py sintetica --frames 300 --rostros students/
+    python src/utils/benchmark_reconocimiento.py clase.mp4 --tiempo-real --fps 4 --sin-galeria
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+try:
+    from src.utils.camaras import GestorCamaras
+    from src.utils.fuentes_captura import EXTENSIONES_IMAGEN
+    from src.utils.galeria_rostros import GaleriaRostros
+    from src.utils.procesamiento_rostros import PERFILES_DETECCION, detectar_y_codificar
+except ImportError:
+    # Ejecutado como script desde src/utils
+    from camaras import GestorCamaras
+    from fuentes_captura import EXTENSIONES_IMAGEN
+    from galeria_rostros import GaleriaRostros
+    from procesamiento_rostros import PERFILES_DETECCION, detectar_y_codificar
+
+
+class ProcesadorSinInterfaz:
+    """procesar_frame para GestorCamaras: detecta, codifica y busca, sin dibujar"""
+
+    def __init__(self, galeria=None):
+        self.galeria = galeria
+        self._lock = threading.Lock()
+        self.conteos = {}
+
+    def __call__(self, camara, frame, analizar):
+        if not analizar:
+            return frame
+
+        _, face_encodings = detectar_y_codificar(frame, camara.perfil)
+
+        reconocidos = 0
+        if self.galeria is not None:
+            for face_encoding in face_encodings:
+                resultado = self.galeria.buscar(face_encoding)
+                if resultado and resultado['coincide']:
+                    reconocidos += 1
+
+        with self._lock:
+            conteo = self.conteos.setdefault(camara.id, {'rostros': 0, 'reconocidos': 0})
+            conteo['rostros'] += len(face_encodings)
+            conteo['reconocidos'] += reconocidos
+        return frame
+
+
+def especificacion_fuente(ruta, args):
+    """Fuente de reproducción para una ruta de la línea de comandos"""
+    repetir = args.repeticiones if args.repeticiones > 1 else False
+    if ruta == 'sintetica':
+        rostros = []
+        if args.rostros:
+            rostros = sorted(
+                os.path.join(args.rostros, nombre) for nombre in os.listdir(args.rostros)
+                if nombre.lower().endswith(EXTENSIONES_IMAGEN)
+            )
+        return {'tipo': 'sintetica', 'total': args.frames, 'rostros': rostros,
+                'tiempo_real': args.tiempo_real, 'repetir': repetir}
+    if os.path.isdir(ruta):
+        return {'tipo': 'directorio', 'ruta': ruta, 'tiempo_real': args.tiempo_real, 'repetir': repetir}
+    return {'tipo': 'video', 'ruta': ruta, 'tiempo_real': args.tiempo_real, 'repetir': repetir}
+
+
+def ejecutar_benchmark(args):
+    galeria = None
+    if not args.sin_galeria:
+        galeria = GaleriaRostros()
+        print(f"🧠 Galería: {galeria.cargar_desde_bd()} estudiantes")
+
+    camaras = []
+    for i, ruta in enumerate(args.fuentes):
+        fuente = especificacion_fuente(ruta, args)
+        camaras.append({
+            'id': f"fuente_{i + 1}", 'fuente': fuente, 'perfil': args.perfil,
+            'fps': args.fps if args.tiempo_real else None, 'streaming': False, 'buffer_frames': 0,
+        })
+
+    procesador = ProcesadorSinInterfaz(galeria)
+    gestor = GestorCamaras(procesador, configuracion={
+        'fps_totales': args.fps * len(camaras),
+        'analisis_simultaneos': len(camaras),
+        'camaras': camaras,
+    })
+
+    inicio = time.perf_counter()
+    gestor.iniciar()
+    gestor.esperar()
+    segundos = time.perf_counter() - inicio
+
+    return {
+        'segundos': segundos,
+        'estado': gestor.estado(),
+        'conteos': procesador.conteos,
+        'galeria': galeria.estadisticas() if galeria is not None else None,
+    }
+
+
+def mostrar_resultados(resultado):
+    print("\n📊 RESULTADOS")
+    print("="*80)
+    print(f"{'fuente':<12}{'frames':>8}{'analizados':>12}{'fps':>9}{'ms/frame':>10}{'rostros':>9}{'reconocidos':>13}")
+    print("-"*80)
+
+    total_analizados = 0
+    for camara in resultado['estado']['camaras']:
+        conteo = resultado['conteos'].get(camara['id'], {'rostros': 0, 'reconocidos': 0})
+        total_analizados += camara['frames_analizados']
+        print(f"{camara['id']:<12}{camara['frames_leidos']:>8}{camara['frames_analizados']:>12}"
+              f"{camara['fps_analisis']:>9.1f}{camara['latencia_analisis_ms']:>10.1f}"
+              f"{conteo['rostros']:>9}{conteo['reconocidos']:>13}")
+        if camara['error']:
+            print(f"   ❌ {camara['error']}")
+
+    print("-"*80)
+    segundos = resultado['segundos']
+    print(f"⏱️ {total_analizados} frames analizados en {segundos:.2f}s "
+          f"({total_analizados / segundos:.1f} frames/s en total)")
+
+    if resultado['galeria']:
+        global_ = resultado['galeria']['global']
+        print(f"🔎 Búsquedas en la galería: {global_['busquedas']} "
+              f"({global_['latencia_media_ms']:.3f} ms de media)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del reconocimiento sobre grabaciones sin cámara')
+    parser.add_argument('fuentes', nargs='+', help='Videos, carpetas de imágenes o "sintetica" (una cámara por fuente)')
+    parser.add_argument('--perfil', choices=sorted(PERFILES_DETECCION), default='rapido', help='Perfil de detección')
+    parser.add_argument('--tiempo-real', action='store_true', help='Respetar las marcas de tiempo y el presupuesto de FPS')
+    parser.add_argument('--fps', type=float, default=8, help='FPS de análisis por fuente con --tiempo-real')
+    parser.add_argument('--repeticiones', type=int, default=1, help='Pasadas por cada fuente')
+    parser.add_argument('--frames', type=int, default=300, help='Frames de la fuente sintética')
+    parser.add_argument('--rostros', help='Carpeta de fotos que se pegan en los frames sintéticos')
+    parser.add_argument('--sin-galeria', action='store_true', help='Solo detección y codificación (sin base de datos)')
+    args = parser.parse_args()
+
+    print(f"🎥 BENCHMARK DE RECONOCIMIENTO ({'tiempo real' if args.tiempo_real else 'máxima velocidad'})")
+    print("="*60)
+
+    try:
+        resultado = ejecutar_benchmark(args)
+    except Exception as e:
+        print(f"❌ Error ejecutando el benchmark: {e}")
+        sys.exit(1)
+
+    mostrar_resultados(resultado)
+
+
+if __name__ == "__main__":
+    main()
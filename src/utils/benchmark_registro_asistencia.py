@@ -0,0 +1,277 @@
+"""
+Benchmark del registro de asistencia por reconocimiento facial
+Compara la latencia del flujo anterior de mark_attendance (una consulta por
+paso y un commit por escritura) con la función registrar_asistencia_reconocimiento
+(src/database/registro_asistencia.sql), que lo resuelve en un solo viaje.
+
+Escenarios:
+    sesion_existente -> la sesión del horario ya existe y está habilitada
+    sesion_nueva     -> no hay sesión y se crea automáticamente
+
+Los datos se crean en un período aislado (año 2000) y se eliminan al terminar.
+Requiere un estudiante activo con nombre y apellido y el curso con id_curso = 1.
+
+Uso:
+    python src/utils/benchmark_registro_asistencia.py [iteraciones]
+"""
+
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import psycopg2
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+# Período aislado para no tocar sesiones reales
+AÑO, SEMESTRE, CORTE = 2000, '2000-1', 1
+MOMENTO = datetime(2000, 1, 3, 8, 5)  # lunes
+DIAS = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
+
+
+class CursorContador:
+    """Envuelve la conexión para contar viajes a la BD (sentencias + commits)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.viajes = 0
+
+    def execute(self, sql, parametros=None):
+        self.viajes += 1
+        self.cursor.execute(sql, parametros)
+        return self.cursor
+
+    def commit(self):
+        self.viajes += 1
+        self.conn.commit()
+
+
+def registrar_flujo_anterior(c, nombre, momento):
+    """Reproduce paso a paso el mark_attendance anterior"""
+    c.execute("""
+        SELECT id_usuario FROM usuarios
+        WHERE nombre || ' ' || apellido = %s AND rol = 'estudiante'
+    """, (nombre,))
+    id_estudiante = c.cursor.fetchone()[0]
+
+    c.execute("""
+        SELECT id_sesion, nombre_sesion, descripcion, fecha_programada, hora_inicio,
+               hora_fin, aula, estado, asistencia_habilitada
+        FROM sesiones_academicas
+        WHERE fecha_programada = %s AND año = %s AND semestre = %s AND corte = %s
+        AND hora_inicio <= %s AND hora_fin >= %s
+        LIMIT 1
+    """, (momento.date(), AÑO, SEMESTRE, CORTE, momento.time(), momento.time()))
+    sesion = c.cursor.fetchone()
+
+    if not sesion:
+        c.execute("""
+            SELECT COALESCE(MAX(numero_sesion), 0) + 1
+            FROM sesiones_academicas
+            WHERE año = %s AND semestre = %s AND corte = %s
+        """, (AÑO, SEMESTRE, CORTE))
+        numero_sesion = c.cursor.fetchone()[0]
+
+        hora_fin = momento.replace(hour=min(23, momento.hour + 1))
+        c.execute("""
+            INSERT INTO sesiones_academicas (
+                año, semestre, corte, id_curso, numero_sesion, nombre_sesion,
+                descripcion, fecha_programada, hora_inicio, hora_fin, dia_semana,
+                aula, estado, asistencia_habilitada, tolerancia_minutos,
+                duracion_horas, tipo_clase, creada_en
+            ) VALUES (%s, %s, %s, 1, %s, %s, %s, %s, %s, %s, %s, %s, 'activa', true, 15, 1.0, 'reconocimiento', %s)
+            ON CONFLICT (año, semestre, corte, id_curso, numero_sesion)
+            DO UPDATE SET
+                asistencia_habilitada = EXCLUDED.asistencia_habilitada,
+                estado = EXCLUDED.estado,
+                actualizada_en = CURRENT_TIMESTAMP
+            RETURNING id_sesion
+        """, (AÑO, SEMESTRE, CORTE, numero_sesion,
+              f'Sesión Automática - {momento.strftime("%d/%m/%Y")}',
+              'Sesión creada automáticamente por reconocimiento facial',
+              momento.date(), momento.time(), hora_fin.time(), DIAS[momento.weekday()],
+              'Aula Reconocimiento Facial', momento))
+        id_sesion = c.cursor.fetchone()[0]
+        c.commit()
+    else:
+        id_sesion = sesion[0]
+        if not sesion[8]:
+            c.execute("""
+                UPDATE sesiones_academicas
+                SET asistencia_habilitada = true, estado = 'activa', actualizada_en = CURRENT_TIMESTAMP
+                WHERE id_sesion = %s
+            """, (id_sesion,))
+            c.commit()
+
+    c.execute("""
+        SELECT id_asistencia, estado, minutos_tardanza
+        FROM asistencias_academicas
+        WHERE id_sesion = %s AND id_estudiante = %s
+    """, (id_sesion, id_estudiante))
+    if c.cursor.fetchone():
+        return 'ya_registrada'
+
+    c.execute("""
+        SELECT hora_inicio, tolerancia_minutos
+        FROM sesiones_academicas
+        WHERE id_sesion = %s
+    """, (id_sesion,))
+    hora_inicio, tolerancia = c.cursor.fetchone()
+    diferencia = (momento - datetime.combine(momento.date(), hora_inicio)).total_seconds() / 60
+    tolerancia = tolerancia or 15
+    if diferencia <= tolerancia:
+        estado, minutos = 'presente', 0
+    else:
+        estado, minutos = 'tardanza', int(diferencia - tolerancia)
+
+    c.execute("""
+        INSERT INTO asistencias_academicas (
+            id_sesion, id_estudiante, fecha_registro, metodo_registro,
+            confidence_score, estado, minutos_tardanza
+        ) VALUES (%s, %s, %s, 'reconocimiento_facial', NULL, %s, %s)
+    """, (id_sesion, id_estudiante, momento, estado, minutos))
+    c.commit()
+    return 'registrada'
+
+
+def registrar_funcion(c, nombre, momento):
+    """Un solo SELECT a registrar_asistencia_reconocimiento + commit (igual que main.py)"""
+    c.execute("""
+        SELECT resultado FROM registrar_asistencia_reconocimiento(%s, %s, %s, %s, %s)
+    """, (nombre, AÑO, SEMESTRE, CORTE, momento))
+    resultado = c.cursor.fetchone()[0]
+    c.commit()
+    return resultado
+
+
+FLUJOS = [
+    ('anterior', registrar_flujo_anterior),
+    ('funcion', registrar_funcion),
+]
+
+
+def limpiar_periodo(cursor):
+    """Elimina las sesiones del período de prueba, sus estadísticas y su contador"""
+    cursor.execute("DELETE FROM sesiones_academicas WHERE año = %s AND semestre = %s", (AÑO, SEMESTRE))
+    cursor.execute("DELETE FROM estadisticas_corte WHERE año = %s AND semestre = %s", (AÑO, SEMESTRE))
+    cursor.execute("DELETE FROM resumen_asistencia_estudiante WHERE año = %s AND semestre = %s", (AÑO, SEMESTRE))
+    cursor.execute("DELETE FROM contadores_sesion WHERE año = %s AND semestre = %s", (AÑO, SEMESTRE))
+
+
+def preparar_escenario(conn, escenario, id_estudiante):
+    """Deja la BD lista para la siguiente iteración (fuera de la medición)"""
+    cursor = conn.cursor()
+    if escenario == 'sesion_nueva':
+        limpiar_periodo(cursor)
+    else:
+        cursor.execute("""
+            DELETE FROM asistencias_academicas aa
+            USING sesiones_academicas sa
+            WHERE aa.id_sesion = sa.id_sesion AND sa.año = %s AND sa.semestre = %s
+            AND aa.id_estudiante = %s
+        """, (AÑO, SEMESTRE, id_estudiante))
+        cursor.execute("""
+            SELECT 1 FROM sesiones_academicas
+            WHERE año = %s AND semestre = %s AND fecha_programada = %s
+        """, (AÑO, SEMESTRE, MOMENTO.date()))
+        if not cursor.fetchone():
+            inicio = MOMENTO - timedelta(minutes=5)
+            cursor.execute("""
+                INSERT INTO sesiones_academicas (
+                    año, semestre, corte, id_curso, numero_sesion, nombre_sesion,
+                    fecha_programada, hora_inicio, hora_fin, dia_semana,
+                    estado, asistencia_habilitada, tolerancia_minutos, tipo_clase
+                ) VALUES (%s, %s, %s, 1, 1, 'Sesión benchmark', %s, %s, %s, %s, 'activa', true, 15, 'benchmark')
+            """, (AÑO, SEMESTRE, CORTE, MOMENTO.date(), inicio.time(),
+                  (inicio + timedelta(hours=2)).time(), DIAS[MOMENTO.weekday()]))
+    conn.commit()
+    cursor.close()
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def ejecutar_benchmark(iteraciones=200):
+    """
+    Mide la latencia por registro de cada flujo en cada escenario
+
+    Returns:
+        dict: {(escenario, flujo): {'media_ms', 'p50_ms', 'p95_ms', 'viajes'}}
+    """
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id_usuario, nombre || ' ' || apellido FROM usuarios
+        WHERE rol = 'estudiante' AND estado = 'activo'
+        ORDER BY id_usuario LIMIT 1
+    """)
+    fila = cursor.fetchone()
+    conn.commit()
+    if not fila:
+        print("❌ Se necesita al menos un estudiante activo")
+        conn.close()
+        return {}
+
+    id_estudiante, nombre = fila
+    print(f"👤 Estudiante de prueba: {nombre} (ID: {id_estudiante})")
+    print(f"🔁 Iteraciones por caso: {iteraciones}")
+
+    resultados = {}
+    try:
+        for escenario in ('sesion_existente', 'sesion_nueva'):
+            for nombre_flujo, flujo in FLUJOS:
+                contador = CursorContador(conn)
+                tiempos = []
+                for _ in range(iteraciones):
+                    preparar_escenario(conn, escenario, id_estudiante)
+                    contador.viajes = 0
+                    inicio = time.perf_counter()
+                    resultado = flujo(contador, nombre, MOMENTO)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                    if resultado != 'registrada':
+                        raise RuntimeError(f"{nombre_flujo}/{escenario}: resultado inesperado {resultado}")
+
+                resultados[(escenario, nombre_flujo)] = {
+                    'media_ms': statistics.mean(tiempos),
+                    'p50_ms': percentil(tiempos, 50),
+                    'p95_ms': percentil(tiempos, 95),
+                    'viajes': contador.viajes,
+                }
+    finally:
+        conn.rollback()
+        limpiar_periodo(cursor)
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+    return resultados
+
+
+def mostrar_resultados(resultados):
+    print("\n📊 LATENCIA POR REGISTRO DE ASISTENCIA")
+    print("-"*72)
+    print(f"{'Escenario':<18} {'Flujo':<10} {'Viajes':>7} {'Media ms':>10} {'p50 ms':>9} {'p95 ms':>9}")
+    for (escenario, flujo), r in resultados.items():
+        print(f"{escenario:<18} {flujo:<10} {r['viajes']:>7} {r['media_ms']:>10.2f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f}")
+
+    for escenario in ('sesion_existente', 'sesion_nueva'):
+        anterior = resultados.get((escenario, 'anterior'))
+        funcion = resultados.get((escenario, 'funcion'))
+        if anterior and funcion:
+            print(f"⚡ {escenario}: {anterior['media_ms'] / funcion['media_ms']:.1f}x más rápido con la función")
+
+
+if __name__ == "__main__":
+    iteraciones = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    mostrar_resultados(ejecutar_benchmark(iteraciones))
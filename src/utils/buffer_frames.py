@@ -0,0 +1,117 @@
+"""
+Buffer circular de frames crudos de una cámara
+Cada cámara copia el frame recién leído (sin anotaciones, antes de dibujar y
+de codificar a JPEG) en un arreglo preasignado de N frames con su marca de
+tiempo. El registro de usuarios toma de aquí los frames: sin el texto del modo
+registro encima y sin la pérdida de decodificar un JPEG.
+
+La ráfaga elige los mejores frames de todo el buffer: una pasada vectorizada
+de calidad (procesamiento_rostros.puntuar_calidad) ordena los candidatos y
+solo los mejores pasan por la detección (un rostro) y la pose (frontalidad).
+"""
+
+import threading
+
+import cv2
+import face_recognition
+import numpy as np
+
+try:
+    from src.utils.procesamiento_rostros import puntuar_calidad, puntuar_pose
+except ImportError:
+    # Ejecutado como script desde src/utils
+    from procesamiento_rostros import puntuar_calidad, puntuar_pose
+
+CAPACIDAD = 32  # ~1.5 s de video a la velocidad de captura de la cámara
+SEPARACION_MINIMA = 0.15  # Segundos entre frames elegidos en una ráfaga (poses distintas)
+
+
+class BufferFrames:
+    """
+    Últimos `capacidad` frames crudos con su marca de tiempo
+    """
+
+    def __init__(self, capacidad=CAPACIDAD):
+        self.capacidad = capacidad
+        self._lock = threading.Lock()
+        self._frames = None  # (capacidad, alto, ancho, 3) uint8, se asigna con el primer frame
+        self._marcas = np.zeros(capacidad)
+        self._siguiente = 0
+        self._cantidad = 0
+
+    def __len__(self):
+        return self._cantidad
+
+    def escribir(self, frame, marca):
+        """Copia el frame en la siguiente posición (sin asignar memoria)"""
+        with self._lock:
+            if self._frames is None or self._frames.shape[1:] != frame.shape:
+                self._frames = np.empty((self.capacidad,) + frame.shape, dtype=frame.dtype)
+                self._cantidad = 0
+                self._siguiente = 0
+            np.copyto(self._frames[self._siguiente], frame)
+            self._marcas[self._siguiente] = marca
+            self._siguiente = (self._siguiente + 1) % self.capacidad
+            self._cantidad = min(self._cantidad + 1, self.capacidad)
+
+    def instantanea(self):
+        """
+        Copia de los frames del buffer, del más antiguo al más reciente
+
+        Returns:
+            tuple: (frames (N, alto, ancho, 3), marcas (N,))
+        """
+        with self._lock:
+            if self._cantidad == 0:
+                return None, np.zeros(0)
+            orden = (np.arange(self._cantidad) + self._siguiente - self._cantidad) % self.capacidad
+            return self._frames[orden], self._marcas[orden].copy()
+
+    def ultimo(self):
+        """(frame, marca) más reciente o (None, None)"""
+        with self._lock:
+            if self._cantidad == 0:
+                return None, None
+            indice = (self._siguiente - 1) % self.capacidad
+            return self._frames[indice].copy(), float(self._marcas[indice])
+
+    def mejores(self, cantidad=1, separacion=SEPARACION_MINIMA, escala_deteccion=0.5):
+        """
+        Los `cantidad` mejores frames del buffer para registrar un rostro
+
+        Se puntúa la calidad de todos a la vez; los candidatos, de mejor a peor,
+        deben tener exactamente un rostro y estar separados en el tiempo. La
+        puntuación final combina calidad (70%) y frontalidad (30%).
+
+        Returns:
+            list: dicts frame, marca, calidad, pose, puntuacion (ordenados por puntuación)
+        """
+        frames, marcas = self.instantanea()
+        if frames is None:
+            return []
+
+        calidades = puntuar_calidad(frames, submuestreo=2)
+        elegidos = []
+        # Solo los mejores candidatos pasan por la detección (acota el costo)
+        for indice in np.argsort(-calidades)[:max(8, 4 * cantidad)]:
+            if len(elegidos) >= cantidad:
+                break
+            if any(abs(marcas[indice] - e['marca']) < separacion for e in elegidos):
+                continue
+
+            rgb = cv2.cvtColor(cv2.resize(frames[indice], (0, 0), fx=escala_deteccion, fy=escala_deteccion),
+                               cv2.COLOR_BGR2RGB)
+            ubicaciones = face_recognition.face_locations(rgb)
+            if len(ubicaciones) != 1:
+                continue
+
+            pose = puntuar_pose(rgb, ubicaciones[0])
+            elegidos.append({
+                'frame': frames[indice],
+                'marca': float(marcas[indice]),
+                'calidad': float(calidades[indice]),
+                'pose': pose,
+                'puntuacion': 0.7 * float(calidades[indice]) + 0.3 * pose,
+            })
+
+        return sorted(elegidos, key=lambda e: e['puntuacion'], reverse=True)
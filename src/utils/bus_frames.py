@@ -0,0 +1,455 @@
+"""
+Bus de frames y eventos en memoria compartida entre el motor y la web
+Con gunicorn (varios workers) las cámaras, el reconocimiento y el estado del
+registro no pueden vivir en cada worker: cada uno abriría la cámara. El motor
+(python main.py --motor) es el único proceso con cámaras y publica:
+
+- Por cámara, un anillo de frames JPEG ya codificados con número de secuencia.
+  Los workers comparan la secuencia (8 bytes) y solo copian el frame cuando
+  cambió, sin pasar por el motor ni por un socket.
+- Un anillo de eventos JSON (persona reconocida por cámara, galería recargada)
+  que cada worker recorre desde su propio cursor.
+
+Cada ranura usa un seqlock: el escritor marca inicio, copia los datos y marca
+fin; el lector acepta la ranura solo si inicio y fin coinciden con la
+secuencia pedida (si el escritor la pisó mientras se leía, se descarta).
+
+Las órdenes (cambiar de modo, capturar, registrar, estado de cámaras) van por
+un socket Unix con permisos 0600 (solo el usuario del motor puede conectarse)
+que el motor atiende con un hilo por conexión. Los mensajes son JSON con
+prefijo de longitud, nunca pickle: una conexión no puede ejecutar código en
+el motor. Un valor binario de la respuesta (el JPEG de una foto) viaja aparte,
+después del JSON.
+"""
+
+import json
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+PREFIJO = 'asistencia'
+RUTA_CONTROL = os.environ.get('MOTOR_SOCKET') or os.path.join(
+    os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir(), 'asistencia-motor.sock')
+
+RANURAS_FRAMES = 4  # Un lector lento tiene 3 frames de margen antes de que se pise el suyo
+TAMANO_FRAME = 1024 * 1024  # JPEG máximo por frame (un 1080p con calidad 95 ocupa ~500 KB)
+RANURAS_EVENTOS = 256
+TAMANO_EVENTO = 1024
+FRESCURA_SEGUNDOS = 2.0  # Sin frames nuevos en este tiempo la cámara se considera inactiva
+ESPERA_CONTROL = 15.0  # Segundos que un worker espera la respuesta del motor (recargar_rostros es la más lenta)
+
+_CABECERA = struct.Struct('<4sIIxxxxQ')  # magia, ranuras, tamaño de ranura, última secuencia
+_RANURA = struct.Struct('<QQdI4x')  # inicio, fin, marca de tiempo, longitud
+_MAGIA = b'BUS1'
+_MENSAJE = struct.Struct('<II')  # longitud del JSON, longitud del binario
+MAX_MENSAJE = 16 * 1024 * 1024
+
+
+def _adjuntar(nombre):
+    """
+    Memoria compartida existente sin registrarla en el resource_tracker de este
+    proceso (si no, el tracker la borraría al terminar el worker)
+    """
+    try:
+        return shared_memory.SharedMemory(name=nombre, track=False)
+    except TypeError:
+        # Python < 3.13: no existe track=False
+        memoria = shared_memory.SharedMemory(name=nombre)
+        resource_tracker.unregister(memoria._name, 'shared_memory')
+        return memoria
+
+
+class AnilloCompartido:
+    """
+    Anillo de ranuras de tamaño fijo en memoria compartida (un escritor,
+    cualquier número de lectores en otros procesos)
+    """
+
+    def __init__(self, nombre, ranuras=None, tamano_ranura=None, crear=False):
+        self.nombre = nombre
+        if crear:
+            total = _CABECERA.size + ranuras * (_RANURA.size + tamano_ranura)
+            try:
+                self._memoria = shared_memory.SharedMemory(name=nombre, create=True, size=total)
+            except FileExistsError:
+                # Restos de un motor que terminó sin limpiar
+                anterior = _adjuntar(nombre)
+                anterior.close()
+                anterior.unlink()
+                self._memoria = shared_memory.SharedMemory(name=nombre, create=True, size=total)
+            _CABECERA.pack_into(self._memoria.buf, 0, _MAGIA, ranuras, tamano_ranura, 0)
+        else:
+            self._memoria = _adjuntar(nombre)
+            magia, ranuras, tamano_ranura, _ = _CABECERA.unpack_from(self._memoria.buf, 0)
+            if magia != _MAGIA:
+                self._memoria.close()
+                raise ValueError(f"{nombre} no es un anillo del bus")
+
+        self.ranuras = ranuras
+        self.tamano_ranura = tamano_ranura
+        self._buf = self._memoria.buf
+        self._creador = crear
+
+    def _desplazamiento(self, secuencia):
+        return _CABECERA.size + (secuencia % self.ranuras) * (_RANURA.size + self.tamano_ranura)
+
+    def secuencia(self):
+        """Última secuencia publicada (0 = nada todavía)"""
+        return struct.unpack_from('<Q', self._buf, _CABECERA.size - 8)[0]
+
+    def publicar(self, datos, marca=None):
+        """
+        Escribe datos (bytes, memoryview o arreglo de bytes) en la siguiente ranura
+
+        Returns:
+            int: Secuencia asignada
+        """
+        datos = memoryview(datos).cast('B')
+        if len(datos) > self.tamano_ranura:
+            raise ValueError(f"{len(datos)} bytes no caben en una ranura de {self.tamano_ranura}")
+
+        secuencia = self.secuencia() + 1
+        inicio = self._desplazamiento(secuencia)
+        struct.pack_into('<Q', self._buf, inicio, secuencia)
+        self._buf[inicio + _RANURA.size:inicio + _RANURA.size + len(datos)] = datos
+        _RANURA.pack_into(self._buf, inicio, secuencia, secuencia, time.time() if marca is None else marca, len(datos))
+        struct.pack_into('<Q', self._buf, _CABECERA.size - 8, secuencia)
+        return secuencia
+
+    def leer(self, secuencia=None):
+        """
+        Copia de una ranura
+
+        Args:
+            secuencia: La que se quiere (por defecto, la última)
+
+        Returns:
+            tuple: (secuencia, marca, bytes) o None si no existe o ya se pisó
+        """
+        if secuencia is None:
+            secuencia = self.secuencia()
+        if secuencia == 0:
+            return None
+
+        inicio = self._desplazamiento(secuencia)
+        _, fin, marca, longitud = _RANURA.unpack_from(self._buf, inicio)
+        if fin != secuencia:
+            return None
+        datos = bytes(self._buf[inicio + _RANURA.size:inicio + _RANURA.size + longitud])
+        if struct.unpack_from('<Q', self._buf, inicio)[0] != secuencia:
+            return None  # El escritor la pisó mientras se copiaba
+        return secuencia, marca, datos
+
+    def cerrar(self):
+        self._buf = None
+        self._memoria.close()
+        if self._creador:
+            self._memoria.unlink()
+
+
+class BusFrames:
+    """
+    Un anillo de frames JPEG por cámara y uno de eventos
+    """
+
+    def __init__(self, ids_camaras=None, prefijo=PREFIJO, crear=False):
+        """
+        Args:
+            ids_camaras: Cámaras del motor (al crear); al adjuntarse se leen del bus
+            crear: True en el motor, False en los workers web
+        """
+        self.prefijo = prefijo
+        self._eventos = AnilloCompartido(f"{prefijo}_eventos", RANURAS_EVENTOS, TAMANO_EVENTO, crear)
+        self._lock_eventos = threading.Lock()
+        if crear:
+            self.ids_camaras = [str(i) for i in ids_camaras]
+            self._indice = AnilloCompartido(f"{prefijo}_camaras", 1, TAMANO_EVENTO, crear=True)
+            self._indice.publicar(json.dumps(self.ids_camaras).encode('utf-8'))
+        else:
+            self._indice = AnilloCompartido(f"{prefijo}_camaras")
+            self.ids_camaras = json.loads(self._indice.leer()[2])
+        # Marca de creación del índice: identifica a esta ejecución del motor
+        self._marca_indice = self._indice.leer()[1]
+        self._frames = {
+            id_camara: AnilloCompartido(f"{prefijo}_frames_{id_camara}", RANURAS_FRAMES, TAMANO_FRAME, crear)
+            for id_camara in self.ids_camaras
+        }
+
+    # Frames
+
+    def publicar_frame(self, id_camara, jpeg):
+        """
+        Publica el JPEG de una cámara (el buffer de cv2.imencode, sin tobytes)
+
+        Returns:
+            bool: False si el frame no cabe en la ranura (no se publica)
+        """
+        try:
+            self._frames[id_camara].publicar(jpeg)
+            return True
+        except ValueError:
+            return False
+
+    def secuencia_frame(self, id_camara):
+        anillo = self._frames.get(id_camara)
+        return anillo.secuencia() if anillo else 0
+
+    def leer_frame(self, id_camara):
+        """(secuencia, marca, jpeg) del último frame o None"""
+        anillo = self._frames.get(id_camara)
+        return anillo.leer() if anillo else None
+
+    def camara_activa(self, id_camara=None):
+        """Alguna cámara (o la indicada) publicó un frame hace menos de FRESCURA_SEGUNDOS"""
+        ahora = time.time()
+        for id_actual in ([id_camara] if id_camara else self.ids_camaras):
+            frame = self.leer_frame(id_actual)
+            if frame and ahora - frame[1] < FRESCURA_SEGUNDOS:
+                return True
+        return False
+
+    # Eventos
+
+    def publicar_evento(self, evento):
+        """Publica un dict JSON (desde cualquier hilo del motor)"""
+        with self._lock_eventos:
+            self._eventos.publicar(json.dumps(evento, default=str).encode('utf-8'))
+
+    def eventos_desde(self, cursor):
+        """
+        Eventos posteriores a `cursor` que siguen en el anillo
+
+        Returns:
+            tuple: (nuevo cursor, lista de eventos)
+        """
+        ultima = self._eventos.secuencia()
+        eventos = []
+        for secuencia in range(max(cursor + 1, ultima - self._eventos.ranuras + 1), ultima + 1):
+            ranura = self._eventos.leer(secuencia)
+            if ranura is not None:
+                eventos.append(json.loads(ranura[2]))
+        return ultima, eventos
+
+    def vigente(self):
+        """False si el motor que creó este bus terminó o se reinició (los workers se vuelven a adjuntar)"""
+        try:
+            indice = AnilloCompartido(f"{self.prefijo}_camaras")
+        except (FileNotFoundError, ValueError):
+            return False
+        try:
+            actual = indice.leer()
+            return actual is not None and actual[1] == self._marca_indice
+        finally:
+            indice.cerrar()
+
+    def cerrar(self):
+        for anillo in self._frames.values():
+            anillo.cerrar()
+        self._eventos.cerrar()
+        self._indice.cerrar()
+
+
+# ------------------------------------------------------------
+# Canal de control
+# ------------------------------------------------------------
+
+def _recibir_exacto(conexion, cantidad):
+    partes = []
+    while cantidad:
+        parte = conexion.recv(min(cantidad, 1024 * 1024))
+        if not parte:
+            raise EOFError("Conexión cerrada")
+        partes.append(parte)
+        cantidad -= len(parte)
+    return b''.join(partes)
+
+
+def enviar_mensaje(conexion, datos, binario=b''):
+    """Envía un objeto JSON y, opcionalmente, bytes a continuación"""
+    cuerpo = json.dumps(datos, default=str).encode('utf-8')
+    conexion.sendall(_MENSAJE.pack(len(cuerpo), len(binario)) + cuerpo + bytes(binario))
+
+
+def recibir_mensaje(conexion):
+    """
+    Returns:
+        tuple: (objeto JSON, bytes del binario)
+
+    Raises:
+        EOFError: Si la conexión se cerró
+        ValueError: Si el mensaje supera MAX_MENSAJE
+    """
+    largo_json, largo_binario = _MENSAJE.unpack(_recibir_exacto(conexion, _MENSAJE.size))
+    if largo_json + largo_binario > MAX_MENSAJE:
+        raise ValueError(f"Mensaje de control demasiado grande: {largo_json + largo_binario} bytes")
+    datos = json.loads(_recibir_exacto(conexion, largo_json))
+    return datos, _recibir_exacto(conexion, largo_binario)
+
+
+class ServidorControl:
+    """
+    Atiende órdenes {"comando", "argumentos"} de los workers web en el motor
+    """
+
+    def __init__(self, comandos, ruta=RUTA_CONTROL):
+        """
+        Args:
+            comandos: dict nombre -> función(**argumentos) que devuelve (respuesta, código HTTP)
+        """
+        self.comandos = comandos
+        self.ruta = ruta
+        if os.path.exists(ruta):
+            os.unlink(ruta)  # Restos de un motor que terminó sin limpiar
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # El socket se crea ya con 0600: no hay un instante en que otro usuario pueda conectarse
+        mascara = os.umask(0o177)
+        try:
+            self._socket.bind(ruta)
+        finally:
+            os.umask(mascara)
+        self._socket.listen(16)
+        self._hilo = None
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._aceptar, name="control-motor", daemon=True)
+        self._hilo.start()
+        print(f"🎛️ Canal de control del motor en {self.ruta}")
+
+    def _aceptar(self):
+        while True:
+            try:
+                conexion, _ = self._socket.accept()
+            except OSError:
+                return  # Socket cerrado
+            threading.Thread(target=self._atender, args=(conexion,), daemon=True).start()
+
+    def _atender(self, conexion):
+        with conexion:
+            while True:
+                try:
+                    orden, _ = recibir_mensaje(conexion)
+                except (EOFError, OSError):
+                    return
+                except ValueError as e:
+                    print(f"⚠️ Orden de control rechazada: {e}")
+                    return
+                comando = orden.get('comando')
+                funcion = self.comandos.get(comando)
+                try:
+                    if funcion is None:
+                        respuesta = ({'success': False, 'message': f'Comando desconocido: {comando}'}, 400)
+                    else:
+                        respuesta = funcion(**orden.get('argumentos', {}))
+                except Exception as e:
+                    respuesta = ({'success': False, 'message': f'Error: {str(e)}'}, 500)
+
+                # Un valor bytes de la respuesta (JPEG) va como binario después del JSON
+                datos, codigo = respuesta
+                binario = b''
+                campo_binario = None
+                for clave, valor in datos.items():
+                    if isinstance(valor, (bytes, bytearray)):
+                        campo_binario, binario = clave, valor
+                        datos = {k: v for k, v in datos.items() if k != clave}
+                        break
+                try:
+                    enviar_mensaje(conexion, {'respuesta': datos, 'codigo': codigo, 'binario': campo_binario}, binario)
+                except OSError:
+                    return
+
+    def cerrar(self):
+        self._socket.close()
+        if os.path.exists(self.ruta):
+            os.unlink(self.ruta)
+
+
+class ClienteControl:
+    """
+    Conexión de un worker web con el motor (una por proceso, reconecta si se cae)
+    """
+
+    def __init__(self, ruta=RUTA_CONTROL):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._conexion = None
+
+    def _conectar(self):
+        """
+        Conexión lista para enviar una orden. Si el motor se reinició la
+        conexión anterior quedó cerrada por el otro extremo: se descarta antes
+        de enviar nada y se conecta de nuevo (un segundo intento si falla).
+
+        Raises:
+            OSError: Si el motor no acepta la conexión
+        """
+        if self._conexion is not None and not self._conexion_vigente():
+            self._cerrar_conexion()
+        if self._conexion is not None:
+            return self._conexion
+
+        for intento in range(2):
+            conexion = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conexion.settimeout(ESPERA_CONTROL)
+            try:
+                conexion.connect(self.ruta)
+            except OSError:
+                conexion.close()
+                if intento == 1:
+                    raise
+                continue
+            self._conexion = conexion
+            return conexion
+
+    def _conexion_vigente(self):
+        """El motor no envía nada sin una orden: algo legible es un cierre (b'') o basura"""
+        try:
+            self._conexion.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        return False
+
+    def _cerrar_conexion(self):
+        if self._conexion is not None:
+            self._conexion.close()
+        self._conexion = None
+
+    def ejecutar(self, comando, **argumentos):
+        """
+        Solo se reintenta la conexión: una orden ya enviada nunca se repite
+        (guardar_usuario o capturar_foto se ejecutarían dos veces).
+
+        Returns:
+            tuple: (respuesta, código HTTP); 503 si el motor no responde en ESPERA_CONTROL
+        """
+        # Los hilos del worker comparten la conexión: sin límite, todos esperarían a una orden colgada
+        if not self._lock.acquire(timeout=ESPERA_CONTROL):
+            return {'success': False, 'message': 'El motor de reconocimiento está ocupado'}, 503
+        try:
+            try:
+                conexion = self._conectar()
+            except OSError:
+                return {'success': False, 'message': 'El motor de reconocimiento no está disponible'}, 503
+
+            try:
+                enviar_mensaje(conexion, {'comando': comando, 'argumentos': argumentos})
+                mensaje, binario = recibir_mensaje(conexion)
+            except socket.timeout:
+                # La respuesta tardía llegaría a la siguiente orden: la conexión se descarta
+                self._cerrar_conexion()
+                return {'success': False, 'message': 'El motor de reconocimiento no respondió a tiempo'}, 503
+            except (OSError, EOFError, ValueError):
+                self._cerrar_conexion()
+                return {'success': False, 'message': 'El motor de reconocimiento no está disponible'}, 503
+
+            respuesta = mensaje['respuesta']
+            if mensaje.get('binario'):
+                respuesta[mensaje['binario']] = binario
+            return respuesta, mensaje['codigo']
+        finally:
+            self._lock.release()
@@ -0,0 +1,103 @@
+"""
+Modelo de lectura en memoria para el dashboard académico
+Guarda las sesiones del día y las asistencias recientes para que los sondeos
+del frontend (cada 30 segundos) no consulten la base de datos.
+Las escrituras (asistencias, habilitar/finalizar sesiones) invalidan la cache.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+
+class CacheAcademico:
+    """
+    Cache de sesiones del día y asistencias recientes construida sobre
+    GestorAcademicoAutomatico
+    """
+
+    def __init__(self, gestor, max_asistencias=50, ttl_segundos=300):
+        self.gestor = gestor
+        self.max_asistencias = max_asistencias
+        # Límite de antigüedad por si otro proceso (scripts de utils) escribe en la BD
+        self.ttl_segundos = ttl_segundos
+
+        self._lock = threading.Lock()
+        self._fecha_sesiones = None
+        self._sesiones = None
+        self._sesiones_cargadas_en = 0
+        self._asistencias = None
+        self._asistencias_cargadas_en = 0
+
+    def invalidar(self, sesiones=True, asistencias=True):
+        """Descarta el contenido de la cache después de una escritura"""
+        with self._lock:
+            if sesiones:
+                self._sesiones = None
+            if asistencias:
+                self._asistencias = None
+
+    def _vigente(self, cargado_en):
+        return time.time() - cargado_en < self.ttl_segundos
+
+    def obtener_sesiones_hoy(self):
+        """
+        Sesiones programadas para hoy (copia de la lista cacheada)
+
+        Returns:
+            list: Sesiones del día, lista vacía si no se pudieron cargar
+        """
+        hoy = datetime.now().date()
+
+        with self._lock:
+            if (self._sesiones is not None and self._fecha_sesiones == hoy
+                    and self._vigente(self._sesiones_cargadas_en)):
+                return list(self._sesiones)
+
+            sesiones = self.gestor.obtener_sesiones_del_dia(hoy)
+            if sesiones is None:
+                # Error de BD: servir lo último conocido si es del mismo día
+                if self._sesiones is not None and self._fecha_sesiones == hoy:
+                    return list(self._sesiones)
+                return []
+
+            self._sesiones = sesiones
+            self._fecha_sesiones = hoy
+            self._sesiones_cargadas_en = time.time()
+            return list(sesiones)
+
+    def obtener_sesion_activa(self, ahora=None, aula=None):
+        """
+        Sesión de hoy cuyo horario contiene la hora actual, resuelta en memoria.
+        Si varias coinciden se prefiere la que tiene asistencia habilitada.
+        Con aula, solo se consideran las sesiones de esa aula (cámara de un salón).
+        """
+        if ahora is None:
+            ahora = datetime.now()
+        hora = ahora.time()
+
+        candidatas = [
+            sesion for sesion in self.obtener_sesiones_hoy()
+            if (sesion['hora_inicio'] <= hora <= sesion['hora_fin']
+                or sesion['asistencia_habilitada'])
+            and (aula is None or sesion['aula'] == aula)
+        ]
+        if not candidatas:
+            return None
+
+        candidatas.sort(key=lambda s: (not s['asistencia_habilitada'], s['hora_inicio']))
+        return candidatas[0]
+
+    def obtener_asistencias_recientes(self, limite=10):
+        """Últimas asistencias registradas (como máximo max_asistencias)"""
+        limite = max(1, min(limite, self.max_asistencias))
+
+        with self._lock:
+            if self._asistencias is None or not self._vigente(self._asistencias_cargadas_en):
+                asistencias = self.gestor.obtener_asistencias_recientes(self.max_asistencias)
+                if asistencias is None:
+                    return list(self._asistencias or [])[:limite]
+                self._asistencias = asistencias
+                self._asistencias_cargadas_en = time.time()
+
+            return self._asistencias[:limite]
@@ -0,0 +1,250 @@
+"""
+Calendario académico: semestres y cortes por rangos de fechas
+Lee config/calendario_academico.json y compila cada año en un índice de
+intervalos ordenado por fecha de inicio; una fecha se resuelve con búsqueda
+binaria (bisect) y el resultado se memoriza por fecha.
+
+Configuración:
+    "plantilla": semestres y cortes con fechas "MM-DD", para los años que no
+                 aparecen en "años" (por defecto: enero-junio / julio-diciembre,
+                 un corte cada dos meses)
+    "años":      calendario real de un año, con fechas completas, p. ej.
+                 "2026": {"semestres": [
+                     {"semestre": "1", "desde": "2026-01-26", "hasta": "2026-06-05",
+                      "cortes": [{"corte": 1, "desde": "2026-01-26"},
+                                 {"corte": 2, "desde": "2026-03-16"},
+                                 {"corte": 3, "desde": "2026-04-27"}]},
+                     ...]}
+
+    Cada corte termina el día antes de que empiece el siguiente (o con su "hasta"
+    si se indica); el último termina con el semestre. En los recesos entre
+    semestres se mantiene el último corte iniciado.
+
+Uso:
+    python src/utils/calendario_academico.py 2026           # períodos del año
+    python src/utils/calendario_academico.py 2026-03-16     # resolver una fecha
+"""
+
+import json
+import os
+import sys
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+RUTA_CONFIGURACION = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config', 'calendario_academico.json'
+)
+
+# Calendario por meses usado si no existe el archivo de configuración
+PLANTILLA_POR_DEFECTO = {
+    'semestres': [
+        {'semestre': '1', 'desde': '01-01', 'hasta': '06-30', 'cortes': [
+            {'corte': 1, 'desde': '01-01'}, {'corte': 2, 'desde': '03-01'}, {'corte': 3, 'desde': '05-01'}]},
+        {'semestre': '2', 'desde': '07-01', 'hasta': '12-31', 'cortes': [
+            {'corte': 1, 'desde': '07-01'}, {'corte': 2, 'desde': '09-01'}, {'corte': 3, 'desde': '11-01'}]},
+    ]
+}
+
+Periodo = namedtuple('Periodo', ['año', 'semestre', 'corte', 'inicio', 'fin'])
+
+# Índice compilado completo; se publica con una sola asignación para que los
+# lectores (sin lock) nunca vean períodos de una compilación y arreglos de otra
+_Indice = namedtuple('_Indice', ['periodos', 'inicios', 'inicios_np', 'años_np', 'semestres_np', 'cortes_np', 'memo'])
+
+
+def _fecha(valor, año):
+    """'YYYY-MM-DD' o 'MM-DD' (plantilla) -> date"""
+    if len(valor) == 5:
+        return date(año, int(valor[:2]), int(valor[3:]))
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+def _como_fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return datetime.strptime(str(valor)[:10], '%Y-%m-%d').date()
+
+
+class CalendarioAcademico:
+    """
+    Índice de intervalos (año, semestre, corte) con búsqueda binaria.
+    Los años se compilan la primera vez que se consultan.
+    """
+
+    def __init__(self, ruta_configuracion=None, configuracion=None):
+        if configuracion is None:
+            ruta = ruta_configuracion or RUTA_CONFIGURACION
+            if os.path.exists(ruta):
+                with open(ruta, encoding='utf-8') as f:
+                    configuracion = json.load(f)
+            else:
+                configuracion = {}
+
+        self._plantilla = configuracion.get('plantilla') or PLANTILLA_POR_DEFECTO
+        self._años_configurados = {int(año): datos for año, datos in configuracion.get('años', {}).items()}
+
+        self._lock = threading.Lock()
+        self._años_compilados = frozenset()
+        self._indice = self._construir_indice([])
+
+    # ------------------------------------------------------------
+    # Compilación del índice
+    # ------------------------------------------------------------
+
+    def _compilar_año(self, año):
+        """Lista de Periodo (uno por corte) de un año, desde la configuración o la plantilla"""
+        datos = self._años_configurados.get(año, self._plantilla)
+        periodos = []
+
+        for semestre in datos['semestres']:
+            nombre = f"{año}-{semestre['semestre']}"
+            fin_semestre = _fecha(semestre['hasta'], año)
+            cortes = sorted(semestre['cortes'], key=lambda c: _fecha(c['desde'], año))
+
+            for i, corte in enumerate(cortes):
+                inicio = _fecha(corte['desde'], año)
+                if 'hasta' in corte:
+                    fin = _fecha(corte['hasta'], año)
+                elif i + 1 < len(cortes):
+                    fin = _fecha(cortes[i + 1]['desde'], año) - timedelta(days=1)
+                else:
+                    fin = fin_semestre
+
+                if fin < inicio:
+                    raise ValueError(f"Calendario {nombre}: el corte {corte['corte']} termina antes de empezar")
+                periodos.append(Periodo(año, nombre, int(corte['corte']), inicio, fin))
+
+        return periodos
+
+    def _construir_indice(self, periodos):
+        """_Indice de una lista de Periodo ya ordenada (con su memo vacío)"""
+        inicios = [p.inicio for p in periodos]
+        return _Indice(
+            periodos=periodos,
+            inicios=inicios,
+            inicios_np=np.array(inicios, dtype='datetime64[D]'),
+            años_np=np.array([p.año for p in periodos], dtype=np.int16),
+            semestres_np=np.array([p.semestre for p in periodos], dtype=object),
+            cortes_np=np.array([p.corte for p in periodos], dtype=np.int8),
+            memo={},
+        )
+
+    def _asegurar_años(self, años):
+        """
+        Compila los años que falten y reconstruye el índice (una vez por año)
+
+        Returns:
+            _Indice: Índice vigente que cubre esos años (el lector usa solo este)
+        """
+        # El año anterior cubre las fechas previas al primer corte del año (receso)
+        faltantes = {a for año in años for a in (año - 1, año)} - self._años_compilados
+        if not faltantes:
+            return self._indice
+
+        with self._lock:
+            faltantes -= self._años_compilados
+            if not faltantes:
+                return self._indice
+
+            periodos = list(self._indice.periodos)
+            for año in faltantes:
+                periodos.extend(self._compilar_año(año))
+            periodos.sort(key=lambda p: p.inicio)
+
+            for anterior, siguiente in zip(periodos, periodos[1:]):
+                if siguiente.inicio <= anterior.fin:
+                    raise ValueError(
+                        f"Calendario: {anterior.semestre} corte {anterior.corte} se superpone con "
+                        f"{siguiente.semestre} corte {siguiente.corte}"
+                    )
+
+            # Primero el índice y después los años: quien vea el año compilado ya ve su índice
+            indice = self._construir_indice(periodos)
+            self._indice = indice
+            self._años_compilados = self._años_compilados | faltantes
+            return indice
+
+    # ------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------
+
+    def resolver(self, fecha=None):
+        """
+        Período académico de una fecha
+
+        Args:
+            fecha: date, datetime o 'YYYY-MM-DD' (por defecto hoy)
+
+        Returns:
+            Periodo: (año, semestre, corte, inicio, fin)
+        """
+        dia = _como_fecha(fecha if fecha is not None else datetime.now())
+
+        periodo = self._indice.memo.get(dia)
+        if periodo is not None:
+            return periodo
+
+        indice = self._asegurar_años({dia.year})
+        periodo = indice.periodos[max(0, bisect_right(indice.inicios, dia) - 1)]
+        indice.memo[dia] = periodo
+        return periodo
+
+    def resolver_muchos(self, fechas):
+        """
+        Resuelve un arreglo de fechas de una vez (backfills, reportes, generador de horarios)
+
+        Args:
+            fechas: secuencia de date/datetime/'YYYY-MM-DD' o arreglo datetime64
+
+        Returns:
+            dict: {'año': int16[], 'semestre': object[], 'corte': int8[]} alineados con fechas
+        """
+        dias = np.asarray(fechas, dtype='datetime64[D]')
+        if dias.size == 0:
+            indice = self._indice
+            return {'año': indice.años_np[:0], 'semestre': indice.semestres_np[:0], 'corte': indice.cortes_np[:0]}
+
+        años = np.unique(dias.astype('datetime64[Y]').astype(np.int64) + 1970)
+        indice = self._asegurar_años({int(a) for a in años})
+
+        posiciones = np.maximum(np.searchsorted(indice.inicios_np, dias, side='right') - 1, 0)
+        return {
+            'año': indice.años_np[posiciones],
+            'semestre': indice.semestres_np[posiciones],
+            'corte': indice.cortes_np[posiciones],
+        }
+
+    def periodos_del_año(self, año):
+        """Cortes de un año en orden cronológico"""
+        return [p for p in self._asegurar_años({año}).periodos if p.año == año]
+
+
+_calendario = None
+
+
+def obtener_calendario():
+    """Instancia compartida (se carga una vez por proceso)"""
+    global _calendario
+    if _calendario is None:
+        _calendario = CalendarioAcademico()
+    return _calendario
+
+
+if __name__ == "__main__":
+    calendario = obtener_calendario()
+    argumento = sys.argv[1] if len(sys.argv) > 1 else str(datetime.now().year)
+
+    if argumento.isdigit():
+        print(f"🗓️ CALENDARIO ACADÉMICO {argumento}")
+        print("-"*50)
+        for p in calendario.periodos_del_año(int(argumento)):
+            print(f"   {p.semestre} Corte {p.corte}: {p.inicio} → {p.fin}")
+    else:
+        p = calendario.resolver(argumento)
+        print(f"📅 {argumento}: Año {p.año}, {p.semestre}, Corte {p.corte} ({p.inicio} → {p.fin})")
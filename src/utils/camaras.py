@@ -0,0 +1,319 @@
+"""
+Gestor de cámaras: varias fuentes de video con reconocimiento en paralelo
+Cada cámara de config/camaras.json corre en su propio hilo (captura + análisis)
+con su fuente, aula, perfil de detección y FPS de análisis. Todas comparten la
+galería de rostros y el registro de asistencia de main.py, que recibe cada
+frame a través de la función procesar_frame.
+
+El presupuesto de CPU es global:
+    - "fps_totales": suma máxima de frames analizados por segundo entre todas
+      las cámaras; si lo pedido por las cámaras lo supera, se reparte en
+      proporción a sus "fps".
+    - "analisis_simultaneos": cuántas cámaras pueden analizar un frame a la vez.
+      Si no hay turno libre el análisis se omite y se intenta con el siguiente
+      frame; la captura y el streaming siguen a la velocidad de la cámara.
+
+Configuración:
+    {
+      "fps_totales": 12,
+      "analisis_simultaneos": 2,
+      "camaras": [
+        {"id": "principal", "fuente": "auto", "perfil": "rapido", "fps": 6},
+        {"id": "aula_201", "fuente": 1, "aula": "201", "perfil": "lejano", "fps": 4},
+        {"id": "entrada", "fuente": "rtsp://10.0.0.5/stream", "perfil": "rapido", "fps": 4}
+      ]
+    }
+    "fuente": índice de cámara, "auto" (prueba 0, 1 y 2), URL, archivo de video,
+              carpeta de imágenes o "sintetica" (ver fuentes_captura.py)
+    "aula":   se buscan primero los inscritos de la sesión activa en esa aula y
+              la asistencia se registra en esa sesión
+    "curso":  id del curso de la sesión automática que se crea si el aula no
+              tiene ninguna en ese momento (sin él, la sesión queda sin curso)
+    "fps":    frames analizados por segundo; null analiza todos los frames
+              (fuera del presupuesto, para benchmarks sobre grabaciones)
+    "streaming": false para no codificar JPEG (ejecución sin interfaz)
+    "buffer_frames": frames crudos recientes que se conservan para el registro
+              de usuarios (32 por defecto, 0 lo desactiva; ver buffer_frames.py)
+    La primera cámara es la principal (modo registro y /video_feed).
+
+Con el motor en su propio proceso (python main.py --motor) el gestor recibe un
+BusFrames y cada JPEG se publica además en la memoria compartida para los
+workers web (ver bus_frames.py).
+"""
+
+import json
+import os
+import threading
+import time
+
+import cv2
+
+try:
+    from src.utils.buffer_frames import CAPACIDAD, BufferFrames
+    from src.utils.fuentes_captura import crear_fuente
+    from src.utils.procesamiento_rostros import PERFILES_DETECCION
+except ImportError:
+    # Ejecutado como script desde src/utils
+    from buffer_frames import CAPACIDAD, BufferFrames
+    from fuentes_captura import crear_fuente
+    from procesamiento_rostros import PERFILES_DETECCION
+
+RUTA_CONFIGURACION = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config', 'camaras.json'
+)
+
+# Una sola cámara detectada automáticamente: el comportamiento de un solo hilo
+CONFIGURACION_POR_DEFECTO = {
+    'fps_totales': 8,
+    'analisis_simultaneos': 1,
+    'camaras': [{'id': 'principal', 'fuente': 'auto', 'perfil': 'rapido', 'fps': 8}]
+}
+
+
+class Camara:
+    """
+    Una fuente de video con su hilo de captura y análisis
+    """
+
+    def __init__(self, configuracion, gestor):
+        self.id = str(configuracion['id'])
+        self.fuente = configuracion.get('fuente', 'auto')
+        self.aula = configuracion.get('aula')
+        self.id_curso = configuracion.get('curso')
+        self.nombre_perfil = configuracion.get('perfil', 'rapido')
+        if self.nombre_perfil not in PERFILES_DETECCION:
+            raise ValueError(f"Cámara {self.id}: perfil desconocido '{self.nombre_perfil}'")
+        self.perfil = PERFILES_DETECCION[self.nombre_perfil]
+        fps = configuracion.get('fps', 4)
+        self.fps_pedidos = float(fps) if fps is not None else None
+        self.fps_asignados = self.fps_pedidos
+        self.ancho = int(configuracion.get('ancho', 640))
+        self.alto = int(configuracion.get('alto', 480))
+        self.streaming = configuracion.get('streaming', True)
+        capacidad = int(configuracion.get('buffer_frames', CAPACIDAD))
+        self.buffer = BufferFrames(capacidad) if capacidad > 0 else None  # Frames crudos recientes
+
+        self.gestor = gestor
+        self.frame_jpeg = None   # Último frame para el streaming
+        self.persona = None      # Último rostro reconocido
+        self.activa = False
+        self.error = None
+
+        self._hilo = None
+        self._detener = threading.Event()
+        self._reiniciar_estadisticas()
+
+    def _reiniciar_estadisticas(self):
+        self.iniciada_en = None
+        self.finalizada_en = None
+        self.frames_leidos = 0
+        self.frames_analizados = 0
+        self.analisis_omitidos = 0
+        self.segundos_analisis = 0.0
+
+    # ------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------
+
+    def iniciar(self):
+        """Inicia el hilo si no está corriendo"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ejecutar, name=f"camara-{self.id}", daemon=True)
+        self._hilo.start()
+        print(f"🚀 Hilo de la cámara {self.id} iniciado")
+
+    def detener(self, espera=5):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=espera)
+
+    def esperar(self, espera=None):
+        """Espera a que termine el hilo (fuentes grabadas que llegan al final)"""
+        if self._hilo is not None:
+            self._hilo.join(timeout=espera)
+
+    def _abrir(self):
+        """Abre la fuente de captura (None si no se pudo)"""
+        try:
+            fuente = crear_fuente(self.fuente, self.ancho, self.alto)
+            if fuente.abrir():
+                print(f"✅ Cámara {self.id}: {fuente.descripcion}")
+                return fuente
+            fuente.liberar()
+        except Exception as e:
+            print(f"❌ Cámara {self.id}: error al abrir {self.fuente}: {e}")
+        return None
+
+    def _ejecutar(self):
+        fuente = self._abrir()
+        if fuente is None:
+            self.error = "No se pudo abrir la fuente de video"
+            print(f"❌ Cámara {self.id}: {self.error}")
+            return
+
+        self._reiniciar_estadisticas()
+        self.iniciada_en = time.time()
+        self.error = None
+        self.activa = True
+        proximo_analisis = 0
+
+        try:
+            while not self._detener.is_set():
+                ret, frame = fuente.leer()
+                if not ret:
+                    if fuente.en_vivo:
+                        self.error = "Error al leer frame de la cámara"
+                        print(f"❌ Cámara {self.id}: {self.error}")
+                    else:
+                        print(f"⏹️ Cámara {self.id}: fin de {fuente.descripcion}")
+                    break
+                self.frames_leidos += 1
+                if self.buffer is not None:
+                    self.buffer.escribir(frame, time.time())
+
+                # Analizar solo si toca según los FPS asignados y hay turno de CPU libre
+                analizar = False
+                ahora = time.monotonic()
+                if self.fps_asignados is None or (self.fps_asignados > 0 and ahora >= proximo_analisis):
+                    if self.gestor.turnos.acquire(blocking=False):
+                        analizar = True
+                        if self.fps_asignados:
+                            proximo_analisis = ahora + 1.0 / self.fps_asignados
+                    else:
+                        self.analisis_omitidos += 1
+
+                if analizar:
+                    inicio = time.perf_counter()
+                    try:
+                        display_frame = self.gestor.procesar_frame(self, frame, True)
+                    finally:
+                        self.gestor.turnos.release()
+                    self.frames_analizados += 1
+                    self.segundos_analisis += time.perf_counter() - inicio
+                else:
+                    display_frame = self.gestor.procesar_frame(self, frame, False)
+
+                if self.streaming:
+                    ret, buffer = cv2.imencode('.jpg', display_frame)
+                    if ret:
+                        self.frame_jpeg = buffer.tobytes()
+                        if self.gestor.bus is not None:
+                            self.gestor.bus.publicar_frame(self.id, buffer)
+
+                # Pequeña pausa para evitar consumo excesivo de CPU (las fuentes
+                # grabadas marcan su propio ritmo)
+                if fuente.en_vivo:
+                    time.sleep(0.02)
+
+        except Exception as e:
+            self.error = str(e)
+            print(f"❌ Error en el hilo de la cámara {self.id}: {e}")
+        finally:
+            fuente.liberar()
+            self.finalizada_en = time.time()
+            self.activa = False
+            print(f"📹 Cámara {self.id} liberada")
+
+    # ------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------
+
+    def estado(self):
+        segundos = (self.finalizada_en or time.time()) - self.iniciada_en if self.iniciada_en else 0
+        return {
+            'id': self.id,
+            'aula': self.aula,
+            'fuente': self.fuente,
+            'perfil': self.nombre_perfil,
+            'activa': self.activa,
+            'error': self.error,
+            'fps_pedidos': self.fps_pedidos,
+            'fps_asignados': round(self.fps_asignados, 2) if self.fps_asignados is not None else None,
+            'fps_captura': round(self.frames_leidos / segundos, 2) if segundos else 0.0,
+            'fps_analisis': round(self.frames_analizados / segundos, 2) if segundos else 0.0,
+            'frames_leidos': self.frames_leidos,
+            'frames_analizados': self.frames_analizados,
+            'analisis_omitidos': self.analisis_omitidos,
+            'latencia_analisis_ms': round(self.segundos_analisis * 1000 / self.frames_analizados, 1)
+            if self.frames_analizados else 0.0,
+            'persona': self.persona,
+        }
+
+
+class GestorCamaras:
+    """
+    Conjunto de cámaras con presupuesto de CPU compartido
+    """
+
+    def __init__(self, procesar_frame, ruta_configuracion=None, configuracion=None):
+        """
+        Args:
+            procesar_frame: función (camara, frame, analizar) -> frame a mostrar
+            ruta_configuracion: JSON de cámaras (por defecto config/camaras.json)
+            configuracion: dict con la configuración (en lugar del archivo)
+        """
+        if configuracion is None:
+            ruta = ruta_configuracion or RUTA_CONFIGURACION
+            if os.path.exists(ruta):
+                with open(ruta, encoding='utf-8') as f:
+                    configuracion = json.load(f)
+            else:
+                configuracion = CONFIGURACION_POR_DEFECTO
+
+        if not configuracion.get('camaras'):
+            raise ValueError("La configuración de cámaras no tiene ninguna cámara")
+
+        self.procesar_frame = procesar_frame
+        self.bus = None  # BusFrames del motor (main.py --motor); None = solo frame_jpeg en memoria
+        self.fps_totales = float(configuracion.get('fps_totales', CONFIGURACION_POR_DEFECTO['fps_totales']))
+        self.analisis_simultaneos = max(1, int(configuracion.get('analisis_simultaneos', 1)))
+        self.turnos = threading.BoundedSemaphore(self.analisis_simultaneos)
+
+        self.camaras = {}
+        for datos in configuracion['camaras']:
+            camara = Camara(datos, self)
+            if camara.id in self.camaras:
+                raise ValueError(f"Cámara duplicada: {camara.id}")
+            self.camaras[camara.id] = camara
+
+        self.principal = next(iter(self.camaras.values()))
+        self._repartir_presupuesto()
+
+    def _repartir_presupuesto(self):
+        """Reduce los FPS de análisis de cada cámara en proporción si superan fps_totales"""
+        limitadas = [c for c in self.camaras.values() if c.fps_pedidos is not None]
+        pedidos = sum(c.fps_pedidos for c in limitadas)
+        factor = min(1.0, self.fps_totales / pedidos) if pedidos > 0 else 0.0
+        for camara in limitadas:
+            camara.fps_asignados = camara.fps_pedidos * factor
+
+    def obtener(self, id_camara=None):
+        """Cámara por id (la principal si id_camara es None; None si no existe)"""
+        if id_camara is None:
+            return self.principal
+        return self.camaras.get(str(id_camara))
+
+    def iniciar(self):
+        """Inicia los hilos de las cámaras que no estén corriendo"""
+        for camara in self.camaras.values():
+            camara.iniciar()
+
+    def detener(self):
+        for camara in self.camaras.values():
+            camara.detener()
+
+    def esperar(self, espera=None):
+        for camara in self.camaras.values():
+            camara.esperar(espera)
+
+    def activa(self):
+        return any(c.activa for c in self.camaras.values())
+
+    def estado(self):
+        return {
+            'fps_totales': self.fps_totales,
+            'analisis_simultaneos': self.analisis_simultaneos,
+            'camaras': [c.estado() for c in self.camaras.values()],
+        }
@@ -0,0 +1,133 @@
+"""
+Cierre de sesiones académicas y registro de ausencias
+Finaliza las sesiones cuyo horario ya terminó y registra como 'ausente' a los
+inscritos del curso que no marcaron asistencia (funciones cerrar_sesiones y
+marcar_ausencias de src/database/cierre_sesiones.sql).
+
+Todas las sesiones que cierran en la misma ejecución comparten un solo
+INSERT ... SELECT, y volver a ejecutarlo no duplica ausencias.
+
+Uso:
+    python src/utils/cierre_sesiones.py                 # una pasada (cron cada minuto)
+    python src/utils/cierre_sesiones.py --cada 60       # bucle, una pasada por minuto
+    python src/utils/cierre_sesiones.py --pendientes    # ausencias de sesiones ya finalizadas
+
+Ejemplo de cron:
+    * * * * * cd /ruta/proyecto && python src/utils/cierre_sesiones.py
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+import psycopg2
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+
+def cerrar_sesiones(hasta=None):
+    """
+    Cierra las sesiones vencidas y marca sus ausencias en una transacción
+
+    Args:
+        hasta: Momento de referencia (por defecto ahora)
+
+    Returns:
+        tuple: (sesiones_cerradas, ausencias_registradas)
+    """
+    if hasta is None:
+        hasta = datetime.now()
+
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT sesiones_cerradas, ausencias FROM cerrar_sesiones(%s)", (hasta,))
+        resultado = cursor.fetchone()
+        conn.commit()
+        return resultado
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def marcar_ausencias_pendientes():
+    """
+    Registra ausencias en todas las sesiones ya finalizadas (datos anteriores
+    a este script). Es idempotente: los estudiantes con registro se omiten.
+
+    Returns:
+        tuple: (sesiones_revisadas, ausencias_registradas)
+    """
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT COALESCE(array_agg(id_sesion), '{}')
+            FROM sesiones_academicas
+            WHERE estado = 'finalizada'
+        """)
+        sesiones = cursor.fetchone()[0]
+        cursor.execute("SELECT marcar_ausencias(%s)", (sesiones,))
+        ausencias = cursor.fetchone()[0]
+        conn.commit()
+        return len(sesiones), ausencias
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def ejecutar_pasada():
+    sesiones, ausencias = cerrar_sesiones()
+    if sesiones:
+        print(f"✅ {datetime.now():%Y-%m-%d %H:%M} - {sesiones} sesiones cerradas, {ausencias} ausencias registradas")
+    return sesiones, ausencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cerrar sesiones vencidas y registrar ausencias')
+    parser.add_argument('--cada', type=int, help='Repetir cada N segundos')
+    parser.add_argument('--pendientes', action='store_true',
+                        help='Registrar ausencias de las sesiones ya finalizadas')
+    args = parser.parse_args()
+
+    try:
+        if args.pendientes:
+            sesiones, ausencias = marcar_ausencias_pendientes()
+            print(f"✅ {sesiones} sesiones finalizadas revisadas, {ausencias} ausencias registradas")
+            return
+
+        if not args.cada:
+            ejecutar_pasada()
+            return
+
+        print(f"🔄 Cerrando sesiones vencidas cada {args.cada}s (Ctrl+C para salir)")
+        while True:
+            try:
+                ejecutar_pasada()
+            except psycopg2.Error as e:
+                print(f"❌ Error cerrando sesiones: {e}")
+            time.sleep(args.cada)
+
+    except KeyboardInterrupt:
+        print("\n👋 Cierre de sesiones detenido")
+    except psycopg2.Error as e:
+        print(f"❌ Error cerrando sesiones: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Compactación de plantillas faciales por estudiante
+Con reinscripciones, ráfagas y registro masivo cada estudiante acumula
+embeddings, y la galería (y el costo de cada búsqueda) crece con ellos. Por
+cada estudiante se calculan sus distancias internas (una matriz n x n
+vectorizada) y:
+
+- Atípicos: embeddings lejos del medoide del estudiante (más allá de
+  mediana + 3 MAD y de DISTANCIA_ATIPICO_MINIMA): otra cara, detección mala.
+- Plantillas: 1 a MAX_PLANTILLAS medoides elegidos de forma voraz; se agrega
+  otro solo si reduce la distancia media al más cercano en MEJORA_MINIMA.
+- Redundantes: el resto (bien representados por alguna plantilla).
+
+Solo las plantillas quedan activas en embeddings_faciales; nada se borra
+(rol_compactacion guarda el rol, migración 13). Es incremental: solo se
+recompactan los estudiantes cuya firma (md5 de sus id_embedding) cambió desde
+la última compactación (tabla compactacion_plantillas).
+
+Uso:
+    python src/utils/compactar_plantillas.py                 # solo estudiantes con cambios
+    python src/utils/compactar_plantillas.py --todos --simular
+    python src/utils/compactar_plantillas.py --evaluar 2000  # precisión antes/después
+    python src/utils/compactar_plantillas.py --sinteticos 5000 --evaluar 2000
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+
+try:
+    from src.utils.galeria_rostros import PLANTILLAS_POR_ESTUDIANTE
+    from src.utils.procesamiento_rostros import TOLERANCIA
+except ImportError:
+    # Ejecutado como script desde src/utils
+    from galeria_rostros import PLANTILLAS_POR_ESTUDIANTE
+    from procesamiento_rostros import TOLERANCIA
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+MAX_PLANTILLAS = PLANTILLAS_POR_ESTUDIANTE  # La galería carga como máximo estas por estudiante
+MEJORA_MINIMA = 0.02  # Reducción de la distancia media para justificar otra plantilla
+DISTANCIA_ATIPICO_MINIMA = 0.45  # Nunca es atípico un embedding a menos de esto del medoide
+MINIMO_PARA_ATIPICOS = 3  # Con menos embeddings no hay con qué comparar
+TAMANO_LOTE = 500  # Estudiantes por transacción
+BLOQUE_EVALUACION = 64  # Consultas por bloque de distancias en la evaluación
+
+
+# ------------------------------------------------------------
+# Compactación (un estudiante)
+# ------------------------------------------------------------
+
+def _distancias_internas(matriz):
+    normas = np.einsum('ij,ij->i', matriz, matriz)
+    return np.sqrt(np.maximum(normas[:, None] + normas[None, :] - 2 * matriz @ matriz.T, 0))
+
+
+def compactar_estudiante(matriz, max_plantillas=MAX_PLANTILLAS, mejora_minima=MEJORA_MINIMA):
+    """
+    Rol de cada embedding de un estudiante
+
+    Args:
+        matriz: Embeddings del estudiante (n x 128)
+
+    Returns:
+        np.ndarray: 'plantilla', 'redundante' o 'atipico' por fila
+    """
+    total = len(matriz)
+    roles = np.full(total, 'redundante', dtype=object)
+    if total == 0:
+        return roles
+
+    distancias = _distancias_internas(np.asarray(matriz, dtype=np.float64))
+
+    atipicos = np.zeros(total, dtype=bool)
+    if total >= MINIMO_PARA_ATIPICOS:
+        al_medoide = distancias[np.argmin(distancias.sum(axis=1))]
+        mediana = np.median(al_medoide)
+        mad = np.median(np.abs(al_medoide - mediana)) * 1.4826
+        atipicos = al_medoide > max(mediana + 3 * mad, DISTANCIA_ATIPICO_MINIMA)
+        roles[atipicos] = 'atipico'
+
+    validos = np.flatnonzero(~atipicos)
+    internas = distancias[np.ix_(validos, validos)]
+
+    # k-medoides voraz: el primero minimiza la distancia total; cada siguiente,
+    # la distancia media de todos a su plantilla más cercana
+    elegidos = [int(np.argmin(internas.sum(axis=1)))]
+    minimas = internas[elegidos[0]]
+    while len(elegidos) < min(max_plantillas, len(validos)):
+        costos = np.minimum(internas, minimas[None, :]).mean(axis=1)
+        candidato = int(np.argmin(costos))
+        if minimas.mean() - costos[candidato] < mejora_minima:
+            break
+        elegidos.append(candidato)
+        minimas = np.minimum(minimas, internas[candidato])
+
+    roles[validos[elegidos]] = 'plantilla'
+    return roles
+
+
+# ------------------------------------------------------------
+# Base de datos
+# ------------------------------------------------------------
+
+# Embeddings que participan en la compactación: los activos y los que desactivó
+# una compactación anterior (los desactivados a mano quedan fuera)
+_CANDIDATOS = """
+    u.rol = 'estudiante' AND u.estado = 'activo'
+    AND (e.activo = true OR e.rol_compactacion IS NOT NULL)
+"""
+
+
+def estudiantes_pendientes(cursor, todos=False):
+    """
+    Estudiantes cuyos embeddings cambiaron desde la última compactación
+
+    Returns:
+        dict: id_usuario -> firma actual
+    """
+    cursor.execute(f"""
+        SELECT e.id_usuario, md5(string_agg(e.id_embedding::text, ',' ORDER BY e.id_embedding)), c.firma
+        FROM embeddings_faciales e
+        JOIN usuarios u ON u.id_usuario = e.id_usuario
+        LEFT JOIN compactacion_plantillas c ON c.id_usuario = e.id_usuario
+        WHERE {_CANDIDATOS}
+        GROUP BY e.id_usuario, c.firma
+    """)
+    return {fila[0]: fila[1] for fila in cursor.fetchall() if todos or fila[1] != fila[2]}
+
+
+def cargar_embeddings(cursor, ids_usuario):
+    """
+    Embeddings candidatos de varios estudiantes
+
+    Returns:
+        dict: id_usuario -> (id_embedding (n,), matriz (n x 128))
+    """
+    cursor.execute(f"""
+        SELECT e.id_usuario, e.id_embedding, e.embedding_vector
+        FROM embeddings_faciales e
+        JOIN usuarios u ON u.id_usuario = e.id_usuario
+        WHERE {_CANDIDATOS}
+        AND e.id_usuario = ANY(%s)
+        ORDER BY e.id_usuario, e.id_embedding
+    """, (list(ids_usuario),))
+
+    por_estudiante = {}
+    for id_usuario, id_embedding, vector in cursor.fetchall():
+        filas = por_estudiante.setdefault(id_usuario, ([], []))
+        filas[0].append(id_embedding)
+        filas[1].append(np.frombuffer(vector, dtype=np.float64))
+    return {
+        id_usuario: (np.array(ids_embedding, dtype=np.int64), np.stack(vectores))
+        for id_usuario, (ids_embedding, vectores) in por_estudiante.items()
+    }
+
+
+def escribir_lote(conn, resultados):
+    """
+    Una transacción por lote: roles y activo de cada embedding y la firma de
+    cada estudiante
+
+    Args:
+        resultados: Lista de (id_usuario, firma, id_embedding (n,), roles (n,))
+    """
+    cursor = conn.cursor()
+    try:
+        ids_embedding = [int(i) for _, _, ids, _ in resultados for i in ids]
+        roles = [str(r) for _, _, _, rs in resultados for r in rs]
+        cursor.execute("""
+            UPDATE embeddings_faciales e
+            SET activo = (v.rol = 'plantilla'), rol_compactacion = v.rol, actualizado_en = CURRENT_TIMESTAMP
+            FROM unnest(%s::int[], %s::text[]) AS v(id_embedding, rol)
+            WHERE e.id_embedding = v.id_embedding
+        """, (ids_embedding, roles))
+
+        execute_values(cursor, """
+            INSERT INTO compactacion_plantillas (id_usuario, firma, embeddings, plantillas, atipicos)
+            VALUES %s
+            ON CONFLICT (id_usuario) DO UPDATE SET
+                firma = EXCLUDED.firma, embeddings = EXCLUDED.embeddings, plantillas = EXCLUDED.plantillas,
+                atipicos = EXCLUDED.atipicos, compactado_en = CURRENT_TIMESTAMP
+        """, [
+            (id_usuario, firma, len(rs), int(np.sum(rs == 'plantilla')), int(np.sum(rs == 'atipico')))
+            for id_usuario, firma, _, rs in resultados
+        ], page_size=TAMANO_LOTE)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+# ------------------------------------------------------------
+# Evaluación: precisión y tamaño antes / después
+# ------------------------------------------------------------
+
+def evaluar(matriz, ids, plantillas, atipicos, muestra=2000, tolerancia=TOLERANCIA, semilla=0):
+    """
+    Precisión de identificación con todos los embeddings vs. solo plantillas
+
+    Cada consulta es un embedding redundante (ni plantilla ni atípico, así que
+    no está en la galería compactada), buscado sin su propia fila
+    (leave-one-out): acierta si el más cercano es del mismo estudiante y está
+    dentro de la tolerancia.
+
+    Returns:
+        dict: consultas, y por galería ('todos', 'plantillas'): filas, precision, ms_por_consulta
+    """
+    rng = np.random.default_rng(semilla)
+    posibles = np.flatnonzero(~plantillas & ~atipicos)
+    consultas = rng.choice(posibles, size=min(muestra, len(posibles)), replace=False)
+    matriz = matriz.astype(np.float32)
+    normas = np.einsum('ij,ij->i', matriz, matriz)
+
+    resultado = {'consultas': len(consultas)}
+    for nombre, filas in (('todos', np.arange(len(matriz))), ('plantillas', np.flatnonzero(plantillas))):
+        galeria, ids_galeria, normas_galeria = matriz[filas], ids[filas], normas[filas]
+        aciertos = 0
+        inicio = time.perf_counter()
+        for desde in range(0, len(consultas), BLOQUE_EVALUACION):
+            bloque = consultas[desde:desde + BLOQUE_EVALUACION]
+            cuadrados = normas[bloque, None] + normas_galeria[None, :] - 2 * matriz[bloque] @ galeria.T
+            # Sin la propia fila de la consulta
+            cuadrados[bloque[:, None] == filas[None, :]] = np.inf
+            mas_cercano = np.argmin(cuadrados, axis=1)
+            distancias = np.sqrt(np.maximum(cuadrados[np.arange(len(bloque)), mas_cercano], 0))
+            aciertos += int(np.count_nonzero((ids_galeria[mas_cercano] == ids[bloque]) & (distancias <= tolerancia)))
+        segundos = time.perf_counter() - inicio
+        resultado[nombre] = {
+            'filas': len(filas),
+            'precision': aciertos / len(consultas) if len(consultas) else 0.0,
+            'ms_por_consulta': segundos * 1000 / len(consultas) if len(consultas) else 0.0,
+        }
+    return resultado
+
+
+def estudiantes_sinteticos(cantidad, semilla=0):
+    """
+    Embeddings aleatorios para probar sin BD: 2 a 12 por estudiante alrededor
+    de su centro y, en uno de cada diez, un atípico (otra cara)
+
+    Returns:
+        dict: id_usuario -> (id_embedding (n,), matriz (n x 128))
+    """
+    rng = np.random.default_rng(semilla)
+    estudiantes = {}
+    siguiente = 1
+    for id_usuario in range(1, cantidad + 1):
+        centro = rng.normal(0, 0.09, 128)
+        matriz = centro + rng.normal(0, 0.012, (int(rng.integers(2, 13)), 128))
+        if rng.random() < 0.1:
+            matriz = np.vstack([matriz, rng.normal(0, 0.09, 128)])
+        estudiantes[id_usuario] = (np.arange(siguiente, siguiente + len(matriz)), matriz)
+        siguiente += len(matriz)
+    return estudiantes
+
+
+# ------------------------------------------------------------
+# Proceso principal
+# ------------------------------------------------------------
+
+def compactar_galeria(todos=False, simular=False, evaluacion=0, sinteticos=0, tamano_lote=TAMANO_LOTE):
+    """
+    Compacta a los estudiantes pendientes (o a todos) por lotes
+
+    Returns:
+        dict: estudiantes, embeddings, plantillas, atipicos, segundos y, con
+              evaluacion > 0, el resultado de evaluar()
+    """
+    conn = None if sinteticos else psycopg2.connect(**DATABASE_CONFIG)
+    resumen = {'estudiantes': 0, 'embeddings': 0, 'plantillas': 0, 'atipicos': 0}
+    # Para la evaluación: filas de todos los estudiantes compactados
+    acumulado = ([], [], [])
+    inicio = time.perf_counter()
+    try:
+        if sinteticos:
+            estudiantes = estudiantes_sinteticos(sinteticos)
+            pendientes = {id_usuario: None for id_usuario in estudiantes}
+        else:
+            cursor = conn.cursor()
+            pendientes = estudiantes_pendientes(cursor, todos or evaluacion > 0)
+            cursor.close()
+        print(f"👥 {len(pendientes)} estudiantes por compactar")
+
+        ids_pendientes = sorted(pendientes)
+        for desde in range(0, len(ids_pendientes), tamano_lote):
+            lote = ids_pendientes[desde:desde + tamano_lote]
+            if sinteticos:
+                embeddings = {id_usuario: estudiantes[id_usuario] for id_usuario in lote}
+            else:
+                cursor = conn.cursor()
+                embeddings = cargar_embeddings(cursor, lote)
+                cursor.close()
+
+            resultados = []
+            for id_usuario, (ids_embedding, matriz) in embeddings.items():
+                roles = compactar_estudiante(matriz)
+                resultados.append((id_usuario, pendientes[id_usuario], ids_embedding, roles))
+                resumen['estudiantes'] += 1
+                resumen['embeddings'] += len(roles)
+                resumen['plantillas'] += int(np.sum(roles == 'plantilla'))
+                resumen['atipicos'] += int(np.sum(roles == 'atipico'))
+                if evaluacion:
+                    acumulado[0].append(matriz)
+                    acumulado[1].append(np.full(len(roles), id_usuario))
+                    acumulado[2].append(roles)
+
+            if conn and not simular and resultados:
+                escribir_lote(conn, resultados)
+            print(f"   📈 {min(desde + tamano_lote, len(ids_pendientes))}/{len(ids_pendientes)} estudiantes")
+    finally:
+        if conn:
+            conn.close()
+
+    resumen['segundos'] = time.perf_counter() - inicio
+    if evaluacion and acumulado[0]:
+        roles = np.concatenate(acumulado[2])
+        resumen['evaluacion'] = evaluar(
+            np.vstack(acumulado[0]), np.concatenate(acumulado[1]), roles == 'plantilla', roles == 'atipico',
+            evaluacion)
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compactación de plantillas faciales por estudiante')
+    parser.add_argument('--todos', action='store_true', help='Recompactar a todos, no solo a los que cambiaron')
+    parser.add_argument('--simular', action='store_true', help='Calcular sin escribir en la BD')
+    parser.add_argument('--evaluar', type=int, default=0, metavar='N',
+                        help='Medir precisión antes/después con N consultas (implica --todos)')
+    parser.add_argument('--sinteticos', type=int, default=0, metavar='N',
+                        help='Estudiantes aleatorios en lugar de la BD (no escribe)')
+    args = parser.parse_args()
+
+    print("🧩 COMPACTACIÓN DE PLANTILLAS FACIALES")
+    print("="*60)
+
+    try:
+        resumen = compactar_galeria(args.todos, args.simular, args.evaluar, args.sinteticos)
+    except psycopg2.Error as e:
+        print(f"❌ Error de base de datos: {e}")
+        sys.exit(1)
+
+    print("\n📊 RESUMEN")
+    print("-"*60)
+    if resumen['estudiantes'] == 0:
+        print("✅ No hay estudiantes con embeddings nuevos")
+        return
+    reduccion = 1 - resumen['plantillas'] / resumen['embeddings']
+    print(f"👥 Estudiantes: {resumen['estudiantes']}")
+    print(f"🧩 Embeddings: {resumen['embeddings']} -> {resumen['plantillas']} plantillas "
+          f"(-{reduccion:.0%}, {resumen['plantillas'] / resumen['estudiantes']:.2f} por estudiante)")
+    print(f"⚠️ Atípicos descartados: {resumen['atipicos']}")
+    print(f"⏱️ {resumen['segundos']:.1f}s")
+
+    if 'evaluacion' in resumen:
+        evaluacion = resumen['evaluacion']
+        print(f"\n🎯 Precisión con {evaluacion['consultas']} consultas (leave-one-out)")
+        for nombre in ('todos', 'plantillas'):
+            datos = evaluacion[nombre]
+            print(f"   {nombre:<11} {datos['filas']:>8} filas   precisión {datos['precision']:.2%}   "
+                  f"{datos['ms_por_consulta']:.3f} ms/consulta")
+
+    if args.simular or args.sinteticos:
+        print("ℹ️ Simulación: no se escribió nada")
+    else:
+        print("🔄 Recargue los rostros en el servidor: POST /system/reload_faces")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,12 @@ from datetime import datetime, date
 import sys
 import os
 
+try:
+    from src.utils.calendario_academico import obtener_calendario
+except ImportError:
+    # Ejecutado como script desde src/utils
+    from calendario_academico import obtener_calendario
+
 # Configuración de la base de datos
 DATABASE_CONFIG = {
     'host': 'localhost',
@@ -112,30 +118,9 @@ def crear_sesiones_personalizadas():
     cursor = conn.cursor()
     
     try:
-        # Detectar período académico automáticamente basado en la fecha
-        # (No necesitamos importar el gestor, haremos el cálculo directamente aquí)
-        
-        # Determinar semestre y corte basado en la fecha elegida
-        fecha_para_calculo = info_sesion['fecha']
-        mes = fecha_para_calculo.month
-        año = fecha_para_calculo.year
-        
-        if mes in [1, 2, 3, 4, 5, 6]:
-            semestre = f"{año}-1"
-            if mes in [1, 2]:
-                corte = 1
-            elif mes in [3, 4]:
-                corte = 2
-            else:  # mayo, junio
-                corte = 3
-        else:  # julio a diciembre
-            semestre = f"{año}-2"
-            if mes in [7, 8]:
-                corte = 1
-            elif mes in [9, 10]:
-                corte = 2
-            else:  # noviembre, diciembre
-                corte = 3
+        # Detectar período académico automáticamente según el calendario académico
+        periodo = obtener_calendario().resolver(info_sesion['fecha'])
+        año, semestre, corte = periodo.año, periodo.semestre, periodo.corte
         
         print(f"\n🎯 Período detectado: {año}, {semestre}, Corte {corte}")
         print(f"📅 Fecha: {info_sesion['fecha']}")
@@ -152,15 +137,6 @@ def crear_sesiones_personalizadas():
         
         print(f"\n🔄 Creando sesión académica...")
         
-        # Buscar siguiente número de sesión
-        cursor.execute("""
-            SELECT COALESCE(MAX(numero_sesion), 0) + 1 
-            FROM sesiones_academicas 
-            WHERE año = %s AND semestre = %s AND corte = %s
-        """, (año, semestre, corte))
-        
-        numero_sesion = cursor.fetchone()[0]
-        
         # Calcular duración en horas
         inicio = datetime.strptime(info_sesion['hora_inicio'], '%H:%M:%S').time()
         fin = datetime.strptime(info_sesion['hora_fin'], '%H:%M:%S').time()
@@ -178,19 +154,16 @@ def crear_sesiones_personalizadas():
         # Estado inicial
         estado = 'activa' if info_sesion['asistencia_habilitada'] else 'programada'
         
+        # numero_sesion lo asigna el trigger asignar_numero_sesion desde contadores_sesion
+        # (sin MAX(): dos creaciones simultáneas nunca reciben el mismo número)
         sesion_sql = """
         INSERT INTO sesiones_academicas (
-            año, semestre, corte, id_curso, numero_sesion, nombre_sesion,
+            año, semestre, corte, id_curso, nombre_sesion,
             descripcion, fecha_programada, hora_inicio, hora_fin, dia_semana,
             aula, estado, asistencia_habilitada, tolerancia_minutos,
             duracion_horas, tipo_clase, creada_en
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (año, semestre, corte, id_curso, numero_sesion) 
-        DO UPDATE SET 
-            asistencia_habilitada = EXCLUDED.asistencia_habilitada,
-            estado = EXCLUDED.estado,
-            actualizada_en = CURRENT_TIMESTAMP
-        RETURNING id_sesion;
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING id_sesion, numero_sesion;
         """
         
         cursor.execute(sesion_sql, (
@@ -198,7 +171,6 @@ def crear_sesiones_personalizadas():
             semestre,                              # semestre  
             corte,                                 # corte
             1,                                     # id_curso
-            numero_sesion,                         # numero_sesion
             info_sesion['nombre_sesion'],          # nombre_sesion
             descripcion,                           # descripcion
             info_sesion['fecha'],                  # fecha_programada
@@ -214,7 +186,7 @@ def crear_sesiones_personalizadas():
             datetime.now()                         # creada_en
         ))
         
-        id_sesion = cursor.fetchone()[0]
+        id_sesion, numero_sesion = cursor.fetchone()
         print(f"✅ Sesión creada exitosamente: ID {id_sesion}")
         print(f"   📅 {info_sesion['fecha']}")
         print(f"   ⏰ {info_sesion['hora_inicio'][:5]} - {info_sesion['hora_fin'][:5]} ({duracion_horas:.1f} horas)")
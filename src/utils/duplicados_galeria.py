@@ -0,0 +1,162 @@
+"""
+Búsqueda de identidades duplicadas en toda la galería
+Compara las plantillas de cada estudiante activo con las de todos los demás y
+reporta los pares de estudiantes a menos de UMBRAL_DUPLICADO: normalmente la
+misma persona registrada dos veces (otro correo, nombre escrito distinto,
+registro masivo y manual). Los pares se agrupan en componentes (A~B y B~C => {A, B, C}).
+
+Las distancias se calculan por bloques con GaleriaRostros.pares_cercanos: la
+memoria es la de un bloque (16 MB con 2048) y no la matriz N x N, así que
+escala a 100k estudiantes (5e9 pares, segundos con BLAS multihilo).
+
+Uso:
+    python src/utils/duplicados_galeria.py
+    python src/utils/duplicados_galeria.py --umbral 0.35 --salida duplicados.csv
+    python src/utils/duplicados_galeria.py --sinteticos 100000
+"""
+
+import argparse
+import csv
+import sys
+import time
+
+import numpy as np
+import psycopg2
+
+try:
+    from src.utils.galeria_rostros import GaleriaRostros
+    from src.utils.procesamiento_rostros import UMBRAL_DUPLICADO
+except ImportError:
+    # Ejecutado como script desde src/utils
+    from galeria_rostros import GaleriaRostros
+    from procesamiento_rostros import UMBRAL_DUPLICADO
+
+TAMANO_BLOQUE = 2048
+
+
+def buscar_pares(galeria, umbral=UMBRAL_DUPLICADO, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Pares de estudiantes distintos a menos de `umbral` (la menor distancia
+    entre sus plantillas)
+
+    Returns:
+        dict: pares (dicts id_a, nombre_a, id_b, nombre_b, distancia, ordenados
+              por distancia), comparaciones, segundos
+    """
+    inicio = time.perf_counter()
+    por_estudiantes = {}
+    for a, b, distancia in galeria.pares_cercanos(umbral, tamano_bloque):
+        if galeria.ids[a] > galeria.ids[b]:
+            a, b = b, a
+        clave = (int(galeria.ids[a]), int(galeria.ids[b]))
+        if clave not in por_estudiantes or distancia < por_estudiantes[clave]['distancia']:
+            por_estudiantes[clave] = {
+                'id_a': clave[0], 'nombre_a': galeria.nombres[a],
+                'id_b': clave[1], 'nombre_b': galeria.nombres[b],
+                'distancia': round(distancia, 4),
+            }
+    pares = sorted(por_estudiantes.values(), key=lambda p: p['distancia'])
+    total = len(galeria.matriz)
+    return {
+        'pares': pares,
+        'comparaciones': total * (total - 1) // 2,
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+def agrupar(pares):
+    """
+    Componentes conexas de los pares (union-find)
+
+    Returns:
+        list: Listas de id_usuario con 2 o más estudiantes, de la más grande a la más pequeña
+    """
+    padres = {}
+
+    def raiz(x):
+        padres.setdefault(x, x)
+        while padres[x] != x:
+            padres[x] = padres[padres[x]]
+            x = padres[x]
+        return x
+
+    for par in pares:
+        a, b = raiz(par['id_a']), raiz(par['id_b'])
+        if a != b:
+            padres[max(a, b)] = min(a, b)
+
+    grupos = {}
+    for x in list(padres):
+        grupos.setdefault(raiz(x), []).append(x)
+    return sorted((sorted(g) for g in grupos.values()), key=len, reverse=True)
+
+
+def galeria_sintetica(cantidad, duplicados, semilla=0):
+    """
+    Galería aleatoria para medir el tiempo sin BD, con `duplicados` estudiantes
+    registrados dos veces (el segundo registro es el primero con ruido)
+    """
+    rng = np.random.default_rng(semilla)
+    # Escala parecida a la de face_recognition: personas distintas a ~1.4, la misma a ~0.3
+    matriz = rng.normal(0, 0.09, (cantidad, 128))
+    copias = rng.choice(cantidad, size=(duplicados, 2), replace=False) if duplicados else np.zeros((0, 2), int)
+    matriz[copias[:, 1]] = matriz[copias[:, 0]] + rng.normal(0, 0.02, (duplicados, 128))
+
+    galeria = GaleriaRostros()
+    galeria.cargar(matriz, [f"Estudiante {i}" for i in range(cantidad)], list(range(1, cantidad + 1)))
+    return galeria
+
+
+def guardar_csv(pares, ruta):
+    with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+        escritor = csv.DictWriter(archivo, fieldnames=['id_a', 'nombre_a', 'id_b', 'nombre_b', 'distancia'])
+        escritor.writeheader()
+        escritor.writerows(pares)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Búsqueda de identidades duplicadas en la galería')
+    parser.add_argument('--umbral', type=float, default=UMBRAL_DUPLICADO, help='Distancia máxima entre duplicados')
+    parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help='Filas por bloque de distancias')
+    parser.add_argument('--salida', help='CSV con todos los pares encontrados')
+    parser.add_argument('--mostrar', type=int, default=20, help='Pares a mostrar en pantalla')
+    parser.add_argument('--sinteticos', type=int, help='Usar una galería aleatoria de N estudiantes (sin BD)')
+    parser.add_argument('--duplicados', type=int, default=10, help='Duplicados sembrados en la galería sintética')
+    args = parser.parse_args()
+
+    print("🔍 IDENTIDADES DUPLICADAS EN LA GALERÍA")
+    print("="*60)
+
+    if args.sinteticos:
+        galeria = galeria_sintetica(args.sinteticos, min(args.duplicados, args.sinteticos // 2))
+        print(f"🧪 Galería sintética: {len(galeria)} estudiantes, {args.duplicados} duplicados sembrados")
+    else:
+        galeria = GaleriaRostros()
+        try:
+            galeria.cargar_desde_bd()
+        except psycopg2.Error as e:
+            print(f"❌ Error de base de datos: {e}")
+            sys.exit(1)
+        print(f"👥 {len(galeria)} estudiantes activos con {len(galeria.matriz)} plantillas")
+
+    resultado = buscar_pares(galeria, args.umbral, args.bloque)
+    pares = resultado['pares']
+    grupos = agrupar(pares)
+
+    print(f"⏱️ {resultado['comparaciones']:,} comparaciones en {resultado['segundos']:.2f}s "
+          f"({resultado['comparaciones'] / max(resultado['segundos'], 1e-9) / 1e6:.0f} M/s)")
+    print(f"⚠️ {len(pares)} pares a menos de {args.umbral} en {len(grupos)} grupos")
+
+    for par in pares[:args.mostrar]:
+        print(f"  {par['distancia']:.3f}  {par['nombre_a']} (id {par['id_a']})  ~  "
+              f"{par['nombre_b']} (id {par['id_b']})")
+    if len(pares) > args.mostrar:
+        print(f"  ... y {len(pares) - args.mostrar} más")
+
+    if args.salida:
+        guardar_csv(pares, args.salida)
+        print(f"💾 Pares guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
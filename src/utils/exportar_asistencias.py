@@ -0,0 +1,273 @@
+"""
+Exportación en streaming del historial de asistencias
+Lee asistencias_academicas (con usuarios, sesiones y cursos) mediante un
+cursor de servidor (named cursor) de PostgreSQL por lotes y escribe CSV o
+bloques .npy de NumPy, con memoria constante sin importar el número de filas.
+
+Formatos:
+    csv  -> texto con encabezado, una fila por asistencia
+    npy  -> secuencia de arreglos estructurados .npy concatenados (uno por lote);
+            el primer bloque está vacío y solo fija el dtype. Leer con leer_npy()
+
+Uso:
+    python src/utils/exportar_asistencias.py --formato csv --año 2025 --semestre 2025-2 -o asistencias.csv
+    python src/utils/exportar_asistencias.py --formato npy --curso 3 -o curso3.npy
+"""
+
+import argparse
+import csv
+import io
+import sys
+import uuid
+from datetime import datetime
+
+import numpy as np
+import psycopg2
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+TAMANO_LOTE = 10000
+
+COLUMNAS = [
+    'id_asistencia', 'id_sesion', 'id_estudiante', 'estudiante', 'correo',
+    'id_curso', 'año', 'semestre', 'corte', 'nombre_sesion', 'fecha_programada',
+    'fecha_registro', 'estado', 'minutos_tardanza', 'metodo_registro', 'confidence_score'
+]
+
+# dtype del formato npy (cadenas UTF-8 de ancho fijo, truncadas si exceden)
+DTYPE_NPY = np.dtype([
+    ('id_asistencia', '<i4'),
+    ('id_sesion', '<i4'),
+    ('id_estudiante', '<i4'),
+    ('estudiante', 'S201'),
+    ('correo', 'S255'),
+    ('id_curso', '<i4'),
+    ('año', '<i2'),
+    ('semestre', 'S20'),
+    ('corte', 'i1'),
+    ('nombre_sesion', 'S200'),
+    ('fecha_programada', '<M8[D]'),
+    ('fecha_registro', '<M8[s]'),
+    ('estado', 'S20'),
+    ('minutos_tardanza', '<i4'),
+    ('metodo_registro', 'S50'),
+    ('confidence_score', '<f4'),
+])
+
+# Filtros admitidos: nombre -> condición SQL
+FILTROS = {
+    'año': "sa.año = %s",
+    'semestre': "sa.semestre = %s",
+    'corte': "sa.corte = %s",
+    'id_curso': "sa.id_curso = %s",
+    'id_estudiante': "aa.id_estudiante = %s",
+    'desde': "aa.fecha_registro >= %s",
+    'hasta': "aa.fecha_registro < %s",
+}
+
+
+def leer_fecha(texto):
+    """
+    Args:
+        texto: Fecha 'YYYY-MM-DD' de los filtros desde/hasta
+
+    Raises:
+        ValueError: Si no es una fecha válida
+    """
+    return datetime.strptime(texto, '%Y-%m-%d').date()
+
+
+def construir_consulta(filtros):
+    """Devuelve (sql, parámetros) para los filtros indicados (los valores None se ignoran)"""
+    condiciones = []
+    parametros = []
+    for nombre, condicion in FILTROS.items():
+        valor = filtros.get(nombre)
+        if valor is not None:
+            condiciones.append(condicion)
+            parametros.append(valor)
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    sql = f"""
+        SELECT
+            aa.id_asistencia,
+            aa.id_sesion,
+            aa.id_estudiante,
+            u.nombre || ' ' || u.apellido,
+            u.correo,
+            sa.id_curso,
+            sa.año,
+            sa.semestre,
+            sa.corte,
+            sa.nombre_sesion,
+            sa.fecha_programada,
+            aa.fecha_registro,
+            aa.estado,
+            aa.minutos_tardanza,
+            aa.metodo_registro,
+            aa.confidence_score
+        FROM asistencias_academicas aa
+        JOIN usuarios u ON aa.id_estudiante = u.id_usuario
+        JOIN sesiones_academicas sa ON aa.id_sesion = sa.id_sesion
+        {where}
+        ORDER BY aa.id_asistencia
+    """
+    return sql, parametros
+
+
+def iterar_lotes(filtros, tamano_lote=TAMANO_LOTE):
+    """
+    Ejecuta la consulta con un cursor de servidor y trae el primer lote antes
+    de devolver el generador de lotes: un error de la BD se lanza aquí, antes
+    de que la respuesta HTTP haya enviado nada
+
+    La conexión vive lo que dure el generador y se cierra al terminar
+    (o si el cliente HTTP se desconecta y el generador se descarta)
+
+    Raises:
+        psycopg2.Error: Si la conexión o la consulta fallan
+    """
+    sql, parametros = construir_consulta(filtros)
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    # Un named cursor mantiene el resultado en el servidor y solo trae tamano_lote filas por viaje
+    cursor = conn.cursor(name=f"exportacion_{uuid.uuid4().hex}")
+    cursor.itersize = tamano_lote
+
+    try:
+        cursor.execute(sql, parametros)
+        filas = cursor.fetchmany(tamano_lote)
+    except Exception:
+        cursor.close()
+        conn.rollback()
+        conn.close()
+        raise
+
+    return _lotes(conn, cursor, filas, tamano_lote)
+
+
+def _lotes(conn, cursor, filas, tamano_lote):
+    try:
+        while filas:
+            yield filas
+            filas = cursor.fetchmany(tamano_lote)
+    finally:
+        cursor.close()
+        conn.rollback()
+        conn.close()
+
+
+def generar_csv(filtros, tamano_lote=TAMANO_LOTE):
+    """Ejecuta la consulta y devuelve el generador del CSV en trozos de bytes"""
+    return _trozos_csv(iterar_lotes(filtros, tamano_lote))
+
+
+def _trozos_csv(lotes):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(COLUMNAS)
+    yield buffer.getvalue().encode('utf-8')
+
+    for filas in lotes:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows(filas)
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _texto(valor):
+    return (valor or '').encode('utf-8')
+
+
+def convertir_lote_npy(filas):
+    """Convierte un lote de filas en un arreglo estructurado DTYPE_NPY"""
+    lote = np.zeros(len(filas), dtype=DTYPE_NPY)
+    for i, fila in enumerate(filas):
+        lote[i] = (
+            fila[0], fila[1] or 0, fila[2] or 0, _texto(fila[3]), _texto(fila[4]),
+            fila[5] or 0, fila[6], _texto(fila[7]), fila[8], _texto(fila[9]),
+            fila[10] if fila[10] is not None else np.datetime64('NaT'),
+            fila[11] if fila[11] is not None else np.datetime64('NaT'),
+            _texto(fila[12]), fila[13] or 0, _texto(fila[14]),
+            fila[15] if fila[15] is not None else np.nan
+        )
+    return lote
+
+
+def _serializar_npy(arreglo):
+    buffer = io.BytesIO()
+    np.save(buffer, arreglo, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def generar_npy(filtros, tamano_lote=TAMANO_LOTE):
+    """Ejecuta la consulta y devuelve el generador de bloques .npy consecutivos (el primero vacío)"""
+    return _bloques_npy(iterar_lotes(filtros, tamano_lote))
+
+
+def _bloques_npy(lotes):
+    yield _serializar_npy(np.zeros(0, dtype=DTYPE_NPY))
+
+    for filas in lotes:
+        yield _serializar_npy(convertir_lote_npy(filas))
+
+
+def leer_npy(ruta):
+    """Lee una exportación npy lote por lote (generador de arreglos estructurados)"""
+    with open(ruta, 'rb') as f:
+        while True:
+            try:
+                yield np.load(f, allow_pickle=False)
+            except (EOFError, ValueError):
+                # np.load lanza al llegar al final del archivo
+                break
+
+
+FORMATOS = {
+    'csv': (generar_csv, 'text/csv'),
+    'npy': (generar_npy, 'application/octet-stream'),
+}
+
+
+def exportar(formato, filtros, salida):
+    """Escribe la exportación completa en un archivo binario abierto"""
+    generador, _ = FORMATOS[formato]
+    total_bytes = 0
+    for trozo in generador(filtros):
+        salida.write(trozo)
+        total_bytes += len(trozo)
+    return total_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exportar historial de asistencias en streaming')
+    parser.add_argument('--formato', choices=sorted(FORMATOS), default='csv')
+    parser.add_argument('--año', type=int)
+    parser.add_argument('--semestre')
+    parser.add_argument('--corte', type=int)
+    parser.add_argument('--curso', type=int, dest='id_curso')
+    parser.add_argument('--estudiante', type=int, dest='id_estudiante')
+    parser.add_argument('--desde', type=leer_fecha, help='Fecha de registro inicial (YYYY-MM-DD)')
+    parser.add_argument('--hasta', type=leer_fecha, help='Fecha de registro final, exclusiva (YYYY-MM-DD)')
+    parser.add_argument('-o', '--salida', help='Archivo de salida (por defecto stdout)')
+    args = parser.parse_args()
+
+    filtros = {nombre: getattr(args, nombre) for nombre in FILTROS}
+
+    if args.salida:
+        with open(args.salida, 'wb') as salida:
+            total = exportar(args.formato, filtros, salida)
+        print(f"✅ Exportación {args.formato} escrita en {args.salida} ({total / 1e6:.1f} MB)", file=sys.stderr)
+    else:
+        exportar(args.formato, filtros, sys.stdout.buffer)
+
+
+if __name__ == "__main__":
+    main()
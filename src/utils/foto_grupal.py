@@ -0,0 +1,466 @@
+"""
+Asistencia desde fotos grupales
+Una o varias fotos de alta resolución del salón se dividen en mosaicos
+solapados (más una vista general reducida para los rostros grandes), que un
+pool de procesos persistente analiza en paralelo. Las detecciones repetidas en
+los solapes se fusionan, los rostros se codifican por lotes en el mismo pool y
+todos se buscan a la vez en la galería (GaleriaRostros.buscar_lote: una
+multiplicación de matrices por nivel, primero los inscritos del curso).
+
+Los reconocidos se registran en la sesión con un solo INSERT
+(GestorAcademicoAutomatico.registrar_asistencias_lote). Cada etapa reporta
+su latencia (decodificar, detectar, codificar, buscar) para medir fotos de
+40 rostros.
+
+Uso:
+    python src/utils/foto_grupal.py salon.jpg --sesion 123
+    python src/utils/foto_grupal.py salon1.jpg salon2.jpg --sesion 123 --simular --salida anotadas/
+    python src/utils/foto_grupal.py --componer 40 --rostros students/ --repeticiones 5 --simular
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import cv2
+import face_recognition
+import numpy as np
+import psycopg2
+
+try:
+    from src.utils.gestor_academico_automatico import GestorAcademicoAutomatico
+    from src.utils.galeria_rostros import GaleriaRostros
+    from src.utils.fuentes_captura import EXTENSIONES_IMAGEN
+    from src.utils.procesamiento_rostros import CONFIANZA_MINIMA, TOLERANCIA, crear_pool, procesos_por_worker
+except ImportError:
+    # Ejecutado como script desde src/utils
+    from gestor_academico_automatico import GestorAcademicoAutomatico
+    from galeria_rostros import GaleriaRostros
+    from fuentes_captura import EXTENSIONES_IMAGEN
+    from procesamiento_rostros import CONFIANZA_MINIMA, TOLERANCIA, crear_pool, procesos_por_worker
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+TAMANO_MOSAICO = 1024  # Lado de cada mosaico en píxeles de la foto original
+SOLAPE = 0.25  # Fracción del mosaico compartida con el vecino (rostros en el borde)
+LADO_VISTA_GENERAL = 1600  # Lado mayor de la vista reducida para rostros grandes
+MUESTREO_MOSAICO = 1  # Muestreos extra de HOG en los mosaicos (rostros lejanos)
+UMBRAL_SOLAPE = 0.3  # IoU a partir del cual dos detecciones son el mismo rostro
+MARGEN_RECORTE = 0.5  # Margen alrededor del rostro al recortarlo para codificar
+
+COLORES = {
+    'reconocido': (0, 255, 0),
+    'baja_confianza': (0, 165, 255),
+    'desconocido': (0, 0, 255),
+    'duplicado': (160, 160, 160),
+}
+
+# ------------------------------------------------------------
+# Procesos de trabajo
+# ------------------------------------------------------------
+
+_pool = None
+_procesos_pool = 0
+_lock_pool = threading.Lock()  # Dos peticiones simultáneas no crean dos pools
+
+
+def obtener_pool(procesos=None):
+    """
+    Pool persistente (se crea en la primera foto y se reutiliza)
+
+    Por defecto usa los núcleos que le tocan a este worker web (procesos_por_worker)
+    """
+    global _pool, _procesos_pool
+    procesos = procesos or procesos_por_worker()
+    with _lock_pool:
+        if _pool is None or _procesos_pool != procesos:
+            if _pool is not None:
+                _pool.terminate()
+            _pool = crear_pool(procesos)
+            _procesos_pool = procesos
+        return _pool
+
+
+def cerrar_pool():
+    global _pool, _procesos_pool
+    with _lock_pool:
+        if _pool is not None:
+            _pool.close()
+            _pool.join()
+        _pool = None
+        _procesos_pool = 0
+
+
+def _detectar_en_mosaico(tarea):
+    """
+    Detecta los rostros de un mosaico RGB
+
+    Returns:
+        tuple: (índice de la foto, ubicaciones (top, right, bottom, left) en la foto original)
+    """
+    indice_foto, mosaico, y, x, escala, muestreo = tarea
+    ubicaciones = face_recognition.face_locations(mosaico, number_of_times_to_upsample=muestreo, model='hog')
+    return indice_foto, [
+        (int(top / escala) + y, int(right / escala) + x, int(bottom / escala) + y, int(left / escala) + x)
+        for top, right, bottom, left in ubicaciones
+    ]
+
+
+def _codificar_recortes(lote):
+    """Encodings de una lista de (recorte RGB, ubicación del rostro en el recorte)"""
+    return [
+        face_recognition.face_encodings(recorte, [ubicacion])[0]
+        for recorte, ubicacion in lote
+    ]
+
+
+# ------------------------------------------------------------
+# Mosaicos y detecciones
+# ------------------------------------------------------------
+
+def generar_mosaicos(alto, ancho, tamano=TAMANO_MOSAICO, solape=SOLAPE):
+    """
+    Rectángulos (y, x, alto, ancho) que cubren la imagen con el solape indicado
+
+    El último mosaico de cada fila/columna se alinea al borde para no quedar
+    más pequeño que el resto.
+    """
+    paso = max(1, int(tamano * (1 - solape)))
+
+    def inicios(longitud):
+        if longitud <= tamano:
+            return [0]
+        posiciones = list(range(0, longitud - tamano, paso))
+        posiciones.append(longitud - tamano)
+        return posiciones
+
+    return [
+        (y, x, min(tamano, alto), min(tamano, ancho))
+        for y in inicios(alto) for x in inicios(ancho)
+    ]
+
+
+def _iou_y_contencion(a, b):
+    top = max(a[0], b[0])
+    right = min(a[1], b[1])
+    bottom = min(a[2], b[2])
+    left = max(a[3], b[3])
+    if bottom <= top or right <= left:
+        return 0.0, 0.0
+    interseccion = (bottom - top) * (right - left)
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    return interseccion / (area_a + area_b - interseccion), interseccion / min(area_a, area_b)
+
+
+def fusionar_detecciones(ubicaciones, umbral=UMBRAL_SOLAPE):
+    """
+    Une las detecciones de un mismo rostro en mosaicos vecinos y en la vista
+    general: se conserva la caja más grande (la de un mosaico que lo contiene entero)
+    """
+    ordenadas = sorted(ubicaciones, key=lambda u: (u[2] - u[0]) * (u[1] - u[3]), reverse=True)
+    conservadas = []
+    for ubicacion in ordenadas:
+        if all(
+            iou < umbral and contencion < 0.6
+            for iou, contencion in (_iou_y_contencion(ubicacion, otra) for otra in conservadas)
+        ):
+            conservadas.append(ubicacion)
+    return conservadas
+
+
+def _recorte(rgb, ubicacion, margen=MARGEN_RECORTE):
+    """Recorte con margen alrededor del rostro y la ubicación relativa al recorte"""
+    top, right, bottom, left = ubicacion
+    alto, ancho = rgb.shape[:2]
+    dy = int((bottom - top) * margen)
+    dx = int((right - left) * margen)
+    y0, x0 = max(0, top - dy), max(0, left - dx)
+    y1, x1 = min(alto, bottom + dy), min(ancho, right + dx)
+    return np.ascontiguousarray(rgb[y0:y1, x0:x1]), (top - y0, right - x0, bottom - y0, left - x0)
+
+
+def decodificar_imagen(datos):
+    """Imagen BGR desde los bytes de un archivo (JPEG, PNG...)"""
+    imagen = cv2.imdecode(np.frombuffer(datos, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if imagen is None:
+        raise ValueError("No se pudo decodificar la imagen")
+    return imagen
+
+
+# ------------------------------------------------------------
+# Procesamiento
+# ------------------------------------------------------------
+
+def procesar_fotos(imagenes, galeria, id_curso=None, procesos=None):
+    """
+    Detecta, codifica y reconoce todos los rostros de una o varias fotos
+
+    Args:
+        imagenes: Lista de imágenes BGR o de bytes de archivos de imagen
+        galeria: GaleriaRostros cargada
+        id_curso: Curso de la sesión (búsqueda primero entre sus inscritos)
+        procesos: Procesos del pool (por defecto, los núcleos que le tocan a este worker)
+
+    Returns:
+        dict: imagenes (BGR), rostros (uno por rostro detectado, con indice_foto,
+              ubicacion, nombre, id_usuario, confianza, nivel y estado) y tiempos_ms
+    """
+    tiempos = {}
+    cronometro = time.perf_counter()
+    inicio = cronometro
+
+    imagenes = [decodificar_imagen(i) if isinstance(i, (bytes, bytearray)) else i for i in imagenes]
+    rgbs = [cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB) for imagen in imagenes]
+    ahora = time.perf_counter()
+    tiempos['decodificar'], cronometro = (ahora - cronometro) * 1000, ahora
+
+    pool = obtener_pool(procesos)
+
+    # Detección: mosaicos a resolución completa + vista general reducida
+    tareas = []
+    for indice_foto, rgb in enumerate(rgbs):
+        alto, ancho = rgb.shape[:2]
+        for y, x, alto_mosaico, ancho_mosaico in generar_mosaicos(alto, ancho):
+            mosaico = np.ascontiguousarray(rgb[y:y + alto_mosaico, x:x + ancho_mosaico])
+            tareas.append((indice_foto, mosaico, y, x, 1.0, MUESTREO_MOSAICO))
+        escala = min(1.0, LADO_VISTA_GENERAL / max(alto, ancho))
+        if escala < 1.0:
+            vista = cv2.resize(rgb, (0, 0), fx=escala, fy=escala)
+            tareas.append((indice_foto, vista, 0, 0, escala, 0))
+
+    detecciones = [[] for _ in rgbs]
+    for indice_foto, ubicaciones in pool.imap_unordered(_detectar_en_mosaico, tareas):
+        detecciones[indice_foto].extend(ubicaciones)
+    rostros = [
+        {'indice_foto': indice_foto, 'ubicacion': ubicacion}
+        for indice_foto, ubicaciones in enumerate(detecciones)
+        for ubicacion in fusionar_detecciones(ubicaciones)
+    ]
+    ahora = time.perf_counter()
+    tiempos['detectar'], cronometro = (ahora - cronometro) * 1000, ahora
+
+    # Codificación por lotes: un lote por proceso
+    encodings = []
+    if rostros:
+        recortes = [_recorte(rgbs[r['indice_foto']], r['ubicacion']) for r in rostros]
+        tamano_lote = max(1, -(-len(recortes) // (procesos or procesos_por_worker())))
+        lotes = [recortes[i:i + tamano_lote] for i in range(0, len(recortes), tamano_lote)]
+        for lote in pool.map(_codificar_recortes, lotes):
+            encodings.extend(lote)
+    ahora = time.perf_counter()
+    tiempos['codificar'], cronometro = (ahora - cronometro) * 1000, ahora
+
+    # Búsqueda de todos los rostros a la vez
+    resultados = galeria.buscar_lote(encodings, id_curso) if encodings else []
+    for rostro in rostros:
+        rostro.update({'nombre': None, 'id_usuario': None, 'confianza': 0.0, 'nivel': None, 'estado': 'desconocido'})
+    for rostro, resultado in zip(rostros, resultados):
+        if resultado['coincide']:
+            rostro.update({
+                'nombre': resultado['nombre'], 'id_usuario': resultado['id_usuario'],
+                'confianza': resultado['confianza'], 'nivel': resultado['nivel'],
+                'estado': 'reconocido' if resultado['confianza'] >= CONFIANZA_MINIMA else 'baja_confianza',
+            })
+
+    # Un estudiante reconocido en varios rostros (o fotos): se queda el de mayor confianza
+    mejores = {}
+    for rostro in rostros:
+        if rostro['estado'] != 'reconocido':
+            continue
+        actual = mejores.get(rostro['id_usuario'])
+        if actual is None or rostro['confianza'] > actual['confianza']:
+            if actual is not None:
+                actual['estado'] = 'duplicado'
+            mejores[rostro['id_usuario']] = rostro
+        else:
+            rostro['estado'] = 'duplicado'
+
+    ahora = time.perf_counter()
+    tiempos['buscar'] = (ahora - cronometro) * 1000
+    tiempos['total'] = (ahora - inicio) * 1000
+
+    return {
+        'imagenes': imagenes,
+        'rostros': rostros,
+        'tiempos_ms': {etapa: round(ms, 1) for etapa, ms in tiempos.items()},
+    }
+
+
+def registros_reconocidos(rostros, momento):
+    """(id_estudiante, momento, confianza) de los rostros reconocidos, para registrar_asistencias_lote"""
+    return [
+        (rostro['id_usuario'], momento, rostro['confianza'])
+        for rostro in rostros if rostro['estado'] == 'reconocido'
+    ]
+
+
+def anotar(imagen, rostros):
+    """Copia de la foto con el recuadro y el nombre de cada rostro"""
+    anotada = imagen.copy()
+    grosor = max(2, max(anotada.shape[:2]) // 800)
+    for rostro in rostros:
+        top, right, bottom, left = rostro['ubicacion']
+        color = COLORES[rostro['estado']]
+        cv2.rectangle(anotada, (left, top), (right, bottom), color, grosor)
+        if rostro['nombre']:
+            texto = f"{rostro['nombre']} ({rostro['confianza']:.2f})"
+        else:
+            texto = "Desconocido"
+        cv2.putText(anotada, texto, (left, max(20, top - 8)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5 * grosor, color, grosor)
+    return anotada
+
+
+def componer_foto_grupal(rutas, cantidad, ancho=4000, alto=3000, semilla=0):
+    """
+    Foto sintética de un salón con `cantidad` rostros en cuadrícula (tomados
+    de las fotos de `rutas`, repitiéndolas si hacen falta) para medir latencia
+    """
+    generador = np.random.default_rng(semilla)
+    foto = generador.integers(40, 80, size=(alto, ancho, 3), dtype=np.uint8)
+
+    fotos = [imagen for imagen in (cv2.imread(ruta) for ruta in rutas) if imagen is not None]
+    if not fotos:
+        raise ValueError("No se pudo leer ninguna foto de rostro")
+
+    columnas = int(np.ceil(np.sqrt(cantidad * ancho / alto)))
+    filas = int(np.ceil(cantidad / columnas))
+    celda_alto, celda_ancho = alto // filas, ancho // columnas
+    for i in range(cantidad):
+        imagen = fotos[i % len(fotos)]
+        escala = 0.85 * min(celda_alto / imagen.shape[0], celda_ancho / imagen.shape[1])
+        imagen = cv2.resize(imagen, (int(imagen.shape[1] * escala), int(imagen.shape[0] * escala)))
+        y = (i // columnas) * celda_alto + (celda_alto - imagen.shape[0]) // 2
+        x = (i % columnas) * celda_ancho + (celda_ancho - imagen.shape[1]) // 2
+        foto[y:y + imagen.shape[0], x:x + imagen.shape[1]] = imagen
+    return foto
+
+
+def obtener_curso_sesion(id_sesion):
+    """id_curso de una sesión (None si no existe)"""
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id_curso FROM sesiones_academicas WHERE id_sesion = %s", (id_sesion,))
+        fila = cursor.fetchone()
+        return fila[0] if fila else None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def mostrar_resultado(resultado):
+    rostros = resultado['rostros']
+    conteo = {estado: sum(1 for r in rostros if r['estado'] == estado) for estado in COLORES}
+    print(f"👥 {len(rostros)} rostros: {conteo['reconocido']} reconocidos, "
+          f"{conteo['baja_confianza']} con baja confianza, {conteo['desconocido']} desconocidos, "
+          f"{conteo['duplicado']} duplicados")
+    for rostro in sorted(rostros, key=lambda r: (r['indice_foto'], r['ubicacion'])):
+        if rostro['nombre']:
+            print(f"   👤 foto {rostro['indice_foto'] + 1}: {rostro['nombre']} "
+                  f"({rostro['confianza']:.2f}, {rostro['nivel']}, {rostro['estado']})")
+    tiempos = resultado['tiempos_ms']
+    print(f"⏱️ {tiempos['total']:.0f} ms (decodificar {tiempos['decodificar']:.0f}, "
+          f"detectar {tiempos['detectar']:.0f}, codificar {tiempos['codificar']:.0f}, "
+          f"buscar {tiempos['buscar']:.1f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Registrar asistencia desde fotos grupales del salón')
+    parser.add_argument('fotos', nargs='*', help='Fotos del salón (se procesan juntas)')
+    parser.add_argument('--sesion', type=int, help='id_sesion (por defecto, la sesión activa ahora)')
+    parser.add_argument('--momento', help='Hora de la foto "YYYY-mm-dd HH:MM:SS" (por defecto, ahora)')
+    parser.add_argument('--procesos', type=int, default=os.cpu_count(), help='Procesos del pool')
+    parser.add_argument('--salida', help='Carpeta donde guardar las fotos anotadas')
+    parser.add_argument('--simular', action='store_true', help='Reconocer sin registrar asistencia')
+    parser.add_argument('--componer', type=int, help='Generar una foto sintética con N rostros (medir latencia)')
+    parser.add_argument('--rostros', help='Carpeta de fotos para --componer')
+    parser.add_argument('--repeticiones', type=int, default=1, help='Veces que se procesan las fotos')
+    args = parser.parse_args()
+
+    if not args.fotos and not args.componer:
+        parser.error('indique fotos o --componer N')
+    if args.componer and not args.rostros:
+        parser.error('--componer requiere --rostros')
+
+    print("📸 ASISTENCIA DESDE FOTO GRUPAL")
+    print("="*60)
+
+    try:
+        imagenes = []
+        for ruta in args.fotos:
+            imagen = cv2.imread(ruta)
+            if imagen is None:
+                raise ValueError(f"No se pudo leer la imagen: {ruta}")
+            imagenes.append(imagen)
+        if args.componer:
+            rutas = sorted(
+                os.path.join(args.rostros, nombre) for nombre in os.listdir(args.rostros)
+                if nombre.lower().endswith(EXTENSIONES_IMAGEN)
+            )
+            imagenes.append(componer_foto_grupal(rutas, args.componer))
+            print(f"🧪 Foto sintética de 4000x3000 con {args.componer} rostros")
+
+        gestor = GestorAcademicoAutomatico()
+        id_sesion = args.sesion
+        if id_sesion is None and not args.simular:
+            sesion = gestor.obtener_sesion_activa_actual()
+            if sesion is None:
+                print("❌ No hay sesión activa; indique --sesion")
+                sys.exit(1)
+            id_sesion = sesion['id_sesion']
+        id_curso = obtener_curso_sesion(id_sesion) if id_sesion is not None else None
+
+        galeria = GaleriaRostros(tolerancia=TOLERANCIA)
+        print(f"🧠 Galería: {galeria.cargar_desde_bd()} estudiantes")
+
+        totales = []
+        for repeticion in range(args.repeticiones):
+            resultado = procesar_fotos(imagenes, galeria, id_curso, args.procesos)
+            totales.append(resultado['tiempos_ms']['total'])
+            if args.repeticiones > 1:
+                print(f"   🔁 Repetición {repeticion + 1}: {resultado['tiempos_ms']['total']:.0f} ms")
+        mostrar_resultado(resultado)
+        if args.repeticiones > 1:
+            # La primera incluye el arranque del pool
+            print(f"⏱️ Media sin la primera: {np.mean(totales[1:]):.0f} ms por lote de {len(imagenes)} fotos")
+
+        if args.salida:
+            os.makedirs(args.salida, exist_ok=True)
+            for i, imagen in enumerate(resultado['imagenes']):
+                rostros = [r for r in resultado['rostros'] if r['indice_foto'] == i]
+                ruta = os.path.join(args.salida, f"foto_grupal_{i + 1}.jpg")
+                cv2.imwrite(ruta, anotar(imagen, rostros))
+                print(f"💾 {ruta}")
+
+        if args.simular:
+            print("ℹ️ Simulación: no se escribió nada")
+            return
+
+        momento = datetime.strptime(args.momento, '%Y-%m-%d %H:%M:%S') if args.momento else datetime.now()
+        registro = gestor.registrar_asistencias_lote(id_sesion, registros_reconocidos(resultado['rostros'], momento))
+        if not registro['exito']:
+            print(f"❌ {registro['mensaje']}")
+            sys.exit(1)
+        print(f"✅ {registro['mensaje']} en la sesión {id_sesion}")
+
+    except (ValueError, psycopg2.Error) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        cerrar_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Fuentes de captura de video para las cámaras
+Todas tienen la misma interfaz (abrir / leer / liberar) para que el pipeline de
+reconocimiento corra igual sobre una cámara en vivo que sobre una grabación:
+
+    FuenteDispositivo   cámara local (índice), "auto" (prueba 0, 1 y 2) o URL (rtsp/http)
+    FuenteVideo         archivo de video
+    FuenteDirectorio    carpeta de imágenes en orden alfabético
+    FuenteSintetica     frames generados (opcionalmente con fotos de rostros pegadas)
+
+Las fuentes grabadas (video, directorio, sintética) tienen dos modos:
+    tiempo_real=True   entrega cada frame en su marca de tiempo (como una cámara)
+    tiempo_real=False  tan rápido como el pipeline los consuma (benchmarks)
+y "repetir": false (una pasada), true (indefinidamente) o el número de pasadas.
+
+Especificación en config/camaras.json ("fuente"):
+    0, "1", "auto", "rtsp://..."            -> dispositivo
+    "grabaciones/clase.mp4"                 -> video
+    "grabaciones/frames/"                   -> directorio
+    "sintetica"                             -> sintética
+    {"tipo": "video", "ruta": "clase.mp4", "tiempo_real": false, "repetir": true}
+"""
+
+import os
+import time
+
+import cv2
+import numpy as np
+
+INDICES_AUTOMATICOS = [0, 1, 2]
+EXTENSIONES_IMAGEN = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class FuenteCaptura:
+    """Interfaz común de las fuentes de video"""
+
+    # Las fuentes en vivo no terminan: si dejan de entregar frames es un error
+    en_vivo = False
+    descripcion = 'fuente'
+
+    def abrir(self):
+        """Abre la fuente. Returns: bool"""
+        raise NotImplementedError
+
+    def leer(self):
+        """Siguiente frame BGR. Returns: (bool, frame)"""
+        raise NotImplementedError
+
+    def liberar(self):
+        pass
+
+
+class FuenteDispositivo(FuenteCaptura):
+    """Cámara local o stream de red a través de cv2.VideoCapture"""
+
+    en_vivo = True
+
+    def __init__(self, candidatas, ancho=640, alto=480):
+        self.candidatas = list(candidatas)
+        self.ancho = ancho
+        self.alto = alto
+        self.cap = None
+        self.descripcion = f"dispositivo {self.candidatas}"
+
+    def abrir(self):
+        for candidata in self.candidatas:
+            try:
+                print(f"🔍 Intentando abrir cámara {candidata}...")
+                cap = cv2.VideoCapture(candidata)
+                if cap.isOpened():
+                    print(f"✅ Cámara abierta correctamente con {candidata}")
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.ancho)
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.alto)
+                    self.cap = cap
+                    self.descripcion = f"dispositivo {candidata}"
+                    return True
+                cap.release()
+            except Exception as e:
+                print(f"❌ Error al abrir cámara {candidata}: {e}")
+        return False
+
+    def leer(self):
+        return self.cap.read()
+
+    def liberar(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class FuenteReproduccion(FuenteCaptura):
+    """
+    Base de las fuentes grabadas: ritmo en tiempo real o máxima velocidad,
+    y repetición opcional al llegar al final
+    """
+
+    def __init__(self, fps=30.0, tiempo_real=True, repetir=False):
+        self.fps = float(fps)
+        self.tiempo_real = tiempo_real
+        self.repetir = repetir
+        self._inicio = None
+        self._desfase = 0.0
+        self._ultima_marca = 0.0
+        self._pasadas = 1
+        self.frames_entregados = 0
+
+    def _siguiente(self):
+        """(bool, frame, marca en segundos desde el inicio de la grabación)"""
+        raise NotImplementedError
+
+    def _rebobinar(self):
+        raise NotImplementedError
+
+    def _puede_repetir(self):
+        if self.repetir is True:
+            return True
+        return bool(self.repetir) and self._pasadas < self.repetir
+
+    def leer(self):
+        ok, frame, marca = self._siguiente()
+        if not ok and self.frames_entregados and self._puede_repetir():
+            self._desfase += self._ultima_marca + 1.0 / self.fps
+            self._pasadas += 1
+            self._rebobinar()
+            ok, frame, marca = self._siguiente()
+        if not ok:
+            return False, None
+
+        self._ultima_marca = marca
+        marca += self._desfase
+        if self.tiempo_real:
+            # Esperar hasta la marca de tiempo del frame
+            if self._inicio is None:
+                self._inicio = time.monotonic() - marca
+            espera = self._inicio + marca - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+
+        self.frames_entregados += 1
+        return True, frame
+
+
+class FuenteVideo(FuenteReproduccion):
+    """Archivo de video (mp4, avi, ...)"""
+
+    def __init__(self, ruta, tiempo_real=True, repetir=False):
+        super().__init__(tiempo_real=tiempo_real, repetir=repetir)
+        self.ruta = ruta
+        self.cap = None
+        self._indice = 0
+        self.descripcion = f"video {ruta}"
+
+    def abrir(self):
+        if not os.path.isfile(self.ruta):
+            print(f"❌ No existe el video: {self.ruta}")
+            return False
+        self.cap = cv2.VideoCapture(self.ruta)
+        if not self.cap.isOpened():
+            return False
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        return True
+
+    def _siguiente(self):
+        ok, frame = self.cap.read()
+        marca = self._indice / self.fps
+        self._indice += 1
+        return ok, frame, marca
+
+    def _rebobinar(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self._indice = 0
+
+    def liberar(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class FuenteDirectorio(FuenteReproduccion):
+    """Imágenes de una carpeta en orden alfabético, a fps frames por segundo"""
+
+    def __init__(self, ruta, fps=10.0, tiempo_real=True, repetir=False):
+        super().__init__(fps=fps, tiempo_real=tiempo_real, repetir=repetir)
+        self.ruta = ruta
+        self.archivos = []
+        self._indice = 0
+        self.descripcion = f"directorio {ruta}"
+
+    def abrir(self):
+        if not os.path.isdir(self.ruta):
+            print(f"❌ No existe el directorio: {self.ruta}")
+            return False
+        self.archivos = sorted(
+            os.path.join(self.ruta, nombre) for nombre in os.listdir(self.ruta)
+            if nombre.lower().endswith(EXTENSIONES_IMAGEN)
+        )
+        return len(self.archivos) > 0
+
+    def _siguiente(self):
+        while self._indice < len(self.archivos):
+            ruta = self.archivos[self._indice]
+            marca = self._indice / self.fps
+            self._indice += 1
+            frame = cv2.imread(ruta)
+            if frame is not None:
+                return True, frame, marca
+            print(f"⚠️ No se pudo leer la imagen: {ruta}")
+        return False, None, 0.0
+
+    def _rebobinar(self):
+        self._indice = 0
+
+
+class FuenteSintetica(FuenteReproduccion):
+    """
+    Frames generados sin cámara. Con rostros (rutas de fotos) se pegan en
+    cuadrícula con un leve desplazamiento por frame, para medir detección y
+    reconocimiento con un número conocido de rostros.
+    """
+
+    def __init__(self, ancho=640, alto=480, fps=30.0, total=None, rostros=None,
+                 tiempo_real=True, repetir=False, semilla=0):
+        super().__init__(fps=fps, tiempo_real=tiempo_real, repetir=repetir)
+        self.ancho = ancho
+        self.alto = alto
+        self.total = total
+        self.rutas_rostros = list(rostros or [])
+        self.semilla = semilla
+        self._indice = 0
+        self.descripcion = f"sintética {ancho}x{alto}" + (f" con {len(self.rutas_rostros)} rostros" if self.rutas_rostros else "")
+
+    def abrir(self):
+        generador = np.random.default_rng(self.semilla)
+        self._fondo = generador.integers(40, 80, size=(self.alto, self.ancho, 3), dtype=np.uint8)
+
+        # Cuadrícula de celdas para los rostros
+        self._rostros = []
+        if self.rutas_rostros:
+            columnas = int(np.ceil(np.sqrt(len(self.rutas_rostros))))
+            filas = int(np.ceil(len(self.rutas_rostros) / columnas))
+            celda = min(self.ancho // columnas, self.alto // filas) - 8
+            for i, ruta in enumerate(self.rutas_rostros):
+                imagen = cv2.imread(ruta)
+                if imagen is None:
+                    print(f"⚠️ No se pudo leer la imagen: {ruta}")
+                    continue
+                escala = celda / max(imagen.shape[:2])
+                imagen = cv2.resize(imagen, (int(imagen.shape[1] * escala), int(imagen.shape[0] * escala)))
+                self._rostros.append((imagen, (i // columnas) * (celda + 8) + 4, (i % columnas) * (celda + 8) + 4))
+        return True
+
+    def _siguiente(self):
+        if self.total is not None and self._indice >= self.total:
+            return False, None, 0.0
+
+        frame = self._fondo.copy()
+        desplazamiento = self._indice % 5
+        for imagen, y, x in self._rostros:
+            alto, ancho = imagen.shape[:2]
+            y = min(y + desplazamiento, self.alto - alto)
+            x = min(x + desplazamiento, self.ancho - ancho)
+            frame[y:y + alto, x:x + ancho] = imagen
+        if not self._rostros:
+            # Un bloque en movimiento para que los frames no sean idénticos
+            x = (self._indice * 8) % max(1, self.ancho - 40)
+            frame[20:60, x:x + 40] = 255
+
+        marca = self._indice / self.fps
+        self._indice += 1
+        return True, frame, marca
+
+    def _rebobinar(self):
+        self._indice = 0
+
+
+def crear_fuente(especificacion, ancho=640, alto=480):
+    """
+    Crea la fuente de captura a partir de la especificación de config/camaras.json
+
+    Args:
+        especificacion: índice, "auto", URL, ruta de video o directorio, "sintetica"
+                        o dict {"tipo": ..., parámetros de la fuente}
+        ancho, alto: resolución pedida a los dispositivos (y de la fuente sintética)
+
+    Returns:
+        FuenteCaptura
+    """
+    if isinstance(especificacion, dict):
+        parametros = dict(especificacion)
+        tipo = parametros.pop('tipo', 'dispositivo')
+        if tipo == 'dispositivo':
+            return crear_fuente(parametros.get('indice', 'auto'), ancho, alto)
+        if tipo == 'video':
+            return FuenteVideo(**parametros)
+        if tipo == 'directorio':
+            return FuenteDirectorio(**parametros)
+        if tipo == 'sintetica':
+            parametros.setdefault('ancho', ancho)
+            parametros.setdefault('alto', alto)
+            return FuenteSintetica(**parametros)
+        raise ValueError(f"Tipo de fuente desconocido: {tipo}")
+
+    if especificacion == 'auto':
+        return FuenteDispositivo(INDICES_AUTOMATICOS, ancho, alto)
+    if isinstance(especificacion, int) or str(especificacion).isdigit():
+        return FuenteDispositivo([int(especificacion)], ancho, alto)
+    if especificacion == 'sintetica':
+        return FuenteSintetica(ancho, alto)
+    if '://' in str(especificacion):
+        return FuenteDispositivo([especificacion], ancho, alto)
+    if os.path.isdir(especificacion):
+        return FuenteDirectorio(especificacion)
+    return FuenteVideo(especificacion)
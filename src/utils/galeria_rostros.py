@@ -0,0 +1,415 @@
+"""
+Galería de rostros con búsqueda por curso
+Mantiene en memoria la matriz de plantillas (hasta PLANTILLAS_POR_ESTUDIANTE
+embeddings activos por estudiante, ver compactar_plantillas.py) y,
+por cada curso con sesión activa, una subgalería con solo sus inscritos
+(tabla inscripciones). Cada rostro se busca primero entre los inscritos del
+curso indicado y solo si no coincide con ninguno en la galería completa.
+Varias cámaras (aulas distintas) comparten la misma galería.
+
+Las subgalerías se vuelven a leer de la BD cada TTL_SUBGALERIA segundos
+(cambios en inscripciones) y, si la consulta falla, no se reintenta antes de
+REINTENTO_INSCRITOS: mientras tanto se busca con la anterior o en la galería
+completa, sin abrir una conexión por cada rostro.
+
+Buscar entre 30 inscritos en lugar de todo el campus reduce el costo por rostro
+y el riesgo de confundir a un estudiante con otro de otro curso. Las
+estadísticas por nivel (curso / global) muestran la tasa de aciertos y la
+latencia de cada uno.
+
+Para identidades duplicadas: duplicados() compara las fotos de un registro
+nuevo con toda la galería y pares_cercanos() recorre la galería completa por
+bloques (nunca la matriz N x N entera).
+"""
+
+import threading
+import time
+
+import numpy as np
+import psycopg2
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+NIVELES = ('curso', 'global')
+PLANTILLAS_POR_ESTUDIANTE = 3  # Embeddings activos por estudiante que se cargan (los de mayor calidad)
+TTL_SUBGALERIA = 300  # Segundos antes de volver a leer los inscritos de un curso
+REINTENTO_INSCRITOS = 30  # Segundos sin consultar los inscritos de un curso tras un error
+
+
+class GaleriaRostros:
+    """
+    Matriz global de plantillas (N x 128, una o más filas por estudiante) con
+    subgalerías por curso
+    """
+
+    def __init__(self, tolerancia=0.45):
+        self.tolerancia = tolerancia
+
+        self._lock = threading.Lock()
+        self.matriz = np.zeros((0, 128))
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.nombres = []
+        self._indices_por_id = {}  # id_usuario -> filas de sus plantillas
+
+        # Subgalerías por curso: id_curso -> (índices en la matriz global, sus filas)
+        self._subgalerias = {}
+        self._vencimientos = {}  # id_curso -> momento (monotonic) en que se vuelve a leer de la BD
+
+        self._reiniciar_estadisticas()
+
+    def __len__(self):
+        """Estudiantes en la galería (las filas de la matriz son plantillas)"""
+        return len(self._indices_por_id)
+
+    # ------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------
+
+    def cargar(self, embeddings, nombres, ids):
+        """
+        Reemplaza la galería global (las subgalerías se reconstruyen al usarse)
+
+        Un estudiante con varias plantillas aparece en varias filas con el mismo id.
+        """
+        matriz = np.array(embeddings, dtype=np.float64).reshape(len(nombres), -1) if nombres else np.zeros((0, 128))
+        indices_por_id = {}
+        for i, id_usuario in enumerate(ids):
+            indices_por_id.setdefault(int(id_usuario), []).append(i)
+        with self._lock:
+            self.matriz = matriz
+            self.ids = np.array(ids, dtype=np.int64)
+            self.nombres = list(nombres)
+            self._indices_por_id = indices_por_id
+            self._subgalerias = {}
+            self._vencimientos = {}
+
+    def cargar_desde_bd(self, plantillas_por_estudiante=PLANTILLAS_POR_ESTUDIANTE):
+        """
+        Carga las plantillas (embeddings activos de mayor calidad) de cada
+        estudiante activo (scripts sin main.py)
+
+        Returns:
+            int: Número de estudiantes en la galería
+        """
+        conn = psycopg2.connect(**DATABASE_CONFIG)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT id_usuario, nombre, apellido, embedding_vector
+                FROM (
+                    SELECT u.id_usuario, u.nombre, u.apellido, e.embedding_vector,
+                           ROW_NUMBER() OVER (PARTITION BY u.id_usuario ORDER BY e.quality_score DESC) AS orden
+                    FROM usuarios u
+                    JOIN embeddings_faciales e ON u.id_usuario = e.id_usuario
+                    WHERE u.rol = 'estudiante' AND u.estado = 'activo' AND e.activo = true
+                ) plantillas
+                WHERE orden <= %s
+                ORDER BY id_usuario, orden
+            """, (plantillas_por_estudiante,))
+            filas = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+        self.cargar(
+            [np.frombuffer(fila[3], dtype=np.float64) for fila in filas],
+            [f"{fila[1]} {fila[2]}" for fila in filas],
+            [fila[0] for fila in filas],
+        )
+        return len(self)
+
+    def _inscritos(self, id_curso):
+        conn = psycopg2.connect(**DATABASE_CONFIG)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT id_estudiante FROM inscripciones
+                WHERE id_curso = %s AND estado = 'activo'
+            """, (id_curso,))
+            return [fila[0] for fila in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+
+    def cargar_inscritos(self, id_curso, inscritos):
+        """
+        Construye la subgalería de un curso a partir de los ids de sus inscritos
+
+        Returns:
+            int: Inscritos con embedding en la galería
+        """
+        with self._lock:
+            presentes = [i for i in set(inscritos) if i in self._indices_por_id]
+            indices = np.array(sorted(
+                indice for i in presentes for indice in self._indices_por_id[i]
+            ), dtype=np.int64)
+            self._subgalerias[id_curso] = (indices, self.matriz[indices])
+            self._vencimientos[id_curso] = time.monotonic() + TTL_SUBGALERIA
+        return len(presentes)
+
+    def _reclamar_subgaleria(self, id_curso):
+        """
+        True si este hilo debe (re)construir la subgalería del curso: no existe
+        o venció. Aplaza el vencimiento para que los demás hilos sigan buscando
+        con la actual y, si la consulta falla, nadie reintente antes de
+        REINTENTO_INSCRITOS.
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora < self._vencimientos.get(id_curso, 0):
+                return False
+            self._vencimientos[id_curso] = ahora + REINTENTO_INSCRITOS
+            return True
+
+    def _construir_subgaleria(self, id_curso):
+        """Subgalería de un curso desde la BD (al usarse por primera vez y cada TTL_SUBGALERIA)"""
+        if not self._reclamar_subgaleria(id_curso):
+            return
+        try:
+            inscritos = self._inscritos(id_curso)
+        except psycopg2.Error as e:
+            print(f"❌ Error cargando inscritos del curso {id_curso} (reintento en {REINTENTO_INSCRITOS}s): {e}")
+            return
+
+        cantidad = self.cargar_inscritos(id_curso, inscritos)
+        print(f"🎯 Subgalería del curso {id_curso}: {cantidad} de {len(self)} estudiantes")
+
+    # ------------------------------------------------------------
+    # Búsqueda
+    # ------------------------------------------------------------
+
+    def _mejor(self, matriz, encoding):
+        distancias = np.linalg.norm(matriz - encoding, axis=1)
+        posicion = int(np.argmin(distancias))
+        return posicion, float(distancias[posicion])
+
+    def buscar(self, encoding, id_curso=None):
+        """
+        Busca un rostro: primero entre los inscritos del curso y, si no
+        coincide con ninguno, en la galería completa
+
+        Args:
+            encoding: Vector de 128 dimensiones de face_recognition
+            id_curso: Curso de la sesión activa (None = solo galería completa)
+
+        Returns:
+            dict: nombre, id_usuario, distancia, confianza, coincide, nivel
+                  (None si la galería está vacía)
+        """
+        if id_curso is not None:
+            self._construir_subgaleria(id_curso)
+
+        # Galería y subgalería de la misma carga
+        with self._lock:
+            matriz, nombres, ids = self.matriz, self.nombres, self.ids
+            subgaleria = self._subgalerias.get(id_curso)
+
+        if len(nombres) == 0:
+            return None
+
+        if subgaleria is not None and len(subgaleria[0]):
+            indices_curso, matriz_curso = subgaleria
+            inicio = time.perf_counter()
+            posicion, distancia = self._mejor(matriz_curso, encoding)
+            coincide = distancia <= self.tolerancia
+            self._registrar('curso', coincide, inicio)
+            if coincide:
+                return self._resultado(int(indices_curso[posicion]), distancia, True, 'curso', nombres, ids)
+
+        inicio = time.perf_counter()
+        posicion, distancia = self._mejor(matriz, encoding)
+        coincide = distancia <= self.tolerancia
+        self._registrar('global', coincide, inicio)
+        return self._resultado(posicion, distancia, coincide, 'global', nombres, ids)
+
+    def _distancias(self, matriz, encodings):
+        """Matriz M x N de distancias euclídeas (|a|² + |b|² - 2ab)"""
+        cuadrados = (
+            np.einsum('ij,ij->i', encodings, encodings)[:, None]
+            + np.einsum('ij,ij->i', matriz, matriz)[None, :]
+            - 2 * encodings @ matriz.T
+        )
+        return np.sqrt(np.maximum(cuadrados, 0))
+
+    def buscar_lote(self, encodings, id_curso=None):
+        """
+        Busca varios rostros a la vez (foto grupal) con una sola multiplicación
+        de matrices por nivel: curso primero y galería completa para los que no
+        coincidan con ningún inscrito
+
+        Args:
+            encodings: Lista (o matriz M x 128) de encodings
+            id_curso: Curso de la sesión activa (None = solo galería completa)
+
+        Returns:
+            list: Un resultado por encoding, como buscar() (vacía si la galería está vacía)
+        """
+        if id_curso is not None:
+            self._construir_subgaleria(id_curso)
+
+        with self._lock:
+            matriz, nombres, ids = self.matriz, self.nombres, self.ids
+            subgaleria = self._subgalerias.get(id_curso)
+
+        consultas = np.asarray(encodings, dtype=np.float64).reshape(-1, 128)
+        if len(nombres) == 0 or len(consultas) == 0:
+            return []
+
+        resultados = [None] * len(consultas)
+        pendientes = np.arange(len(consultas))
+
+        if subgaleria is not None and len(subgaleria[0]):
+            indices_curso, matriz_curso = subgaleria
+            inicio = time.perf_counter()
+            distancias = self._distancias(matriz_curso, consultas)
+            posiciones = np.argmin(distancias, axis=1)
+            minimas = distancias[np.arange(len(consultas)), posiciones]
+            coinciden = minimas <= self.tolerancia
+            self._registrar('curso', coinciden, inicio)
+            for i in np.flatnonzero(coinciden):
+                resultados[i] = self._resultado(
+                    int(indices_curso[posiciones[i]]), float(minimas[i]), True, 'curso', nombres, ids)
+            pendientes = np.flatnonzero(~coinciden)
+
+        if len(pendientes):
+            inicio = time.perf_counter()
+            distancias = self._distancias(matriz, consultas[pendientes])
+            posiciones = np.argmin(distancias, axis=1)
+            minimas = distancias[np.arange(len(pendientes)), posiciones]
+            coinciden = minimas <= self.tolerancia
+            self._registrar('global', coinciden, inicio)
+            for j, i in enumerate(pendientes):
+                resultados[i] = self._resultado(
+                    int(posiciones[j]), float(minimas[j]), bool(coinciden[j]), 'global', nombres, ids)
+
+        return resultados
+
+    # ------------------------------------------------------------
+    # Identidades duplicadas
+    # ------------------------------------------------------------
+
+    def duplicados(self, encodings, umbral):
+        """
+        Estudiantes de la galería a los que se parecen las fotos de un registro
+        nuevo (no cuenta en las estadísticas de reconocimiento)
+
+        Args:
+            encodings: Encodings de las fotos del registro
+            umbral: Distancia máxima para considerar que es la misma persona
+
+        Returns:
+            list: dicts id_usuario, nombre, distancia (la menor), fotos (cuántas
+                  coinciden), ordenados de más a menos fotos y por distancia
+        """
+        with self._lock:
+            matriz, nombres, ids = self.matriz, self.nombres, self.ids
+
+        consultas = np.asarray(encodings, dtype=np.float64).reshape(-1, 128)
+        if len(nombres) == 0 or len(consultas) == 0:
+            return []
+
+        distancias = self._distancias(matriz, consultas)
+        candidatos = {}
+        for foto, indice in zip(*np.nonzero(distancias <= umbral)):
+            distancia = float(distancias[foto, indice])
+            actual = candidatos.setdefault(int(ids[indice]), {
+                'id_usuario': int(ids[indice]), 'nombre': nombres[indice], 'distancia': distancia, 'fotos': set()
+            })
+            # Una foto cuenta una vez por estudiante aunque coincida con varias de sus plantillas
+            actual['fotos'].add(int(foto))
+            actual['distancia'] = min(actual['distancia'], distancia)
+        for candidato in candidatos.values():
+            candidato['fotos'] = len(candidato['fotos'])
+        return sorted(candidatos.values(), key=lambda c: (-c['fotos'], c['distancia']))
+
+    def pares_cercanos(self, umbral, tamano_bloque=2048):
+        """
+        Pares de plantillas de estudiantes distintos a menos de `umbral` en toda
+        la galería
+
+        Recorre el triángulo superior por bloques de tamano_bloque x tamano_bloque
+        en float32 (16 MB por bloque con 2048), así que la memoria no depende de N.
+
+        Yields:
+            tuple: (índice_a, índice_b, distancia) con índice_a < índice_b
+        """
+        with self._lock:
+            matriz = self.matriz.astype(np.float32)
+            ids = self.ids
+        normas = np.einsum('ij,ij->i', matriz, matriz)
+        total = len(matriz)
+
+        for inicio_a in range(0, total, tamano_bloque):
+            bloque_a = matriz[inicio_a:inicio_a + tamano_bloque]
+            normas_a = normas[inicio_a:inicio_a + tamano_bloque]
+            for inicio_b in range(inicio_a, total, tamano_bloque):
+                bloque_b = matriz[inicio_b:inicio_b + tamano_bloque]
+                cuadrados = normas_a[:, None] + normas[None, inicio_b:inicio_b + tamano_bloque] - 2 * bloque_a @ bloque_b.T
+                cercanos = cuadrados <= umbral * umbral
+                # Las plantillas de un mismo estudiante no son duplicados
+                cercanos &= ids[inicio_a:inicio_a + tamano_bloque, None] != ids[None, inicio_b:inicio_b + tamano_bloque]
+                if inicio_a == inicio_b:
+                    # Bloque diagonal: solo por encima de la diagonal
+                    cercanos = np.triu(cercanos, k=1)
+                for fila, columna in zip(*np.nonzero(cercanos)):
+                    distancia = float(np.sqrt(max(cuadrados[fila, columna], 0)))
+                    yield inicio_a + int(fila), inicio_b + int(columna), distancia
+
+    def _resultado(self, indice, distancia, coincide, nivel, nombres, ids):
+        return {
+            'nombre': nombres[indice],
+            'id_usuario': int(ids[indice]),
+            'distancia': distancia,
+            'confianza': 1 - distancia,
+            'coincide': coincide,
+            'nivel': nivel,
+        }
+
+    # ------------------------------------------------------------
+    # Estadísticas por nivel
+    # ------------------------------------------------------------
+
+    def _reiniciar_estadisticas(self):
+        self._estadisticas = {nivel: {'busquedas': 0, 'aciertos': 0, 'segundos': 0.0} for nivel in NIVELES}
+
+    def _registrar(self, nivel, acierto, inicio):
+        """Cuenta una búsqueda (acierto bool) o un lote (arreglo de aciertos)"""
+        segundos = time.perf_counter() - inicio
+        aciertos = np.atleast_1d(acierto)
+        with self._lock:
+            datos = self._estadisticas[nivel]
+            datos['busquedas'] += len(aciertos)
+            datos['aciertos'] += int(np.count_nonzero(aciertos))
+            datos['segundos'] += segundos
+
+    def estadisticas(self):
+        """Tasa de aciertos y latencia media por nivel de búsqueda"""
+        # Copias bajo el lock: cargar() y las búsquedas reemplazan estas estructuras desde otros hilos
+        with self._lock:
+            estudiantes, plantillas, ids = len(self._indices_por_id), len(self.matriz), self.ids
+            subgalerias = [(id_curso, indices) for id_curso, (indices, _) in self._subgalerias.items()]
+            estadisticas = {nivel: dict(datos) for nivel, datos in self._estadisticas.items()}
+
+        resultado = {
+            'estudiantes_total': estudiantes,
+            'plantillas_total': plantillas,
+            'estudiantes_por_curso': {
+                id_curso: int(len(np.unique(ids[indices]))) for id_curso, indices in subgalerias
+            },
+        }
+        for nivel, datos in estadisticas.items():
+            busquedas = datos['busquedas']
+            resultado[nivel] = {
+                'busquedas': busquedas,
+                'aciertos': datos['aciertos'],
+                'tasa_aciertos': round(datos['aciertos'] / busquedas, 3) if busquedas else 0.0,
+                'latencia_media_ms': round(datos['segundos'] * 1000 / busquedas, 4) if busquedas else 0.0,
+            }
+        return resultado
@@ -0,0 +1,331 @@
+"""
+Generador masivo de sesiones académicas a partir de un horario semanal
+Crea todas las sesiones de un semestre (cursos x franjas semanales x semanas)
+sin preguntas interactivas, con inserciones multi-fila por lote dentro de una
+sola transacción.
+
+    - Idempotente: una sesión se identifica por (id_curso, fecha_programada,
+      hora_inicio); las que ya existen se omiten al volver a ejecutarlo.
+    - Los numero_sesion se reservan por bloques en contadores_sesion
+      (una llamada por curso y corte, no una por sesión).
+    - --simular muestra lo que se crearía sin escribir nada.
+
+Especificación (JSON):
+    {
+        "desde": "2025-07-14",
+        "hasta": "2025-11-21",
+        "festivos": ["2025-08-07", {"desde": "2025-10-06", "hasta": "2025-10-10"}],
+        "tolerancia_minutos": 15,
+        "cursos": [
+            {
+                "curso": "MAT101",
+                "tipo_clase": "teorica",
+                "horarios": [
+                    {"dias": ["lunes", "miércoles"], "hora_inicio": "08:00", "hora_fin": "10:00", "aula": "A-201"}
+                ]
+            }
+        ]
+    }
+
+    "curso" acepta el código o el id_curso. "desde"/"hasta" también pueden
+    indicarse por curso.
+
+Uso:
+    python src/utils/generador_horarios.py horario_2025_2.json --simular
+    python src/utils/generador_horarios.py horario_2025_2.json
+"""
+
+import argparse
+import json
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+try:
+    from src.utils.calendario_academico import obtener_calendario
+except ImportError:
+    # Ejecutado como script desde src/utils
+    from calendario_academico import obtener_calendario
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+TAMANO_LOTE = 1000
+
+DIAS_SEMANA = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
+
+
+def _sin_tildes(texto):
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode().lower()
+
+
+INDICE_DIAS = {_sin_tildes(dia): i for i, dia in enumerate(DIAS_SEMANA)}
+
+
+def _fecha(valor):
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+def _hora(valor):
+    formato = '%H:%M:%S' if valor.count(':') == 2 else '%H:%M'
+    return datetime.strptime(valor, formato).time()
+
+
+def leer_festivos(festivos):
+    """Convierte la lista de fechas y rangos {"desde", "hasta"} en un set de fechas"""
+    resultado = set()
+    for festivo in festivos or []:
+        if isinstance(festivo, dict):
+            dia = _fecha(festivo['desde'])
+            fin = _fecha(festivo.get('hasta', festivo['desde']))
+            while dia <= fin:
+                resultado.add(dia)
+                dia += timedelta(days=1)
+        else:
+            resultado.add(_fecha(festivo))
+    return resultado
+
+
+def expandir_horario(especificacion, cursos, calendario=None):
+    """
+    Genera las sesiones (sin número) que describe la especificación
+
+    Args:
+        especificacion: dict leído del JSON
+        cursos: dict {curso de la especificación: (id_curso, codigo)}
+        calendario: CalendarioAcademico (por defecto el de config/calendario_academico.json)
+
+    Returns:
+        list: dicts ordenados por curso, fecha y hora
+    """
+    calendario = calendario or obtener_calendario()
+    festivos = leer_festivos(especificacion.get('festivos'))
+    tolerancia = especificacion.get('tolerancia_minutos', 15)
+    sesiones = []
+
+    for curso in especificacion['cursos']:
+        id_curso, codigo = cursos[str(curso['curso'])]
+        desde = _fecha(curso.get('desde', especificacion['desde']))
+        hasta = _fecha(curso.get('hasta', especificacion['hasta']))
+
+        for franja in curso['horarios']:
+            hora_inicio = _hora(franja['hora_inicio'])
+            hora_fin = _hora(franja['hora_fin'])
+            if hora_fin <= hora_inicio:
+                raise ValueError(f"{codigo}: hora_fin debe ser posterior a hora_inicio ({franja})")
+
+            duracion = (datetime.combine(date.min, hora_fin) - datetime.combine(date.min, hora_inicio)).total_seconds() / 3600
+            for nombre_dia in franja['dias']:
+                dia_semana = INDICE_DIAS.get(_sin_tildes(nombre_dia))
+                if dia_semana is None:
+                    raise ValueError(f"{codigo}: día desconocido '{nombre_dia}'")
+
+                fecha = desde + timedelta(days=(dia_semana - desde.weekday()) % 7)
+                while fecha <= hasta:
+                    if fecha not in festivos:
+                        sesiones.append({
+                            'id_curso': id_curso,
+                            'codigo': codigo,
+                            'fecha_programada': fecha,
+                            'hora_inicio': hora_inicio,
+                            'hora_fin': hora_fin,
+                            'dia_semana': DIAS_SEMANA[dia_semana],
+                            'aula': franja.get('aula') or curso.get('aula'),
+                            'tolerancia_minutos': franja.get('tolerancia_minutos', tolerancia),
+                            'duracion_horas': round(duracion, 1),
+                            'tipo_clase': franja.get('tipo_clase', curso.get('tipo_clase', 'teorica')),
+                        })
+                    fecha += timedelta(days=7)
+
+    # Una franja repetida en la especificación no debe duplicar sesiones
+    unicas = {(s['id_curso'], s['fecha_programada'], s['hora_inicio']): s for s in sesiones}
+    sesiones = sorted(unicas.values(), key=lambda s: (s['id_curso'], s['fecha_programada'], s['hora_inicio']))
+
+    # Período académico de todas las fechas en una sola llamada vectorizada
+    periodos = calendario.resolver_muchos([s['fecha_programada'] for s in sesiones])
+    for i, sesion in enumerate(sesiones):
+        sesion['año'] = int(periodos['año'][i])
+        sesion['semestre'] = periodos['semestre'][i]
+        sesion['corte'] = int(periodos['corte'][i])
+
+    return sesiones
+
+
+def resolver_cursos(cursor, especificacion):
+    """Busca en una consulta todos los cursos (por código o id) de la especificación"""
+    referencias = {str(curso['curso']) for curso in especificacion['cursos']}
+    ids = [int(r) for r in referencias if r.isdigit()]
+
+    cursor.execute("""
+        SELECT id_curso, codigo FROM cursos
+        WHERE codigo = ANY(%s) OR id_curso = ANY(%s)
+    """, (list(referencias), ids))
+
+    cursos = {}
+    for id_curso, codigo in cursor.fetchall():
+        cursos[codigo] = (id_curso, codigo)
+        cursos[str(id_curso)] = (id_curso, codigo)
+
+    faltantes = sorted(referencias - set(cursos))
+    if faltantes:
+        raise ValueError(f"Cursos inexistentes: {', '.join(faltantes)}")
+    return cursos
+
+
+def filtrar_existentes(cursor, sesiones):
+    """Quita las sesiones cuyo (id_curso, fecha, hora_inicio) ya existe (una consulta)"""
+    if not sesiones:
+        return [], 0
+
+    cursor.execute("""
+        SELECT id_curso, fecha_programada, hora_inicio
+        FROM sesiones_academicas
+        WHERE id_curso = ANY(%s) AND fecha_programada BETWEEN %s AND %s
+    """, (
+        list({s['id_curso'] for s in sesiones}),
+        min(s['fecha_programada'] for s in sesiones),
+        max(s['fecha_programada'] for s in sesiones),
+    ))
+    existentes = set(cursor.fetchall())
+
+    nuevas = [s for s in sesiones
+              if (s['id_curso'], s['fecha_programada'], s['hora_inicio']) not in existentes]
+    return nuevas, len(sesiones) - len(nuevas)
+
+
+def asignar_numeros(cursor, sesiones):
+    """Reserva un bloque de numero_sesion por (período, curso) y lo reparte en orden cronológico"""
+    grupos = defaultdict(list)
+    for sesion in sesiones:
+        grupos[(sesion['año'], sesion['semestre'], sesion['corte'], sesion['id_curso'])].append(sesion)
+
+    for (año, semestre, corte, id_curso), grupo in grupos.items():
+        cursor.execute("SELECT siguiente_numero_sesion(%s, %s, %s, %s, %s)",
+                       (año, semestre, corte, id_curso, len(grupo)))
+        primero = cursor.fetchone()[0]
+        for desplazamiento, sesion in enumerate(grupo):
+            sesion['numero_sesion'] = primero + desplazamiento
+            sesion['nombre_sesion'] = f"{sesion['codigo']} - Sesión {sesion['numero_sesion']} (Corte {corte})"
+
+
+def insertar_sesiones(cursor, sesiones, tamano_lote=TAMANO_LOTE):
+    """Un INSERT multi-fila por lote"""
+    filas = [(
+        s['año'], s['semestre'], s['corte'], s['id_curso'], s['numero_sesion'], s['nombre_sesion'],
+        f"Sesión generada del horario semanal ({s['dia_semana']} {s['hora_inicio']:%H:%M}-{s['hora_fin']:%H:%M})",
+        s['fecha_programada'], s['hora_inicio'], s['hora_fin'], s['dia_semana'], s['aula'],
+        s['tolerancia_minutos'], s['duracion_horas'], s['tipo_clase'],
+    ) for s in sesiones]
+
+    for i in range(0, len(filas), tamano_lote):
+        execute_values(cursor, """
+            INSERT INTO sesiones_academicas (
+                año, semestre, corte, id_curso, numero_sesion, nombre_sesion,
+                descripcion, fecha_programada, hora_inicio, hora_fin, dia_semana,
+                aula, tolerancia_minutos, duracion_horas, tipo_clase,
+                estado, asistencia_habilitada
+            ) VALUES %s
+        """, filas[i:i + tamano_lote],
+            template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'programada', false)",
+            page_size=tamano_lote)
+
+
+def generar_horario(especificacion, simular=False, tamano_lote=TAMANO_LOTE):
+    """
+    Materializa el horario de la especificación
+
+    Returns:
+        dict: generadas, existentes, creadas, segundos, sesiones_por_segundo
+    """
+    inicio = time.perf_counter()
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    cursor = conn.cursor()
+
+    try:
+        # Dos generadores a la vez no deben ver las mismas sesiones como nuevas
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('generador_horarios'))")
+
+        cursos = resolver_cursos(cursor, especificacion)
+        sesiones = expandir_horario(especificacion, cursos)
+        nuevas, existentes = filtrar_existentes(cursor, sesiones)
+
+        por_curso = defaultdict(int)
+        for sesion in nuevas:
+            por_curso[sesion['codigo']] += 1
+
+        inicio_insercion = time.perf_counter()
+        if nuevas and not simular:
+            asignar_numeros(cursor, nuevas)
+            insertar_sesiones(cursor, nuevas, tamano_lote)
+            conn.commit()
+        else:
+            conn.rollback()
+        fin = time.perf_counter()
+
+        creadas = 0 if simular else len(nuevas)
+        segundos_insercion = fin - inicio_insercion
+        return {
+            'generadas': len(sesiones),
+            'existentes': existentes,
+            'nuevas': len(nuevas),
+            'creadas': creadas,
+            'por_curso': dict(por_curso),
+            'segundos': fin - inicio,
+            'sesiones_por_segundo': creadas / segundos_insercion if creadas and segundos_insercion > 0 else 0,
+        }
+
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generar las sesiones de un semestre desde un horario semanal')
+    parser.add_argument('especificacion', help='Archivo JSON con el horario')
+    parser.add_argument('--simular', action='store_true', help='Mostrar lo que se crearía sin escribir')
+    parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Filas por INSERT')
+    args = parser.parse_args()
+
+    with open(args.especificacion, encoding='utf-8') as f:
+        especificacion = json.load(f)
+
+    print(f"🗓️ GENERADOR DE HORARIOS {'(SIMULACIÓN)' if args.simular else ''}")
+    print("="*60)
+
+    try:
+        resultado = generar_horario(especificacion, args.simular, args.lote)
+    except (ValueError, KeyError) as e:
+        print(f"❌ Especificación inválida: {e}")
+        sys.exit(1)
+    except psycopg2.Error as e:
+        print(f"❌ Error de base de datos: {e}")
+        sys.exit(1)
+
+    for codigo, cantidad in sorted(resultado['por_curso'].items()):
+        print(f"   📚 {codigo}: {cantidad} sesiones nuevas")
+    print(f"📊 {resultado['generadas']} sesiones en el horario, "
+          f"{resultado['existentes']} ya existían, {resultado['nuevas']} nuevas")
+
+    if args.simular:
+        print("ℹ️ Simulación: no se escribió nada")
+    else:
+        print(f"✅ {resultado['creadas']} sesiones creadas en {resultado['segundos']:.2f}s "
+              f"({resultado['sesiones_por_segundo']:.0f} sesiones/s en la inserción)")
+
+
+if __name__ == "__main__":
+    main()
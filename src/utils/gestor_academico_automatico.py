@@ -1,12 +1,18 @@
 """
 Sistema Académico Automático por Fechas
-Determina automáticamente semestre y corte basándome en el mes actual
+Determina automáticamente semestre y corte según el calendario académico
 """
 
 import psycopg2
 from datetime import datetime, date
 import calendar
 
+try:
+    from src.utils.calendario_academico import obtener_calendario
+except ImportError:
+    # Ejecutado como script desde src/utils
+    from calendario_academico import obtener_calendario
+
 # Configuración de la base de datos
 DATABASE_CONFIG = {
     'host': 'localhost',
@@ -21,31 +27,10 @@ class GestorAcademicoAutomatico:
     Gestiona automáticamente la lógica académica basándose en fechas
     """
     
-    def __init__(self):
-        # CONFIGURACIÓN DEL AÑO ACADÉMICO
-        # Puedes modificar estos rangos según tu institución
-        
-        self.configuracion_academica = {
-            # PRIMER SEMESTRE (Enero - Junio)
-            '2025-1': {
-                'meses': [1, 2, 3, 4, 5, 6],  # Enero a Junio
-                'cortes': {
-                    1: [1, 2],      # Corte 1: Enero-Febrero  
-                    2: [3, 4],      # Corte 2: Marzo-Abril
-                    3: [5, 6]       # Corte 3: Mayo-Junio
-                }
-            },
-            
-            # SEGUNDO SEMESTRE (Julio - Diciembre)
-            '2025-2': {
-                'meses': [7, 8, 9, 10, 11, 12],  # Julio a Diciembre
-                'cortes': {
-                    1: [7, 8],      # Corte 1: Julio-Agosto
-                    2: [9, 10],     # Corte 2: Septiembre-Octubre  
-                    3: [11, 12]     # Corte 3: Noviembre-Diciembre
-                }
-            }
-        }
+    def __init__(self, calendario=None):
+        # CALENDARIO ACADÉMICO: semestres y cortes por rangos de fechas
+        # Se configura en config/calendario_academico.json (ver calendario_academico.py)
+        self.calendario = calendario or obtener_calendario()
     
     def obtener_fecha_actual(self):
         """Obtiene la fecha actual del sistema"""
@@ -53,7 +38,7 @@ class GestorAcademicoAutomatico:
     
     def determinar_semestre_actual(self, fecha=None):
         """
-        Determina el semestre actual basándome en el mes
+        Determina el semestre de una fecha según el calendario académico
         
         Args:
             fecha: Fecha específica (opcional, usa fecha actual si no se proporciona)
@@ -64,20 +49,12 @@ class GestorAcademicoAutomatico:
         if fecha is None:
             fecha = self.obtener_fecha_actual()
         
-        año = fecha.year
-        mes = fecha.month
-        
-        # Determinar semestre basándome en el mes
-        if mes in [1, 2, 3, 4, 5, 6]:
-            semestre = f"{año}-1"
-        else:  # meses 7, 8, 9, 10, 11, 12
-            semestre = f"{año}-2"
-        
-        return año, semestre
+        periodo = self.calendario.resolver(fecha)
+        return periodo.año, periodo.semestre
     
     def determinar_corte_actual(self, fecha=None):
         """
-        Determina el corte actual basándome en el mes
+        Determina el corte de una fecha según el calendario académico
         
         Args:
             fecha: Fecha específica (opcional)
@@ -88,18 +65,8 @@ class GestorAcademicoAutomatico:
         if fecha is None:
             fecha = self.obtener_fecha_actual()
         
-        año, semestre = self.determinar_semestre_actual(fecha)
-        mes = fecha.month
-        
-        # Buscar en qué corte está el mes actual
-        config_semestre = self.configuracion_academica[semestre]
-        
-        for corte_num, meses_corte in config_semestre['cortes'].items():
-            if mes in meses_corte:
-                return año, semestre, corte_num
-        
-        # Si no encuentra, devolver el primer corte del semestre
-        return año, semestre, 1
+        periodo = self.calendario.resolver(fecha)
+        return periodo.año, periodo.semestre, periodo.corte
     
     def obtener_info_academica_completa(self, fecha=None):
         """
@@ -368,67 +335,60 @@ class GestorAcademicoAutomatico:
         finally:
             conn.close()
     
-    def obtener_estadisticas_corte_actual(self):
+    def obtener_estadisticas_corte_actual(self, id_curso=None):
         """
         Obtiene estadísticas del corte académico actual
-        
+
+        Lee una sola fila del rollup estadisticas_corte, que los triggers de
+        schema_estadisticas_corte.sql mantienen al día en cada escritura
+
+        Args:
+            id_curso: Curso específico (opcional, 0 = total del corte)
+
         Returns:
             dict: Estadísticas del corte actual
         """
         año, semestre, corte = self.determinar_corte_actual()
-        
+
         conn = self.conectar_bd()
         if not conn:
             return None
-        
+
         try:
-            # Estadísticas de sesiones
-            query_sesiones = """
-            SELECT 
-                COUNT(*) as total_sesiones,
-                COUNT(CASE WHEN estado = 'finalizada' THEN 1 END) as sesiones_completadas,
-                COUNT(CASE WHEN estado = 'activa' THEN 1 END) as sesiones_activas,
-                COUNT(CASE WHEN estado = 'programada' THEN 1 END) as sesiones_pendientes
-            FROM sesiones_academicas
-            WHERE año = %s AND semestre = %s AND corte = %s;
+            query = """
+            SELECT
+                total_sesiones,
+                sesiones_finalizadas,
+                sesiones_activas,
+                sesiones_programadas,
+                total_asistencias,
+                asistencias_puntuales,
+                asistencias_tardias,
+                ausencias,
+                suma_minutos_tardanza::float / NULLIF(registros_tardanza, 0)
+            FROM estadisticas_corte
+            WHERE año = %s AND semestre = %s AND corte = %s AND id_curso = %s;
             """
-            
+
             cursor = conn.cursor()
-            cursor.execute(query_sesiones, (año, semestre, corte))
-            stats_sesiones = cursor.fetchone()
-            
-            # Estadísticas de asistencias
-            query_asistencias = """
-            SELECT 
-                COUNT(*) as total_asistencias,
-                COUNT(CASE WHEN aa.estado = 'presente' THEN 1 END) as asistencias_puntuales,
-                COUNT(CASE WHEN aa.estado = 'tardanza' THEN 1 END) as asistencias_tardias,
-                COUNT(CASE WHEN aa.estado = 'ausente' THEN 1 END) as ausencias,
-                AVG(aa.minutos_tardanza) as promedio_tardanza
-            FROM asistencias_academicas aa
-            JOIN sesiones_academicas sa ON aa.id_sesion = sa.id_sesion
-            WHERE sa.año = %s AND sa.semestre = %s AND sa.corte = %s;
-            """
-            
-            cursor.execute(query_asistencias, (año, semestre, corte))
-            stats_asistencias = cursor.fetchone()
-            
+            cursor.execute(query, (año, semestre, corte, id_curso or 0))
+            stats = cursor.fetchone() or (0, 0, 0, 0, 0, 0, 0, 0, None)
             cursor.close()
-            
+
             return {
                 'contexto_academico': self.obtener_info_academica_completa(),
                 'sesiones': {
-                    'total': stats_sesiones[0],
-                    'completadas': stats_sesiones[1],
-                    'activas': stats_sesiones[2], 
-                    'pendientes': stats_sesiones[3]
+                    'total': stats[0],
+                    'completadas': stats[1],
+                    'activas': stats[2],
+                    'pendientes': stats[3]
                 },
                 'asistencias': {
-                    'total': stats_asistencias[0] or 0,
-                    'puntuales': stats_asistencias[1] or 0,
-                    'tardias': stats_asistencias[2] or 0,
-                    'ausencias': stats_asistencias[3] or 0,
-                    'promedio_tardanza': float(stats_asistencias[4] or 0)
+                    'total': stats[4],
+                    'puntuales': stats[5],
+                    'tardias': stats[6],
+                    'ausencias': stats[7],
+                    'promedio_tardanza': float(stats[8] or 0)
                 }
             }
             
@@ -438,6 +398,447 @@ class GestorAcademicoAutomatico:
         finally:
             conn.close()
 
+    def obtener_resumen_estudiantes(self, id_curso=None, max_porcentaje=None, orden='asc',
+                                    limite=50, despues_de=None, fecha=None):
+        """
+        Porcentaje de asistencia de cada estudiante en el corte actual
+
+        Lee resumen_asistencia_estudiante con paginación por cursor (keyset)
+        sobre (porcentaje_asistencia, id_estudiante, id_curso), que usa los índices
+        idx_resumen_curso_porcentaje / idx_resumen_corte_porcentaje
+
+        Args:
+            id_curso: Filtrar por curso (opcional, todos los cursos si no se indica)
+            max_porcentaje: Solo estudiantes por debajo de este porcentaje (ej: 80)
+            orden: 'asc' (peor asistencia primero) o 'desc'
+            limite: Tamaño de página
+            despues_de: Tupla (porcentaje, id_estudiante, id_curso) del último elemento de la página
+                        anterior (sin filtro de curso un estudiante aparece una vez por curso)
+            fecha: Fecha para determinar el corte (opcional)
+
+        Returns:
+            dict: Estudiantes de la página y cursor de la siguiente (None si hay error)
+        """
+        año, semestre, corte = self.determinar_corte_actual(fecha)
+        descendente = orden == 'desc'
+        comparador = '<' if descendente else '>'
+        direccion = 'DESC' if descendente else 'ASC'
+
+        condiciones = ["r.año = %s", "r.semestre = %s", "r.corte = %s"]
+        parametros = [año, semestre, corte]
+
+        if id_curso is not None:
+            condiciones.append("r.id_curso = %s")
+            parametros.append(id_curso)
+        if max_porcentaje is not None:
+            condiciones.append("r.porcentaje_asistencia < %s")
+            parametros.append(max_porcentaje)
+        if despues_de is not None:
+            condiciones.append(f"(r.porcentaje_asistencia, r.id_estudiante, r.id_curso) {comparador} (%s, %s, %s)")
+            parametros.extend(despues_de)
+
+        conn = self.conectar_bd()
+        if not conn:
+            return None
+
+        try:
+            query = f"""
+            SELECT
+                r.id_estudiante,
+                u.nombre,
+                u.apellido,
+                r.id_curso,
+                r.sesiones_dictadas,
+                r.presentes,
+                r.tardanzas,
+                r.ausentes,
+                r.minutos_tardanza_total,
+                r.porcentaje_asistencia
+            FROM resumen_asistencia_estudiante r
+            JOIN usuarios u ON u.id_usuario = r.id_estudiante
+            WHERE {' AND '.join(condiciones)}
+            ORDER BY r.porcentaje_asistencia {direccion}, r.id_estudiante {direccion}, r.id_curso {direccion}
+            LIMIT %s;
+            """
+
+            cursor = conn.cursor()
+            cursor.execute(query, parametros + [limite])
+            filas = cursor.fetchall()
+            cursor.close()
+
+            estudiantes = [{
+                'id_estudiante': fila[0],
+                'estudiante': f"{fila[1]} {fila[2]}",
+                'id_curso': fila[3],
+                'sesiones_dictadas': fila[4],
+                'presentes': fila[5],
+                'tardanzas': fila[6],
+                'ausentes': fila[7],
+                'minutos_tardanza_total': fila[8],
+                'porcentaje_asistencia': float(fila[9])
+            } for fila in filas]
+
+            siguiente = None
+            if len(estudiantes) == limite:
+                ultimo = estudiantes[-1]
+                siguiente = (ultimo['porcentaje_asistencia'], ultimo['id_estudiante'], ultimo['id_curso'])
+
+            return {
+                'contexto_academico': self.obtener_info_academica_completa(fecha),
+                'estudiantes': estudiantes,
+                'siguiente': siguiente
+            }
+
+        except Exception as e:
+            print(f"❌ Error obteniendo resumen de estudiantes: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def obtener_sesiones_del_dia(self, fecha=None):
+        """
+        Obtiene todas las sesiones programadas para una fecha con su curso
+        y el conteo de asistencias por estado
+
+        Args:
+            fecha: Fecha específica (opcional, usa la fecha actual si no se proporciona)
+
+        Returns:
+            list: Sesiones del día ordenadas por hora de inicio (None si hay error)
+        """
+        if fecha is None:
+            fecha = self.obtener_fecha_actual().date()
+
+        conn = self.conectar_bd()
+        if not conn:
+            return None
+
+        try:
+            query = """
+            SELECT
+                sa.id_sesion,
+                sa.nombre_sesion,
+                sa.fecha_programada,
+                sa.hora_inicio,
+                sa.hora_fin,
+                sa.aula,
+                sa.estado,
+                sa.asistencia_habilitada,
+                sa.año,
+                sa.semestre,
+                sa.corte,
+                sa.id_curso,
+                c.codigo,
+                c.nombre,
+                COUNT(CASE WHEN aa.estado = 'presente' THEN 1 END) as presentes,
+                COUNT(CASE WHEN aa.estado = 'tardanza' THEN 1 END) as tardanzas,
+                COUNT(CASE WHEN aa.estado = 'ausente' THEN 1 END) as ausentes
+            FROM sesiones_academicas sa
+            LEFT JOIN cursos c ON sa.id_curso = c.id_curso
+            LEFT JOIN asistencias_academicas aa ON aa.id_sesion = sa.id_sesion
+            WHERE sa.fecha_programada = %s
+            GROUP BY sa.id_sesion, c.codigo, c.nombre
+            ORDER BY sa.hora_inicio;
+            """
+
+            cursor = conn.cursor()
+            cursor.execute(query, (fecha,))
+            filas = cursor.fetchall()
+            cursor.close()
+
+            sesiones = []
+            for fila in filas:
+                sesiones.append({
+                    'id_sesion': fila[0],
+                    'nombre_sesion': fila[1],
+                    'fecha_programada': fila[2],
+                    'hora_inicio': fila[3],
+                    'hora_fin': fila[4],
+                    'aula': fila[5],
+                    'estado': fila[6],
+                    'asistencia_habilitada': fila[7],
+                    'año': fila[8],
+                    'semestre': fila[9],
+                    'corte': fila[10],
+                    'id_curso': fila[11],
+                    'curso_codigo': fila[12],
+                    'curso_nombre': fila[13],
+                    'presentes': fila[14],
+                    'tardanzas': fila[15],
+                    'ausentes': fila[16]
+                })
+
+            return sesiones
+
+        except Exception as e:
+            print(f"❌ Error obteniendo sesiones del día: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def obtener_asistencias_recientes(self, limite=10):
+        """
+        Obtiene las últimas asistencias registradas
+
+        Args:
+            limite: Número máximo de registros
+
+        Returns:
+            list: Asistencias más recientes primero (None si hay error)
+        """
+        conn = self.conectar_bd()
+        if not conn:
+            return None
+
+        try:
+            query = """
+            SELECT
+                aa.id_asistencia,
+                u.nombre,
+                u.apellido,
+                aa.fecha_registro,
+                aa.estado,
+                aa.minutos_tardanza,
+                sa.id_sesion,
+                sa.nombre_sesion,
+                c.codigo
+            FROM asistencias_academicas aa
+            JOIN usuarios u ON aa.id_estudiante = u.id_usuario
+            JOIN sesiones_academicas sa ON aa.id_sesion = sa.id_sesion
+            LEFT JOIN cursos c ON sa.id_curso = c.id_curso
+            ORDER BY aa.fecha_registro DESC
+            LIMIT %s;
+            """
+
+            cursor = conn.cursor()
+            cursor.execute(query, (limite,))
+            filas = cursor.fetchall()
+            cursor.close()
+
+            return [{
+                'id_asistencia': fila[0],
+                'estudiante': f"{fila[1]} {fila[2]}",
+                'fecha_registro': fila[3],
+                'estado': fila[4],
+                'minutos_tardanza': fila[5] or 0,
+                'id_sesion': fila[6],
+                'nombre_sesion': fila[7],
+                'curso_codigo': fila[8]
+            } for fila in filas]
+
+        except Exception as e:
+            print(f"❌ Error obteniendo asistencias recientes: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def habilitar_sesion(self, id_sesion):
+        """
+        Habilita la asistencia para una sesión específica
+
+        Returns:
+            dict: Resultado de la operación
+        """
+        conn = self.conectar_bd()
+        if not conn:
+            return {'exito': False, 'mensaje': 'Error de conexión a BD'}
+
+        try:
+            query = """
+            UPDATE sesiones_academicas
+            SET asistencia_habilitada = true,
+                estado = 'activa',
+                actualizada_en = CURRENT_TIMESTAMP
+            WHERE id_sesion = %s
+            RETURNING nombre_sesion;
+            """
+
+            cursor = conn.cursor()
+            cursor.execute(query, (id_sesion,))
+            fila = cursor.fetchone()
+            conn.commit()
+            cursor.close()
+
+            if not fila:
+                return {'exito': False, 'mensaje': f'No existe la sesión {id_sesion}'}
+
+            return {
+                'exito': True,
+                'mensaje': f"Asistencia habilitada para: {fila[0]}",
+                'id_sesion_activa': id_sesion
+            }
+
+        except Exception as e:
+            conn.rollback()
+            return {'exito': False, 'mensaje': f'Error habilitando sesión: {e}'}
+        finally:
+            conn.close()
+
+    def deshabilitar_sesiones(self, id_sesion=None):
+        """
+        Finaliza las sesiones con asistencia habilitada y registra como
+        ausentes a los inscritos sin asistencia (un solo INSERT para todas)
+
+        Args:
+            id_sesion: Sesión específica (opcional, si no se indica se finalizan todas)
+
+        Returns:
+            dict: Resultado de la operación
+        """
+        conn = self.conectar_bd()
+        if not conn:
+            return {'exito': False, 'mensaje': 'Error de conexión a BD'}
+
+        try:
+            query = """
+            UPDATE sesiones_academicas
+            SET asistencia_habilitada = false,
+                estado = 'finalizada',
+                actualizada_en = CURRENT_TIMESTAMP
+            WHERE asistencia_habilitada = true
+            AND (%s IS NULL OR id_sesion = %s)
+            RETURNING id_sesion;
+            """
+
+            cursor = conn.cursor()
+            cursor.execute(query, (id_sesion, id_sesion))
+            sesiones = [fila[0] for fila in cursor.fetchall()]
+            cursor.execute("SELECT marcar_ausencias(%s)", (sesiones,))
+            ausencias = cursor.fetchone()[0]
+            conn.commit()
+            cursor.close()
+
+            return {
+                'exito': True,
+                'mensaje': f'{len(sesiones)} sesiones finalizadas, {ausencias} ausencias registradas',
+                'sesiones_finalizadas': len(sesiones),
+                'ausencias_registradas': ausencias
+            }
+
+        except Exception as e:
+            conn.rollback()
+            return {'exito': False, 'mensaje': f'Error finalizando sesiones: {e}'}
+        finally:
+            conn.close()
+
+    def obtener_sesion_aula(self, aula=None, momento=None, id_curso=None):
+        """
+        Sesión del aula en un momento; si no hay ninguna se crea la automática
+        (función obtener_sesion_aula, src/database/sesion_aula.sql)
+
+        Args:
+            aula: Aula del dispositivo (None = cualquier sesión del momento)
+            momento: Por defecto, ahora
+            id_curso: Curso de la sesión automática (None = sin curso)
+
+        Returns:
+            dict: id_sesion, hora_inicio, hora_fin, creada (None si falló)
+        """
+        if momento is None:
+            momento = datetime.now()
+        año, semestre, corte = self.determinar_corte_actual(momento)
+
+        conn = self.conectar_bd()
+        if not conn:
+            return None
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT sesion, hora_inicio, hora_fin, sesion_creada
+                FROM obtener_sesion_aula(%s, %s, %s, %s, %s, %s)
+            """, (año, semestre, corte, momento, aula, id_curso))
+            resultado = cursor.fetchone()
+            conn.commit()
+            cursor.close()
+
+            return {
+                'id_sesion': resultado[0],
+                'hora_inicio': resultado[1],
+                'hora_fin': resultado[2],
+                'creada': resultado[3]
+            }
+
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Error obteniendo la sesión del aula: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def registrar_asistencias_lote(self, id_sesion, registros, metodo='reconocimiento_facial'):
+        """
+        Registra varios estudiantes en una sesión con un solo INSERT (video, foto grupal).
+        El estado se calcula con calcular_estado_asistencia, la misma regla del
+        registro en vivo; las ausencias del cierre de sesión se reemplazan.
+
+        Args:
+            id_sesion: Sesión a la que pertenecen los registros
+            registros: Lista de (id_estudiante, momento, confianza)
+            metodo: Método de registro
+
+        Returns:
+            dict: Resultado con las filas escritas (los demás ya estaban registrados)
+        """
+        if not registros:
+            return {'exito': True, 'mensaje': 'Sin estudiantes para registrar', 'registradas': []}
+
+        conn = self.conectar_bd()
+        if not conn:
+            return {'exito': False, 'mensaje': 'Error de conexión a BD'}
+
+        try:
+            query = """
+            INSERT INTO asistencias_academicas (
+                id_sesion, id_estudiante, fecha_registro, metodo_registro,
+                confidence_score, estado, minutos_tardanza
+            )
+            SELECT sa.id_sesion, v.id_estudiante, v.momento, %(metodo)s,
+                   v.confianza, e.estado, e.minutos_tardanza
+            FROM sesiones_academicas sa
+            CROSS JOIN unnest(%(estudiantes)s::int[], %(momentos)s::timestamp[], %(confianzas)s::float8[])
+                 AS v(id_estudiante, momento, confianza)
+            CROSS JOIN LATERAL calcular_estado_asistencia(
+                v.momento, sa.fecha_programada + sa.hora_inicio, sa.tolerancia_minutos) e
+            WHERE sa.id_sesion = %(sesion)s
+            ON CONFLICT (id_sesion, id_estudiante) DO UPDATE
+            SET fecha_registro = EXCLUDED.fecha_registro,
+                metodo_registro = EXCLUDED.metodo_registro,
+                confidence_score = EXCLUDED.confidence_score,
+                estado = EXCLUDED.estado,
+                minutos_tardanza = EXCLUDED.minutos_tardanza
+            WHERE asistencias_academicas.metodo_registro = 'cierre_sesion'
+            RETURNING id_estudiante, estado, minutos_tardanza;
+            """
+
+            cursor = conn.cursor()
+            cursor.execute(query, {
+                'sesion': id_sesion,
+                'metodo': metodo,
+                'estudiantes': [int(r[0]) for r in registros],
+                'momentos': [r[1] for r in registros],
+                'confianzas': [float(r[2]) for r in registros],
+            })
+            registradas = [
+                {'id_estudiante': fila[0], 'estado': fila[1], 'minutos_tardanza': fila[2]}
+                for fila in cursor.fetchall()
+            ]
+            conn.commit()
+            cursor.close()
+
+            return {
+                'exito': True,
+                'mensaje': f'{len(registradas)} asistencias registradas, '
+                           f'{len(registros) - len(registradas)} ya estaban registradas',
+                'registradas': registradas
+            }
+
+        except Exception as e:
+            conn.rollback()
+            return {'exito': False, 'mensaje': f'Error registrando asistencias: {e}'}
+        finally:
+            conn.close()
+
 def mostrar_informacion_actual():
     """Función de prueba para mostrar información actual"""
     gestor = GestorAcademicoAutomatico()
@@ -0,0 +1,417 @@
+"""
+Ingesta de embeddings desde dispositivos de borde
+Los kioscos de las puertas corren el mismo codificador (face_recognition) y
+envían solo los vectores de 128 dimensiones, no el video: el servidor los
+busca en la galería compartida y registra la asistencia.
+
+Formato binario de un lote (little-endian, application/octet-stream):
+    cabecera  8 bytes   b'EMB1', versión (uint8), relleno, cantidad (uint16)
+    registro  532 bytes marca (float64, epoch en segundos), caja (4 x uint16:
+                        top, right, bottom, left), calidad (float32),
+                        embedding (128 x float32)
+
+Un registro ocupa 532 bytes frente a ~2.5 KB como lista JSON, y un frame
+JPEG de 640x480 ronda los 40 KB. El servidor lo lee sin copiar con
+np.frombuffer.
+
+Cada dispositivo se autentica con las cabeceras X-Dispositivo y
+Authorization: Bearer <token> (tabla dispositivos_borde, solo el SHA-256).
+
+Uso:
+    python src/utils/ingesta_embeddings.py crear puerta_norte "Puerta norte" --aula A-101
+    python src/utils/ingesta_embeddings.py listar
+    python src/utils/ingesta_embeddings.py revocar puerta_norte
+    python src/utils/ingesta_embeddings.py enviar http://localhost:5000 puerta_norte TOKEN --registros 40
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import secrets
+import select
+import struct
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+import psycopg2
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+MAGIA = b'EMB1'
+VERSION = 1
+CABECERA = struct.Struct('<4sBxH')
+REGISTRO = np.dtype([
+    ('marca', '<f8'),
+    ('caja', '<u2', (4,)),
+    ('calidad', '<f4'),
+    ('embedding', '<f4', (128,)),
+])
+MAX_REGISTROS = 1024  # Registros por lote (cuerpo de ~530 KB como máximo)
+CANAL_DISPOSITIVOS = 'dispositivos_borde'  # NOTIFY de src/database/dispositivos_borde.sql
+ESPERA_REINTENTO = 5.0  # Segundos antes de reconectar el LISTEN
+
+TAMANO_MAXIMO = CABECERA.size + MAX_REGISTROS * REGISTRO.itemsize
+CALIDAD_MINIMA = 0.5  # Calidad reportada por el kiosco por debajo de la cual se descarta
+ANTIGUEDAD_MAXIMA = 120  # Segundos: marcas más viejas (reloj atrasado o lote repetido) se descartan
+
+# ------------------------------------------------------------
+# Formato binario
+# ------------------------------------------------------------
+
+
+def codificar_lote(marcas, cajas, calidades, embeddings):
+    """
+    Arma el cuerpo binario de un lote (lado del kiosco)
+
+    Args:
+        marcas: Epoch en segundos de cada detección
+        cajas: (top, right, bottom, left) de cada rostro
+        calidades: Calidad 0-1 de cada rostro
+        embeddings: Vectores de 128 dimensiones
+
+    Returns:
+        bytes: Cabecera + registros
+    """
+    registros = np.zeros(len(marcas), dtype=REGISTRO)
+    registros['marca'] = marcas
+    registros['caja'] = np.asarray(cajas, dtype=np.uint16).reshape(-1, 4)
+    registros['calidad'] = calidades
+    registros['embedding'] = np.asarray(embeddings, dtype=np.float32).reshape(-1, 128)
+    return CABECERA.pack(MAGIA, VERSION, len(registros)) + registros.tobytes()
+
+
+def decodificar_lote(datos):
+    """
+    Valida y lee un lote sin copiar los datos
+
+    Returns:
+        np.ndarray: Arreglo estructurado con dtype REGISTRO
+
+    Raises:
+        ValueError: Si la cabecera, el tamaño o los valores no son válidos
+    """
+    if len(datos) < CABECERA.size:
+        raise ValueError("Lote incompleto: falta la cabecera")
+    magia, version, cantidad = CABECERA.unpack_from(datos)
+    if magia != MAGIA or version != VERSION:
+        raise ValueError("Formato de lote desconocido")
+    if cantidad > MAX_REGISTROS:
+        raise ValueError(f"Demasiados registros en el lote (máximo {MAX_REGISTROS})")
+    if len(datos) != CABECERA.size + cantidad * REGISTRO.itemsize:
+        raise ValueError(f"Tamaño inválido: se esperaban {cantidad} registros de {REGISTRO.itemsize} bytes")
+
+    registros = np.frombuffer(datos, dtype=REGISTRO, count=cantidad, offset=CABECERA.size)
+    if not np.isfinite(registros['embedding']).all() or not np.isfinite(registros['marca']).all():
+        raise ValueError("El lote contiene valores no finitos")
+    return registros
+
+
+# ------------------------------------------------------------
+# Dispositivos
+# ------------------------------------------------------------
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class AutenticadorDispositivos:
+    """
+    Valida id + token de los kioscos contra dispositivos_borde, con una
+    cache en memoria para no consultar la BD en cada lote
+
+    La revocación es inmediata: un hilo escucha el canal 'dispositivos_borde'
+    (LISTEN/NOTIFY) y olvida el dispositivo que cambió, aunque lo haya revocado
+    otro proceso (la CLI). Mientras esa conexión no está escuchando la cache no
+    se usa y cada lote consulta la BD.
+    """
+
+    def __init__(self, ttl_segundos=60):
+        self.ttl_segundos = ttl_segundos
+        self._lock = threading.Lock()
+        self._dispositivos = {}  # id -> (fila, cargado_en)
+        self._generacion = 0  # Sube con cada invalidación: una carga en curso no guarda datos viejos
+        self._escuchando = False
+        self._hilo = None
+        self._estadisticas = {}
+
+    def _cargar(self, id_dispositivo):
+        conn = psycopg2.connect(**DATABASE_CONFIG)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT id_dispositivo, nombre, aula, token_hash
+                FROM dispositivos_borde
+                WHERE id_dispositivo = %s AND activo = true
+            """, (id_dispositivo,))
+            fila = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+        if fila is None:
+            return None
+        return {'id_dispositivo': fila[0], 'nombre': fila[1], 'aula': fila[2], 'token_hash': fila[3]}
+
+    def autenticar(self, id_dispositivo, token):
+        """
+        Returns:
+            dict: id_dispositivo, nombre, aula (None si no está autorizado)
+        """
+        if not id_dispositivo or not token:
+            return None
+
+        with self._lock:
+            if self._hilo is None:
+                # Al primer uso y no al importar: con gunicorn --preload cada worker escucha por su cuenta
+                self._hilo = threading.Thread(target=self._escuchar, name="dispositivos-borde", daemon=True)
+                self._hilo.start()
+            dispositivo, cargado_en = self._dispositivos.get(id_dispositivo, (None, 0))
+            generacion = self._generacion
+            usar_cache = self._escuchando
+        if not usar_cache or time.time() - cargado_en >= self.ttl_segundos:
+            dispositivo = self._cargar(id_dispositivo)
+            with self._lock:
+                if len(self._dispositivos) >= 256:
+                    # Ids inventados: que no crezca sin límite
+                    self._dispositivos = {}
+                if generacion == self._generacion:
+                    self._dispositivos[id_dispositivo] = (dispositivo, time.time())
+
+        if dispositivo is None or not hmac.compare_digest(dispositivo['token_hash'], hash_token(token)):
+            return None
+        return dispositivo
+
+    def invalidar(self, id_dispositivo=None):
+        """Olvida la cache (después de revocar un token)"""
+        with self._lock:
+            self._generacion += 1
+            if id_dispositivo is None:
+                self._dispositivos = {}
+            else:
+                self._dispositivos.pop(id_dispositivo, None)
+
+    def _escuchar(self):
+        """Hilo: invalida cada dispositivo notificado; si la conexión cae, deja de usar la cache"""
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**DATABASE_CONFIG)
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {CANAL_DISPOSITIVOS}")
+                cursor.close()
+
+                # Lo cargado antes del LISTEN pudo cambiar sin aviso
+                self.invalidar()
+                with self._lock:
+                    self._escuchando = True
+
+                while True:
+                    listos, _, _ = select.select([conn], [], [], 60)
+                    if listos:
+                        conn.poll()
+                        while conn.notifies:
+                            self.invalidar(conn.notifies.pop().payload)
+                    else:
+                        # Sin notificaciones en un minuto: comprobar que la conexión sigue viva
+                        cursor = conn.cursor()
+                        cursor.execute("SELECT 1")
+                        cursor.close()
+            except Exception as e:
+                print(f"❌ Escucha de dispositivos de borde: {e}")
+            finally:
+                with self._lock:
+                    self._escuchando = False
+                if conn is not None:
+                    conn.close()
+
+            time.sleep(ESPERA_REINTENTO)
+
+    def registrar_lote(self, id_dispositivo, registros, bytes_recibidos, reconocidos):
+        with self._lock:
+            datos = self._estadisticas.setdefault(id_dispositivo, {
+                'lotes': 0, 'registros': 0, 'bytes': 0, 'reconocidos': 0, 'ultimo_envio': None
+            })
+            datos['lotes'] += 1
+            datos['registros'] += registros
+            datos['bytes'] += bytes_recibidos
+            datos['reconocidos'] += reconocidos
+            datos['ultimo_envio'] = time.time()
+
+    def estadisticas(self):
+        """Lotes, registros, bytes y reconocidos por dispositivo desde el arranque"""
+        with self._lock:
+            return {id_dispositivo: dict(datos) for id_dispositivo, datos in self._estadisticas.items()}
+
+
+def crear_dispositivo(id_dispositivo, nombre, aula=None):
+    """
+    Registra un kiosco (o le asigna un token nuevo)
+
+    Returns:
+        str: Token en claro; solo se muestra esta vez
+    """
+    token = secrets.token_urlsafe(32)
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO dispositivos_borde (id_dispositivo, nombre, aula, token_hash)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (id_dispositivo) DO UPDATE
+            SET nombre = EXCLUDED.nombre, aula = EXCLUDED.aula,
+                token_hash = EXCLUDED.token_hash, activo = true
+        """, (id_dispositivo, nombre, aula, hash_token(token)))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return token
+
+
+def revocar_dispositivo(id_dispositivo):
+    """
+    Desactiva un kiosco; el trigger de dispositivos_borde lo notifica y los
+    servidores en marcha rechazan su token desde el siguiente lote
+    """
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("UPDATE dispositivos_borde SET activo = false WHERE id_dispositivo = %s", (id_dispositivo,))
+        conn.commit()
+        return cursor.rowcount > 0
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def listar_dispositivos():
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT id_dispositivo, nombre, aula, activo, creado_en
+            FROM dispositivos_borde ORDER BY id_dispositivo
+        """)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# ------------------------------------------------------------
+# Cliente de prueba (simula un kiosco)
+# ------------------------------------------------------------
+
+
+def enviar_lote(url, id_dispositivo, token, cuerpo):
+    """POST de un lote a /api/ingest/embeddings; devuelve la respuesta JSON"""
+    peticion = urllib.request.Request(
+        url.rstrip('/') + '/api/ingest/embeddings', data=cuerpo, method='POST',
+        headers={
+            'Content-Type': 'application/octet-stream',
+            'X-Dispositivo': id_dispositivo,
+            'Authorization': f'Bearer {token}',
+        })
+    try:
+        with urllib.request.urlopen(peticion, timeout=30) as respuesta:
+            return json.loads(respuesta.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read() or b'{}')
+
+
+def simular_kiosco(args):
+    """Envía lotes con embeddings de la galería (más ruido) y mide el tamaño y la latencia"""
+    try:
+        from src.utils.galeria_rostros import GaleriaRostros
+    except ImportError:
+        # Ejecutado como script desde src/utils
+        from galeria_rostros import GaleriaRostros
+
+    galeria = GaleriaRostros()
+    if not galeria.cargar_desde_bd():
+        print("❌ La galería está vacía")
+        sys.exit(1)
+
+    generador = np.random.default_rng(0)
+    latencias = []
+    for _ in range(args.lotes):
+        indices = generador.integers(0, len(galeria.matriz), size=args.registros)
+        embeddings = galeria.matriz[indices] + generador.normal(0, 0.01, size=(args.registros, 128))
+        cuerpo = codificar_lote(
+            np.full(args.registros, time.time()), np.tile([100, 220, 220, 100], (args.registros, 1)),
+            np.full(args.registros, 0.9), embeddings)
+
+        inicio = time.perf_counter()
+        respuesta = enviar_lote(args.url, args.dispositivo, args.token, cuerpo)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        if not respuesta.get('success'):
+            print(f"❌ {respuesta.get('message')}")
+            sys.exit(1)
+
+    tamano_json = len(json.dumps({'embeddings': embeddings.tolist()}))
+    print(f"📦 Lote de {args.registros} registros: {len(cuerpo)} bytes (JSON: ~{tamano_json} bytes)")
+    print(f"⏱️ {args.lotes} lotes, latencia media {np.mean(latencias):.1f} ms "
+          f"({args.registros * args.lotes / (sum(latencias) / 1000):.0f} registros/s)")
+    print(f"✅ Última respuesta: {respuesta.get('message')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dispositivos de borde que envían embeddings')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    crear = comandos.add_parser('crear', help='Registrar un kiosco y generar su token')
+    crear.add_argument('id_dispositivo')
+    crear.add_argument('nombre')
+    crear.add_argument('--aula', help='Aula donde está instalado')
+
+    comandos.add_parser('listar', help='Listar los kioscos registrados')
+
+    revocar = comandos.add_parser('revocar', help='Desactivar un kiosco')
+    revocar.add_argument('id_dispositivo')
+
+    enviar = comandos.add_parser('enviar', help='Simular un kiosco contra el servidor')
+    enviar.add_argument('url')
+    enviar.add_argument('dispositivo')
+    enviar.add_argument('token')
+    enviar.add_argument('--registros', type=int, default=40, help='Registros por lote')
+    enviar.add_argument('--lotes', type=int, default=20, help='Lotes a enviar')
+
+    args = parser.parse_args()
+
+    try:
+        if args.comando == 'crear':
+            token = crear_dispositivo(args.id_dispositivo, args.nombre, args.aula)
+            print(f"✅ Dispositivo {args.id_dispositivo} registrado")
+            print(f"🔑 Token (guárdelo, no se vuelve a mostrar): {token}")
+        elif args.comando == 'listar':
+            for id_dispositivo, nombre, aula, activo, creado_en in listar_dispositivos():
+                icono = "✅" if activo else "⛔"
+                print(f"{icono} {id_dispositivo:<20} {nombre:<30} {aula or '-':<10} {creado_en:%Y-%m-%d}")
+        elif args.comando == 'revocar':
+            if revocar_dispositivo(args.id_dispositivo):
+                print(f"⛔ Dispositivo {args.id_dispositivo} revocado")
+            else:
+                print(f"❌ No existe el dispositivo {args.id_dispositivo}")
+                sys.exit(1)
+        elif args.comando == 'enviar':
+            simular_kiosco(args)
+    except psycopg2.Error as e:
+        print(f"❌ Error de base de datos: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
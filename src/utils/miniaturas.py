@@ -0,0 +1,110 @@
+"""
+Fotos como recursos binarios: JPEG completo y miniatura con caché LRU
+El preview del registro y las fotos de los estudiantes se sirven una por una
+como image/jpeg (no en base64 dentro de un JSON, que pesa un 33% más y el
+navegador tiene que recibir y parsear completo antes de mostrar nada).
+
+Cada imagen se codifica una sola vez por tamaño y queda en una caché LRU
+acotada por entradas y bytes. El ETag es un hash del JPEG: con él y
+Cache-Control el navegador no vuelve a descargar lo que ya tiene.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import cv2
+
+TAMANOS = {'thumb': 160, 'full': None}  # Lado mayor en píxeles (None = tamaño original)
+CALIDAD_JPEG = {'thumb': 75, 'full': 90}
+MAX_ENTRADAS = 256
+MAX_BYTES = 32 * 1024 * 1024
+
+
+def codificar(imagen, tamano='full'):
+    """
+    JPEG de una imagen BGR, reducida si es una miniatura
+
+    Returns:
+        bytes: JPEG codificado
+
+    Raises:
+        ValueError: Tamaño desconocido o imagen que no se pudo codificar
+    """
+    if tamano not in TAMANOS:
+        raise ValueError(f"Tamaño desconocido: {tamano} (opciones: {', '.join(TAMANOS)})")
+    if imagen is None:
+        raise ValueError("Imagen vacía")
+
+    lado = TAMANOS[tamano]
+    alto, ancho = imagen.shape[:2]
+    if lado and max(alto, ancho) > lado:
+        escala = lado / max(alto, ancho)
+        imagen = cv2.resize(imagen, (max(1, round(ancho * escala)), max(1, round(alto * escala))),
+                            interpolation=cv2.INTER_AREA)
+
+    ok, buffer = cv2.imencode('.jpg', imagen, [cv2.IMWRITE_JPEG_QUALITY, CALIDAD_JPEG[tamano]])
+    if not ok:
+        raise ValueError("No se pudo codificar la imagen")
+    return buffer.tobytes()
+
+
+class CacheMiniaturas:
+    """
+    JPEG ya codificados por clave (tuplas; el primer elemento agrupa las
+    entradas que se descartan juntas, p. ej. el token de una sesión)
+    """
+
+    def __init__(self, max_entradas=MAX_ENTRADAS, max_bytes=MAX_BYTES):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # clave -> (jpeg, etag)
+        self._bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, generar):
+        """
+        Args:
+            clave: Identifica la imagen y su versión (incluye el tamaño)
+            generar: Función sin argumentos que devuelve el JPEG (solo si no está en caché)
+
+        Returns:
+            tuple: (jpeg, etag)
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada
+            self.fallos += 1
+
+        # Codificar fuera del lock: dos peticiones simultáneas a lo sumo codifican dos veces
+        jpeg = generar()
+        entrada = (jpeg, hashlib.md5(jpeg).hexdigest()[:20])
+
+        with self._lock:
+            if clave not in self._entradas:
+                self._entradas[clave] = entrada
+                self._bytes += len(jpeg)
+                while self._entradas and (len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes):
+                    _, (descartado, _) = self._entradas.popitem(last=False)
+                    self._bytes -= len(descartado)
+        return entrada
+
+    def descartar(self, grupo):
+        """Quita las entradas cuya clave empieza por grupo (sesión cerrada o reiniciada)"""
+        with self._lock:
+            for clave in [c for c in self._entradas if c[0] == grupo]:
+                self._bytes -= len(self._entradas.pop(clave)[0])
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+            }
@@ -0,0 +1,326 @@
+"""
+Planificador del ciclo de vida de las sesiones académicas
+Lleva las sesiones de 'programada' a 'activa' (asistencia habilitada) al llegar
+su hora_inicio y las finaliza al llegar su hora_fin, registrando las ausencias
+(cerrar_sesiones de src/database/cierre_sesiones.sql).
+
+Funcionamiento:
+    - Un heap (min-heap) guarda los próximos límites (momento, sesión, tipo) de
+      hoy y mañana; el hilo duerme exactamente hasta el primero.
+    - Los límites que vencen juntos se aplican con un UPDATE por tipo.
+    - Las sesiones creadas o reprogramadas por cualquier proceso llegan por
+      LISTEN/NOTIFY (src/database/notificaciones_sesiones.sql) y solo esas se
+      consultan y agregan al heap.
+    - A medianoche se recarga el horizonte del día siguiente.
+    - Un solo proceso aplica las transiciones aunque lo inicien varios (workers
+      de gunicorn): el que toma el advisory lock del planificador; los demás
+      esperan y lo reemplazan si ese proceso termina.
+
+Uso:
+    python src/utils/planificador_sesiones.py      # ejecutarlo solo (sin main.py)
+"""
+
+import heapq
+import select
+import socket
+import threading
+from datetime import datetime, timedelta, time as hora
+
+import psycopg2
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+CANAL = 'sesiones_academicas'
+BLOQUEO = 'planificador_sesiones'  # pg_try_advisory_lock(hashtext(BLOQUEO)): un planificador activo
+ESPERA_REINTENTO = 10  # Segundos entre intentos de conexión o de tomar el bloqueo
+ESTADOS_ABIERTOS = ('programada', 'activa', 'en_curso')
+
+# Tipos de límite; el orden resuelve empates (activar antes de finalizar)
+INICIO, FIN, RECARGA = 0, 1, 2
+
+CONSULTA_SESIONES = """
+    SELECT id_sesion, fecha_programada, hora_inicio, hora_fin, estado
+    FROM sesiones_academicas
+"""
+
+
+class PlanificadorSesiones:
+    """
+    Hilo que aplica las transiciones programada -> activa -> finalizada en
+    el momento exacto de cada límite de horario
+    """
+
+    def __init__(self, al_transicionar=None, dias_horizonte=1, espera_maxima=300):
+        """
+        Args:
+            al_transicionar: Función sin argumentos llamada después de cada lote
+                             de transiciones (p. ej. invalidar la cache del dashboard)
+            dias_horizonte: Días, además de hoy, que se mantienen en el heap
+            espera_maxima: Segundos máximos de espera (por si cambia el reloj del sistema)
+        """
+        self.al_transicionar = al_transicionar
+        self.dias_horizonte = dias_horizonte
+        self.espera_maxima = espera_maxima
+
+        self._heap = []
+        self._programacion = {}  # id_sesion -> (momento_inicio, momento_fin)
+        self._ultima_fecha = None
+        self._conn = None
+
+        self._hilo = None
+        self._activo = False
+        self._lock = threading.Lock()
+        self._pendientes = set()
+        self._despertar_lectura, self._despertar_escritura = socket.socketpair()
+
+        self.transiciones = {'activadas': 0, 'finalizadas': 0, 'ausencias': 0}
+
+    # ------------------------------------------------------------
+    # API pública (cualquier hilo)
+    # ------------------------------------------------------------
+
+    def iniciar(self):
+        """Inicia el hilo si no corre (se puede llamar en cada petición)"""
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._activo = True
+            self._hilo = threading.Thread(target=self._ejecutar, name='planificador_sesiones', daemon=True)
+            self._hilo.start()
+        print("🗓️ Planificador de sesiones iniciado")
+
+    def detener(self):
+        self._activo = False
+        self._despertar()
+        if self._hilo is not None:
+            self._hilo.join(timeout=5)
+
+    def refrescar(self, ids_sesion):
+        """Vuelve a leer esas sesiones y actualiza sus límites (sin esperar NOTIFY)"""
+        with self._lock:
+            self._pendientes.update(ids_sesion)
+        self._despertar()
+
+    def _despertar(self):
+        try:
+            self._despertar_escritura.send(b'x')
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------
+    # Heap de límites (solo el hilo del planificador)
+    # ------------------------------------------------------------
+
+    def _agendar(self, filas, ponerse_al_dia):
+        """
+        Agrega al heap los límites de las sesiones indicadas
+
+        Args:
+            filas: Resultado de CONSULTA_SESIONES
+            ponerse_al_dia: Si es False (refresco por NOTIFY) no se agenda un fin
+                            ya pasado, para no cerrar una sesión recién reabierta
+        """
+        ahora = datetime.now()
+        for id_sesion, fecha, hora_inicio, hora_fin, estado in filas:
+            if estado not in ESTADOS_ABIERTOS or fecha > self._ultima_fecha:
+                self._programacion.pop(id_sesion, None)
+                continue
+
+            inicio = datetime.combine(fecha, hora_inicio)
+            fin = datetime.combine(fecha, hora_fin)
+            if self._programacion.get(id_sesion) == (inicio, fin):
+                continue
+            if not ponerse_al_dia and fin <= ahora:
+                continue
+
+            # Los límites anteriores de la sesión quedan obsoletos y se descartan al salir del heap
+            self._programacion[id_sesion] = (inicio, fin)
+            if estado == 'programada':
+                heapq.heappush(self._heap, (inicio, INICIO, id_sesion))
+            heapq.heappush(self._heap, (fin, FIN, id_sesion))
+
+    def _cargar(self):
+        """Carga completa: sesiones abiertas de hoy hasta el horizonte"""
+        hoy = datetime.now().date()
+        self._heap = []
+        self._programacion = {}
+        self._ultima_fecha = hoy + timedelta(days=self.dias_horizonte)
+
+        cursor = self._conn.cursor()
+        cursor.execute(CONSULTA_SESIONES + """
+            WHERE fecha_programada <= %s
+            AND estado IN ('programada', 'activa', 'en_curso')
+        """, (self._ultima_fecha,))
+        self._agendar(cursor.fetchall(), ponerse_al_dia=True)
+        cursor.close()
+
+        heapq.heappush(self._heap, (datetime.combine(hoy + timedelta(days=1), hora.min), RECARGA, 0))
+        print(f"🗓️ Planificador: {len(self._programacion)} sesiones hasta {self._ultima_fecha}")
+
+    def _refrescar_ids(self, ids_sesion):
+        cursor = self._conn.cursor()
+        cursor.execute(CONSULTA_SESIONES + "WHERE id_sesion = ANY(%s)", (list(ids_sesion),))
+        filas = cursor.fetchall()
+        cursor.close()
+
+        for id_eliminada in set(ids_sesion) - {fila[0] for fila in filas}:
+            self._programacion.pop(id_eliminada, None)
+        self._agendar(filas, ponerse_al_dia=False)
+
+    # ------------------------------------------------------------
+    # Transiciones
+    # ------------------------------------------------------------
+
+    def _procesar_vencidos(self):
+        """Aplica en lote todos los límites cuyo momento ya llegó"""
+        ahora = datetime.now()
+        activar = []
+        finalizar = []
+        recargar = False
+
+        while self._heap and self._heap[0][0] <= ahora:
+            momento, tipo, id_sesion = heapq.heappop(self._heap)
+            if tipo == RECARGA:
+                recargar = True
+                continue
+
+            programacion = self._programacion.get(id_sesion)
+            if programacion is None or programacion[tipo] != momento:
+                continue  # límite obsoleto (sesión reprogramada, cerrada o eliminada)
+
+            if tipo == INICIO:
+                activar.append(id_sesion)
+            else:
+                finalizar.append(id_sesion)
+                del self._programacion[id_sesion]
+
+        if activar or finalizar:
+            self._aplicar(activar, finalizar, ahora)
+
+        if recargar:
+            self._cargar()
+
+    def _aplicar(self, activar, finalizar, ahora):
+        cursor = self._conn.cursor()
+        activadas = finalizadas = ausencias = 0
+
+        if activar:
+            cursor.execute("""
+                UPDATE sesiones_academicas
+                SET estado = 'activa',
+                    asistencia_habilitada = true,
+                    actualizada_en = CURRENT_TIMESTAMP
+                WHERE id_sesion = ANY(%s) AND estado = 'programada'
+            """, (activar,))
+            activadas = cursor.rowcount
+
+        if finalizar:
+            # Cierra todas las vencidas (no solo las del heap) y marca ausencias en un solo INSERT
+            cursor.execute("SELECT sesiones_cerradas, ausencias FROM cerrar_sesiones(%s)", (ahora,))
+            finalizadas, ausencias = cursor.fetchone()
+
+        cursor.close()
+
+        self.transiciones['activadas'] += activadas
+        self.transiciones['finalizadas'] += finalizadas
+        self.transiciones['ausencias'] += ausencias
+
+        if activadas or finalizadas:
+            print(f"🗓️ {ahora:%H:%M:%S} - {activadas} sesiones activadas, "
+                  f"{finalizadas} finalizadas, {ausencias} ausencias")
+            if self.al_transicionar:
+                try:
+                    self.al_transicionar()
+                except Exception as e:
+                    print(f"⚠️ Planificador: error en al_transicionar: {e}")
+
+    # ------------------------------------------------------------
+    # Bucle principal
+    # ------------------------------------------------------------
+
+    def _esperar(self):
+        """Duerme hasta el próximo límite, una notificación o una llamada a refrescar()"""
+        espera = self.espera_maxima
+        if self._heap:
+            espera = min(espera, max(0.0, (self._heap[0][0] - datetime.now()).total_seconds()))
+
+        listos, _, _ = select.select([self._conn, self._despertar_lectura], [], [], espera)
+
+        ids = set()
+        if self._despertar_lectura in listos:
+            self._despertar_lectura.recv(4096)
+            with self._lock:
+                ids.update(self._pendientes)
+                self._pendientes.clear()
+
+        if self._conn in listos:
+            self._conn.poll()
+            while self._conn.notifies:
+                notificacion = self._conn.notifies.pop()
+                if notificacion.payload.isdigit():
+                    ids.add(int(notificacion.payload))
+
+        if ids and self._activo:
+            self._refrescar_ids(ids)
+
+    def _conectar(self):
+        self._conn = psycopg2.connect(**DATABASE_CONFIG)
+        # Cada transición es una sola sentencia: autocommit, y NOTIFY llega sin transacciones abiertas
+        self._conn.autocommit = True
+        cursor = self._conn.cursor()
+        cursor.execute(f"LISTEN {CANAL}")
+        cursor.close()
+
+    def _tomar_bloqueo(self):
+        """True si este proceso es el planificador activo (el bloqueo se suelta al cerrar la conexión)"""
+        cursor = self._conn.cursor()
+        cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (BLOQUEO,))
+        tomado = cursor.fetchone()[0]
+        cursor.close()
+        return tomado
+
+    def _ejecutar(self):
+        en_espera = False
+        while self._activo:
+            try:
+                # LISTEN antes de cargar para no perder sesiones creadas entre medio
+                self._conectar()
+                if self._tomar_bloqueo():
+                    en_espera = False
+                    self._cargar()
+                    while self._activo:
+                        self._procesar_vencidos()
+                        self._esperar()
+                elif not en_espera:
+                    print("🗓️ Planificador en espera: otro proceso aplica las transiciones")
+                    en_espera = True
+            except Exception as e:
+                # Cualquier error (no solo de la BD) reinicia el ciclo en vez de terminar el hilo
+                print(f"❌ Planificador de sesiones: {e}")
+            finally:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
+            if self._activo:
+                # Reintentar en unos segundos (detener() despierta antes)
+                select.select([self._despertar_lectura], [], [], ESPERA_REINTENTO)
+
+        print("🗓️ Planificador de sesiones detenido")
+
+
+if __name__ == "__main__":
+    planificador = PlanificadorSesiones()
+    planificador.iniciar()
+    try:
+        while planificador._hilo.is_alive():
+            planificador._hilo.join(timeout=1)
+    except KeyboardInterrupt:
+        planificador.detener()
@@ -0,0 +1,150 @@
+"""
+Procesamiento de rostros compartido
+Detección y codificación con los perfiles de detección y los umbrales de
+reconocimiento de main.py. Lo usan las cámaras, los benchmarks y el
+procesamiento de video por lotes, para que todos reconozcan igual.
+
+También la calidad de imagen (nitidez, exposición, contraste) que se guarda
+en embeddings_faciales.quality_score y con la que se eligen los frames del
+registro, y la frontalidad del rostro (pose).
+"""
+
+import multiprocessing
+import os
+
+import cv2
+import face_recognition
+import numpy as np
+
+# Parámetros de reconocimiento balanceados
+TOLERANCIA = 0.45  # Distancia máxima para considerar que dos rostros coinciden
+CONFIANZA_MINIMA = 0.55  # Confianza (1 - distancia) mínima para registrar asistencia
+UMBRAL_DUPLICADO = 0.40  # Distancia por debajo de la cual dos registros son la misma persona
+
+PERFILES_DETECCION = {
+    # Frame a la mitad con HOG (rápido, rostros cercanos)
+    'rapido': {'escala': 0.5, 'modelo': 'hog', 'muestreo': 1},
+    # Resolución completa y un muestreo extra para rostros pequeños (aulas grandes)
+    'lejano': {'escala': 1.0, 'modelo': 'hog', 'muestreo': 2},
+    # CNN de dlib: más precisa, requiere GPU para tiempo real
+    'preciso': {'escala': 0.5, 'modelo': 'cnn', 'muestreo': 1},
+}
+
+NITIDEZ_REFERENCIA = 150.0  # Varianza del laplaciano que puntúa 0.5 en nitidez
+LADO_CALIDAD_ROSTRO = 128  # Los rostros se normalizan a este tamaño antes de puntuar
+
+
+def detectar_y_codificar(frame, perfil):
+    """
+    Encuentra los rostros de un frame y calcula su embedding
+
+    Args:
+        frame: Imagen BGR (OpenCV)
+        perfil: Perfil de PERFILES_DETECCION (escala, modelo, muestreo)
+
+    Returns:
+        tuple: (ubicaciones (top, right, bottom, left) en coordenadas del frame, encodings)
+    """
+    escala = perfil['escala']
+    small_frame = cv2.resize(frame, (0, 0), fx=escala, fy=escala) if escala != 1 else frame
+    rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+
+    face_locations = face_recognition.face_locations(
+        rgb_small_frame, number_of_times_to_upsample=perfil['muestreo'], model=perfil['modelo'])
+    face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
+
+    # Escalar de vuelta las coordenadas
+    ubicaciones = [
+        (int(top / escala), int(right / escala), int(bottom / escala), int(left / escala))
+        for top, right, bottom, left in face_locations
+    ]
+    return ubicaciones, face_encodings
+
+
+def puntuar_calidad(imagenes, submuestreo=1):
+    """
+    Calidad 0-1 de varias imágenes del mismo tamaño en una sola pasada vectorizada
+
+    Nitidez (varianza del laplaciano), exposición (brillo medio cerca del gris
+    medio) y contraste (desviación estándar del gris).
+
+    Args:
+        imagenes: Pila (N, alto, ancho, 3) BGR o (N, alto, ancho) en gris, uint8
+        submuestreo: Paso de muestreo de píxeles (2 = a la mitad, más rápido; las
+                     puntuaciones solo son comparables con el mismo submuestreo)
+
+    Returns:
+        np.ndarray: Una puntuación por imagen
+    """
+    pila = np.asarray(imagenes)[:, ::submuestreo, ::submuestreo]
+    if pila.ndim == 4:
+        gris = pila.astype(np.float32) @ np.array([0.114, 0.587, 0.299], dtype=np.float32)
+    else:
+        gris = pila.astype(np.float32)
+
+    laplaciano = (4 * gris[:, 1:-1, 1:-1] - gris[:, :-2, 1:-1] - gris[:, 2:, 1:-1]
+                  - gris[:, 1:-1, :-2] - gris[:, 1:-1, 2:])
+    nitidez = laplaciano.var(axis=(1, 2))
+    nitidez = nitidez / (nitidez + NITIDEZ_REFERENCIA)
+
+    brillo = gris.mean(axis=(1, 2)) / 255
+    exposicion = 1 - np.clip(np.abs(brillo - 0.5) * 2, 0, 1)
+    contraste = np.clip(gris.std(axis=(1, 2)) / 64, 0, 1)
+
+    return 0.6 * nitidez + 0.25 * exposicion + 0.15 * contraste
+
+
+def calidad_rostro(imagen, ubicacion):
+    """
+    Calidad 0-1 de la región del rostro (normalizada a LADO_CALIDAD_ROSTRO)
+
+    Args:
+        imagen: Imagen BGR o RGB (el peso de los canales cambia poco el resultado)
+        ubicacion: (top, right, bottom, left)
+    """
+    top, right, bottom, left = ubicacion
+    alto, ancho = imagen.shape[:2]
+    recorte = imagen[max(0, top):min(alto, bottom), max(0, left):min(ancho, right)]
+    if recorte.size == 0:
+        return 0.0
+    recorte = cv2.resize(recorte, (LADO_CALIDAD_ROSTRO, LADO_CALIDAD_ROSTRO), interpolation=cv2.INTER_AREA)
+    return float(puntuar_calidad(recorte[np.newaxis])[0])
+
+
+def puntuar_pose(rgb, ubicacion):
+    """
+    Frontalidad 0-1 del rostro: la nariz equidistante de ambos ojos es 1
+    (landmarks de 5 puntos de dlib, muy baratos)
+    """
+    puntos = face_recognition.face_landmarks(rgb, [ubicacion], model='small')
+    if not puntos:
+        return 0.0
+    puntos = puntos[0]
+    nariz = np.mean(puntos['nose_tip'], axis=0)
+    izquierda = np.linalg.norm(np.mean(puntos['left_eye'], axis=0) - nariz)
+    derecha = np.linalg.norm(np.mean(puntos['right_eye'], axis=0) - nariz)
+    if izquierda + derecha == 0:
+        return 0.0
+    return float(1 - abs(izquierda - derecha) / (izquierda + derecha))
+
+
+def crear_pool(procesos):
+    """
+    Pool de procesos que se puede crear desde un servidor con hilos (Flask, gunicorn)
+
+    Con fork los procesos heredarían el estado del worker a mitad de una
+    petición (locks tomados por otros hilos, conexiones a la BD, cámaras);
+    forkserver los arranca desde un proceso limpio (spawn donde no existe).
+    """
+    metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(metodo).Pool(processes=procesos)
+
+
+def procesos_por_worker():
+    """
+    Núcleos que le tocan a cada worker web: cada worker de gunicorn tiene sus
+    propios pools, así que los núcleos se reparten entre WEB_CONCURRENCY
+    (la variable con la que gunicorn fija el número de workers)
+    """
+    workers = max(1, int(os.environ.get('WEB_CONCURRENCY', '1')))
+    return max(1, (os.cpu_count() or 1) // workers)
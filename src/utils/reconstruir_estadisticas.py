@@ -0,0 +1,54 @@
+"""
+Reconstruir desde cero los rollups de estadísticas académicas
+Útil después de cargas masivas (backfills) o si se sospecha que los
+contadores incrementales se desincronizaron.
+
+Uso:
+    python src/utils/reconstruir_estadisticas.py
+"""
+
+import psycopg2
+import time
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+# Funciones SQL de reconstrucción (definidas en src/database/)
+ROLLUPS = [
+    ('Estadísticas por corte', 'reconstruir_estadisticas_corte'),
+    ('Resumen de asistencia por estudiante', 'reconstruir_resumen_asistencia'),
+]
+
+
+def reconstruir_estadisticas():
+    """Ejecuta cada función de reconstrucción en su propia transacción"""
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    cursor = conn.cursor()
+
+    try:
+        for descripcion, funcion in ROLLUPS:
+            inicio = time.time()
+            cursor.execute(f"SELECT {funcion}()")
+            filas = cursor.fetchone()[0]
+            conn.commit()
+            print(f"✅ {descripcion}: {filas} filas ({time.time() - inicio:.2f} s)")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error reconstruyendo estadísticas: {e}")
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    print("🔄 Reconstruyendo estadísticas académicas...")
+    reconstruir_estadisticas()
@@ -0,0 +1,417 @@
+"""
+Registro masivo de estudiantes desde un directorio de fotos
+Recorre el directorio (una carpeta por estudiante, o fotos sueltas cuyo nombre
+es el estudiante: "juan_perez.jpg", "juan_perez_2.jpg") y decodifica, detecta
+y codifica las imágenes en un pool de procesos. Los usuarios y embeddings se
+escriben con INSERT multi-fila (execute_values) por lotes.
+
+Un manifiesto con el SHA-256 de cada imagen permite repetir el registro: las
+imágenes sin cambios se saltan (el hash se calcula en el pool, sin decodificar),
+las modificadas reemplazan su embedding y las borradas eliminan el suyo.
+
+Un estudiante solo se asocia a una cuenta existente si el manifiesto dice que
+la creó este registro. Si su correo generado ya pertenece a otra cuenta (un
+homónimo registrado por otra vía, un profesor o administrador) sus imágenes
+quedan como 'conflicto' en el manifiesto y se reintentan en la próxima pasada.
+
+Uso:
+    python src/utils/registro_masivo.py students/
+    python src/utils/registro_masivo.py /datos/ingreso_2025 --procesos 16
+    python src/utils/registro_masivo.py students/ --simular
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from multiprocessing import Pool
+
+import cv2
+import face_recognition
+import psycopg2
+from psycopg2.extras import execute_values
+
+try:
+    from src.utils.fuentes_captura import EXTENSIONES_IMAGEN
+    from src.utils.procesamiento_rostros import calidad_rostro
+except ImportError:
+    # Ejecutado como script desde src/utils
+    from fuentes_captura import EXTENSIONES_IMAGEN
+    from procesamiento_rostros import calidad_rostro
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+NOMBRE_MANIFIESTO = '.registro_masivo.json'
+TAMANO_LOTE = 500  # Imágenes por transacción
+LADO_MAXIMO = 1024  # Las fotos más grandes se reducen antes de detectar
+CONTRASENA_POR_DEFECTO = "default_hash_changeme"
+
+# ------------------------------------------------------------
+# Procesos de trabajo
+# ------------------------------------------------------------
+
+_trabajo = {}
+
+
+def _inicializar_trabajador(directorio, hashes, lado_maximo):
+    _trabajo.update({'directorio': directorio, 'hashes': hashes, 'lado_maximo': lado_maximo})
+
+
+def hash_archivo(ruta):
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(1 << 20), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def _procesar_imagen(ruta_relativa):
+    """
+    Hash y, si la imagen cambió, embedding del rostro principal
+
+    Returns:
+        dict: ruta, sha256, estado (sin_cambios/ok/sin_rostro/error),
+              embedding (bytes), calidad, rostros, detalle
+    """
+    ruta = os.path.join(_trabajo['directorio'], ruta_relativa)
+    resultado = {'ruta': ruta_relativa, 'sha256': None, 'estado': 'error',
+                 'embedding': None, 'calidad': 0.0, 'rostros': 0, 'detalle': None}
+    try:
+        resultado['sha256'] = hash_archivo(ruta)
+        if _trabajo['hashes'].get(ruta_relativa) == resultado['sha256']:
+            resultado['estado'] = 'sin_cambios'
+            return resultado
+
+        imagen = cv2.imread(ruta)
+        if imagen is None:
+            resultado['detalle'] = 'no se pudo decodificar'
+            return resultado
+        escala = _trabajo['lado_maximo'] / max(imagen.shape[:2])
+        if escala < 1:
+            imagen = cv2.resize(imagen, (0, 0), fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+        rgb = cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB)
+
+        ubicaciones = face_recognition.face_locations(rgb)
+        resultado['rostros'] = len(ubicaciones)
+        if not ubicaciones:
+            resultado['estado'] = 'sin_rostro'
+            return resultado
+
+        # Foto de registro: el rostro más grande es el del estudiante
+        principal = max(ubicaciones, key=lambda u: (u[2] - u[0]) * (u[1] - u[3]))
+        resultado['embedding'] = face_recognition.face_encodings(rgb, [principal])[0].tobytes()
+        resultado['calidad'] = calidad_rostro(imagen, principal)
+        resultado['estado'] = 'ok'
+    except Exception as e:
+        resultado['detalle'] = str(e)
+    return resultado
+
+
+# ------------------------------------------------------------
+# Directorio y manifiesto
+# ------------------------------------------------------------
+
+def clave_estudiante(ruta_relativa):
+    """Carpeta del estudiante, o el nombre del archivo sin el sufijo numérico"""
+    partes = ruta_relativa.split(os.sep)
+    if len(partes) > 1:
+        return partes[0]
+    nombre = os.path.splitext(partes[0])[0]
+    return re.sub(r'[_\-\s]+\d+$', '', nombre)
+
+
+def datos_estudiante(clave):
+    """(nombre, apellido, correo) a partir de la clave, como en el registro con cámara"""
+    palabras = [p for p in re.split(r'[_\s]+', clave.strip()) if p]
+    nombre = palabras[0]
+    apellido = " ".join(palabras[1:])
+    correo = ".".join(p.lower() for p in palabras) + "@estudiante.local"
+    return nombre, apellido, correo
+
+
+def escanear(directorio):
+    """Rutas relativas de las imágenes del directorio (recursivo, orden estable)"""
+    rutas = []
+    for raiz, carpetas, archivos in os.walk(directorio):
+        carpetas[:] = sorted(c for c in carpetas if not c.startswith('.'))
+        for archivo in sorted(archivos):
+            if archivo.lower().endswith(EXTENSIONES_IMAGEN):
+                rutas.append(os.path.relpath(os.path.join(raiz, archivo), directorio))
+    return rutas
+
+
+def cargar_manifiesto(ruta):
+    """{ruta relativa: {sha256, id_usuario, estado}}"""
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+def guardar_manifiesto(ruta, manifiesto):
+    """Escritura atómica: el manifiesto siempre corresponde a lo confirmado en la BD"""
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, indent=1, sort_keys=True)
+    os.replace(temporal, ruta)
+
+
+# ------------------------------------------------------------
+# Escritura en la BD
+# ------------------------------------------------------------
+
+def asegurar_estudiantes(cursor, claves, ids_por_clave, conflictos, conocidos):
+    """
+    Crea los estudiantes que faltan (un INSERT) y completa ids_por_clave
+
+    Args:
+        ids_por_clave: clave -> id_usuario ya resuelto (se completa)
+        conflictos: clave -> motivo de las claves que no se registran (se completa)
+        conocidos: clave -> id_usuario que el manifiesto registra para esa clave
+    """
+    faltantes = sorted(set(claves) - set(ids_por_clave) - set(conflictos))
+    if not faltantes:
+        return
+
+    # Dos claves distintas que generan el mismo correo ("juan_perez", "Juan Perez"): la primera se queda
+    clave_por_correo = {datos_estudiante(clave)[2]: clave for clave in ids_por_clave}
+    datos = {}
+    for clave in faltantes:
+        nombre, apellido, correo = datos_estudiante(clave)
+        if correo in clave_por_correo:
+            conflictos[clave] = f"mismo correo que '{clave_por_correo[correo]}' ({correo})"
+            continue
+        clave_por_correo[correo] = clave
+        datos[clave] = (nombre, apellido, correo)
+    if not datos:
+        return
+
+    creados = execute_values(cursor, """
+        INSERT INTO usuarios (nombre, apellido, correo, contrasena_hash, rol, estado)
+        VALUES %s
+        ON CONFLICT (correo) DO NOTHING
+        RETURNING id_usuario, correo
+    """, [(n, a, c, CONTRASENA_POR_DEFECTO) for n, a, c in datos.values()],
+        template="(%s, %s, %s, %s, 'estudiante', 'activo')", page_size=TAMANO_LOTE, fetch=True)
+    for id_usuario, correo in creados:
+        ids_por_clave[clave_por_correo[correo]] = id_usuario
+
+    # Correos que ya existían: solo se reutiliza la cuenta de estudiante creada por este registro
+    existentes = [correo for clave, (_, _, correo) in datos.items() if clave not in ids_por_clave]
+    if not existentes:
+        return
+    cursor.execute("SELECT id_usuario, correo, rol FROM usuarios WHERE correo = ANY(%s)", (existentes,))
+    for id_usuario, correo, rol in cursor.fetchall():
+        clave = clave_por_correo[correo]
+        if rol == 'estudiante' and conocidos.get(clave) == id_usuario:
+            ids_por_clave[clave] = id_usuario
+        else:
+            conflictos[clave] = f"el correo {correo} ya pertenece a otra cuenta ({rol}, id {id_usuario})"
+
+
+def eliminar_embeddings(cursor, entradas):
+    """Borra los embeddings registrados desde estas imágenes [(id_usuario, ruta)]"""
+    if not entradas:
+        return 0
+    cursor.execute("""
+        DELETE FROM embeddings_faciales e
+        USING unnest(%s::int[], %s::text[]) AS v(id_usuario, ruta)
+        WHERE e.id_usuario = v.id_usuario AND e.imagen_path = v.ruta
+    """, ([e[0] for e in entradas], [e[1] for e in entradas]))
+    return cursor.rowcount
+
+
+def escribir_lote(conn, lote, manifiesto, ids_por_clave, conflictos, conocidos):
+    """
+    Una transacción por lote: estudiantes nuevos, embeddings reemplazados y
+    embeddings nuevos. El manifiesto se actualiza solo después del COMMIT.
+
+    Returns:
+        list: (ruta, motivo) de las imágenes ok que no se registraron por conflicto de correo
+    """
+    cursor = conn.cursor()
+    try:
+        asegurar_estudiantes(cursor, [clave_estudiante(r['ruta']) for r in lote if r['estado'] == 'ok'],
+                             ids_por_clave, conflictos, conocidos)
+        for r in lote:
+            if r['estado'] == 'ok' and clave_estudiante(r['ruta']) in conflictos:
+                r['estado'] = 'conflicto'
+
+        anteriores = [
+            (manifiesto[r['ruta']]['id_usuario'], r['ruta'])
+            for r in lote if manifiesto.get(r['ruta'], {}).get('id_usuario') is not None
+        ]
+        eliminar_embeddings(cursor, anteriores)
+
+        filas = [
+            (ids_por_clave[clave_estudiante(r['ruta'])], psycopg2.Binary(r['embedding']), r['ruta'],
+             r['calidad'], 1.0 if r['rostros'] == 1 else 0.5)
+            for r in lote if r['estado'] == 'ok'
+        ]
+        execute_values(cursor, """
+            INSERT INTO embeddings_faciales (
+                id_usuario, embedding_vector, imagen_path, quality_score, detection_confidence, activo
+            ) VALUES %s
+        """, filas, template="(%s, %s, %s, %s, %s, true)", page_size=TAMANO_LOTE)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    for r in lote:
+        manifiesto[r['ruta']] = {
+            'sha256': r['sha256'],
+            'id_usuario': ids_por_clave[clave_estudiante(r['ruta'])] if r['estado'] == 'ok' else None,
+            'estado': r['estado'],
+        }
+        if r['estado'] == 'conflicto':
+            manifiesto[r['ruta']]['detalle'] = conflictos[clave_estudiante(r['ruta'])]
+    return [(r['ruta'], conflictos[clave_estudiante(r['ruta'])]) for r in lote if r['estado'] == 'conflicto']
+
+
+# ------------------------------------------------------------
+# Proceso principal
+# ------------------------------------------------------------
+
+def registrar_directorio(directorio, procesos=None, simular=False, ruta_manifiesto=None,
+                         lado_maximo=LADO_MAXIMO, tamano_lote=TAMANO_LOTE):
+    """
+    Registra (o actualiza) los estudiantes de un directorio
+
+    Returns:
+        dict: conteos por estado, estudiantes, eliminadas, segundos, imagenes_por_segundo
+    """
+    procesos = procesos or os.cpu_count() or 1
+    ruta_manifiesto = ruta_manifiesto or os.path.join(directorio, NOMBRE_MANIFIESTO)
+    manifiesto = cargar_manifiesto(ruta_manifiesto)
+
+    rutas = escanear(directorio)
+    eliminadas = sorted(set(manifiesto) - set(rutas))
+    print(f"📂 {len(rutas)} imágenes de {len(set(map(clave_estudiante, rutas)))} estudiantes "
+          f"({len(manifiesto)} en el manifiesto, {len(eliminadas)} eliminadas)")
+
+    conn = None if simular else psycopg2.connect(**DATABASE_CONFIG)
+    conteos = {'sin_cambios': 0, 'ok': 0, 'sin_rostro': 0, 'error': 0, 'conflicto': 0}
+    ids_por_clave = {}
+    conflictos = {}
+    conocidos = {
+        clave_estudiante(ruta): datos['id_usuario']
+        for ruta, datos in manifiesto.items() if datos.get('id_usuario') is not None
+    }
+
+    def escribir(lote):
+        for ruta, motivo in escribir_lote(conn, lote, manifiesto, ids_por_clave, conflictos, conocidos):
+            conteos['ok'] -= 1
+            conteos['conflicto'] += 1
+            print(f"   ⚠️ {ruta}: no se registró, {motivo}")
+        guardar_manifiesto(ruta_manifiesto, manifiesto)
+
+    inicio = time.perf_counter()
+    try:
+        if conn and eliminadas:
+            cursor = conn.cursor()
+            borrados = eliminar_embeddings(cursor, [
+                (manifiesto[r]['id_usuario'], r) for r in eliminadas if manifiesto[r].get('id_usuario') is not None
+            ])
+            conn.commit()
+            cursor.close()
+            for ruta in eliminadas:
+                del manifiesto[ruta]
+            guardar_manifiesto(ruta_manifiesto, manifiesto)
+            print(f"🗑️ {borrados} embeddings de imágenes eliminadas")
+
+        # Las imágenes en conflicto se vuelven a procesar: el conflicto pudo resolverse
+        hashes = {ruta: datos['sha256'] for ruta, datos in manifiesto.items() if datos.get('estado') != 'conflicto'}
+        lote = []
+        with Pool(processes=procesos, initializer=_inicializar_trabajador,
+                  initargs=(directorio, hashes, lado_maximo)) as pool:
+            for procesadas, resultado in enumerate(pool.imap_unordered(_procesar_imagen, rutas, chunksize=8), 1):
+                conteos[resultado['estado']] += 1
+                if resultado['estado'] == 'error':
+                    print(f"   ❌ {resultado['ruta']}: {resultado['detalle']}")
+                elif resultado['estado'] != 'sin_cambios':
+                    if resultado['estado'] == 'sin_rostro':
+                        print(f"   ⚠️ {resultado['ruta']}: no se encontró ningún rostro")
+                    if conn:
+                        lote.append(resultado)
+
+                if len(lote) >= tamano_lote:
+                    escribir(lote)
+                    lote = []
+
+                if procesadas % 250 == 0 or procesadas == len(rutas):
+                    segundos = time.perf_counter() - inicio
+                    print(f"   📈 {procesadas}/{len(rutas)} imágenes ({procesadas / segundos:.1f} img/s)")
+
+        if lote:
+            escribir(lote)
+    finally:
+        if conn:
+            conn.close()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'conteos': conteos,
+        'imagenes': len(rutas),
+        'estudiantes': len(ids_por_clave),
+        'eliminadas': len(eliminadas),
+        'procesos': procesos,
+        'segundos': segundos,
+        'imagenes_por_segundo': len(rutas) / segundos if segundos else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Registro masivo de estudiantes desde un directorio de fotos')
+    parser.add_argument('directorio', help='Una carpeta por estudiante o fotos "nombre_apellido.jpg"')
+    parser.add_argument('--procesos', type=int, default=os.cpu_count(), help='Procesos del pool')
+    parser.add_argument('--manifiesto', help=f'Ruta del manifiesto (por defecto, {NOMBRE_MANIFIESTO} en el directorio)')
+    parser.add_argument('--lado-maximo', type=int, default=LADO_MAXIMO, help='Lado mayor al que se reducen las fotos')
+    parser.add_argument('--simular', action='store_true', help='Procesar sin escribir en la BD ni en el manifiesto')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directorio):
+        print(f"❌ No existe el directorio: {args.directorio}")
+        sys.exit(1)
+
+    print("🎓 REGISTRO MASIVO DE ESTUDIANTES")
+    print("="*60)
+
+    try:
+        resultado = registrar_directorio(args.directorio, args.procesos, args.simular,
+                                         args.manifiesto, args.lado_maximo)
+    except psycopg2.Error as e:
+        print(f"❌ Error de base de datos: {e}")
+        sys.exit(1)
+
+    conteos = resultado['conteos']
+    print("\n📊 RESUMEN")
+    print("-"*60)
+    print(f"✅ Embeddings nuevos o actualizados: {conteos['ok']}")
+    print(f"⏭️ Sin cambios: {conteos['sin_cambios']}")
+    print(f"⚠️ Sin rostro: {conteos['sin_rostro']}   ❌ Errores: {conteos['error']}")
+    if conteos['conflicto']:
+        print(f"⚠️ Sin registrar por correo de otra cuenta: {conteos['conflicto']} (ver 'detalle' en el manifiesto)")
+    print(f"🗑️ Imágenes eliminadas: {resultado['eliminadas']}")
+    print(f"⏱️ {resultado['imagenes']} imágenes en {resultado['segundos']:.1f}s con {resultado['procesos']} procesos "
+          f"({resultado['imagenes_por_segundo']:.1f} img/s)")
+    if args.simular:
+        print("ℹ️ Simulación: no se escribió nada")
+    elif conteos['ok']:
+        print("🔄 Recargue los rostros en el servidor: POST /system/reload_faces")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Sesiones de registro de usuarios aisladas por token
+Cada registro (un administrador con el modal abierto) tiene su propia sesión:
+cámara de la que toma las fotos, fotos capturadas y estado. Dos registros a la
+vez no se pisan y ninguno saca a las cámaras del modo asistencia: el
+reconocimiento sigue mientras se captura.
+
+El almacén está acotado:
+    - TTL: una sesión sin uso durante ttl_segundos se descarta (modal cerrado
+      sin cancelar, pestaña cerrada).
+    - max_sesiones: al crear una de más se descarta la usada hace más tiempo.
+    - max_bytes_fotos: memoria total de los frames capturados; si una foto
+      nueva no cabe se descartan las sesiones menos recientes (nunca una con
+      un registro en proceso) y, si aun así no cabe, se rechaza.
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+FOTOS_POR_REGISTRO = 4
+TTL_SEGUNDOS = 600
+MAX_SESIONES = 32
+MAX_BYTES_FOTOS = 256 * 1024 * 1024  # ~70 registros completos de 640x480, ~8 de 1080p
+
+
+class AlmacenSesionesRegistro:
+    """
+    Sesiones de registro por token con TTL y límite de memoria
+    """
+
+    def __init__(self, ttl_segundos=TTL_SEGUNDOS, max_sesiones=MAX_SESIONES, max_bytes_fotos=MAX_BYTES_FOTOS):
+        self.ttl_segundos = ttl_segundos
+        self.max_sesiones = max_sesiones
+        self.max_bytes_fotos = max_bytes_fotos
+
+        self._lock = threading.Lock()
+        self._sesiones = OrderedDict()  # token -> sesión, de la usada hace más tiempo a la más reciente
+        self._bytes = 0
+        self._descartadas = {'ttl': 0, 'capacidad': 0, 'memoria': 0}
+
+    # ------------------------------------------------------------
+    # Internos (con el lock tomado)
+    # ------------------------------------------------------------
+
+    def _descartar(self, token, motivo=None):
+        sesion = self._sesiones.pop(token)
+        self._bytes -= sesion['bytes']
+        if motivo:
+            self._descartadas[motivo] += 1
+
+    def _purgar(self):
+        limite = time.monotonic() - self.ttl_segundos
+        while self._sesiones:
+            token, sesion = next(iter(self._sesiones.items()))
+            if sesion['ultimo_uso'] >= limite:
+                break
+            self._descartar(token, 'ttl')
+
+    def _usar(self, token):
+        """Sesión vigente (y la marca como la más reciente) o None"""
+        self._purgar()
+        sesion = self._sesiones.get(token) if token else None
+        if sesion is not None:
+            sesion['ultimo_uso'] = time.monotonic()
+            self._sesiones.move_to_end(token)
+        return sesion
+
+    def _copia(self, sesion):
+        copia = dict(sesion)
+        copia['fotos'] = list(sesion['fotos'])
+        return copia
+
+    # ------------------------------------------------------------
+    # Operaciones
+    # ------------------------------------------------------------
+
+    def crear(self, id_camara):
+        """
+        Nueva sesión de registro que toma las fotos de id_camara
+
+        Returns:
+            dict: Copia de la sesión (token, id_camara, fotos, estado, ...)
+        """
+        with self._lock:
+            self._purgar()
+            while len(self._sesiones) >= self.max_sesiones:
+                self._descartar(next(iter(self._sesiones)), 'capacidad')
+
+            sesion = {
+                'token': secrets.token_urlsafe(16),
+                'id_camara': id_camara,
+                'fotos': [],
+                'calidades': [],
+                'estado': 'capturing',  # capturing, preview, processing
+                'version': 1,  # Cambia al reiniciar: las URLs de las fotos no se reutilizan
+                'bytes': 0,
+                'creada_en': time.time(),
+                'ultimo_uso': time.monotonic(),
+            }
+            self._sesiones[sesion['token']] = sesion
+            return self._copia(sesion)
+
+    def obtener(self, token):
+        """Copia de la sesión vigente o None (no existe o expiró)"""
+        with self._lock:
+            sesion = self._usar(token)
+            return self._copia(sesion) if sesion else None
+
+    def agregar_fotos(self, token, frames, calidades):
+        """
+        Agrega frames capturados a la sesión (hasta FOTOS_POR_REGISTRO)
+
+        Returns:
+            dict: Copia de la sesión actualizada (None si no existe o expiró)
+
+        Raises:
+            ValueError: Si las fotos no caben en la memoria del almacén
+        """
+        with self._lock:
+            sesion = self._usar(token)
+            if sesion is None:
+                return None
+
+            frames = frames[:FOTOS_POR_REGISTRO - len(sesion['fotos'])]
+            nuevos = sum(frame.nbytes for frame in frames)
+            # Liberar memoria descartando las sesiones menos recientes (no esta ni las que registran)
+            for otro in [t for t, s in self._sesiones.items() if t != token and s['estado'] != 'processing']:
+                if self._bytes + nuevos <= self.max_bytes_fotos:
+                    break
+                self._descartar(otro, 'memoria')
+            if self._bytes + nuevos > self.max_bytes_fotos:
+                raise ValueError("No hay memoria para más fotos de registro, intenta en unos minutos")
+
+            sesion['fotos'].extend(frames)
+            sesion['calidades'].extend(calidades[:len(frames)])
+            sesion['bytes'] += nuevos
+            self._bytes += nuevos
+            if len(sesion['fotos']) >= FOTOS_POR_REGISTRO:
+                sesion['estado'] = 'preview'
+            return self._copia(sesion)
+
+    def reiniciar(self, token):
+        """Descarta las fotos de la sesión y vuelve a capturar (False si no existe)"""
+        with self._lock:
+            sesion = self._usar(token)
+            if sesion is None:
+                return False
+            self._bytes -= sesion['bytes']
+            sesion.update({'fotos': [], 'calidades': [], 'bytes': 0, 'estado': 'capturing',
+                           'version': sesion['version'] + 1})
+            return True
+
+    def actualizar(self, token, estado):
+        """Cambia el estado de una sesión (False si no existe)"""
+        with self._lock:
+            sesion = self._usar(token)
+            if sesion is None:
+                return False
+            sesion['estado'] = estado
+            return True
+
+    def eliminar(self, token):
+        with self._lock:
+            if token in self._sesiones:
+                self._descartar(token)
+
+    def en_camara(self, id_camara):
+        """Sesiones vigentes que capturan de una cámara (para el aviso sobre el video)"""
+        with self._lock:
+            self._purgar()
+            return sum(1 for s in self._sesiones.values() if s['id_camara'] == id_camara)
+
+    def estadisticas(self):
+        with self._lock:
+            self._purgar()
+            return {
+                'sesiones': len(self._sesiones),
+                'max_sesiones': self.max_sesiones,
+                'bytes_fotos': self._bytes,
+                'max_bytes_fotos': self.max_bytes_fotos,
+                'descartadas': dict(self._descartadas),
+            }
@@ -0,0 +1,285 @@
+"""
+Registro de usuarios en segundo plano
+/save_user ya no procesa las fotos dentro de la petición HTTP: encola un
+trabajo y responde de inmediato con su id. Un hilo por trabajo reparte las
+fotos en un pool de procesos (detección HOG y codificación en paralelo, fuera
+del proceso de las cámaras) y escribe el usuario con todos sus embeddings en
+una sola transacción: o queda registrado completo o no se escribe nada.
+
+El frontend consulta el estado con /enrollment_status/<id_trabajo>; al
+completarse se llama a al_completar (main.py recarga la galería compartida).
+
+Antes de escribir, los embeddings nuevos se buscan en la galería en vivo: si
+la mayoría de las fotos coincide (distancia <= UMBRAL_DUPLICADO) con un mismo
+estudiante ya registrado, el trabajo termina en estado 'duplicado' sin tocar
+la BD. Con permitir_duplicado se registra igual y queda marcado en el trabajo.
+"""
+
+import threading
+import time
+import uuid
+
+import cv2
+import face_recognition
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+
+try:
+    from src.utils.procesamiento_rostros import UMBRAL_DUPLICADO, calidad_rostro, crear_pool, procesos_por_worker
+except ImportError:
+    # Ejecutado como script desde src/utils
+    from procesamiento_rostros import UMBRAL_DUPLICADO, calidad_rostro, crear_pool, procesos_por_worker
+
+# Configuración de la base de datos
+DATABASE_CONFIG = {
+    'host': 'localhost',
+    'database': 'prototipoPG_v2',
+    'user': 'postgres',
+    'password': 'camilomena',
+    'port': '5432'
+}
+
+CONTRASENA_POR_DEFECTO = "default_hash_changeme"
+MAX_TRABAJOS = 100  # Trabajos terminados que se conservan para consultar su estado
+
+
+def _codificar_foto(foto):
+    """
+    Embedding y calidad del rostro de una foto (en un proceso del pool)
+
+    Args:
+        foto: Frame crudo BGR (buffer de la cámara) o bytes de un archivo de imagen
+
+    Returns:
+        dict: estado (ok/sin_rostro/error), rostros, embedding (bytes), calidad, detalle
+    """
+    resultado = {'estado': 'error', 'rostros': 0, 'embedding': None, 'calidad': 0.0, 'detalle': None}
+    try:
+        if isinstance(foto, (bytes, bytearray)):
+            imagen = cv2.imdecode(np.frombuffer(foto, np.uint8), cv2.IMREAD_COLOR)
+            if imagen is None:
+                resultado['detalle'] = 'no se pudo decodificar'
+                return resultado
+        else:
+            imagen = foto
+        rgb = cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB)
+
+        ubicaciones = face_recognition.face_locations(rgb)
+        resultado['rostros'] = len(ubicaciones)
+        resultado['estado'] = 'sin_rostro'
+        if not ubicaciones:
+            return resultado
+
+        encodings = face_recognition.face_encodings(rgb, ubicaciones[:1])
+        if encodings:
+            resultado.update({
+                'estado': 'ok',
+                'embedding': encodings[0].tobytes(),
+                'calidad': calidad_rostro(imagen, ubicaciones[0]),
+            })
+    except Exception as e:
+        resultado.update({'estado': 'error', 'detalle': str(e)})
+    return resultado
+
+
+class GestorTrabajosRegistro:
+    """
+    Cola de trabajos de registro con estado consultable
+    """
+
+    def __init__(self, al_completar=None, procesos=None, galeria=None, umbral_duplicado=UMBRAL_DUPLICADO):
+        """
+        Args:
+            al_completar: Función(trabajo) llamada al terminar cada trabajo (éxito o error)
+            procesos: Procesos del pool (por defecto, hasta 4 y la mitad de los núcleos de este worker)
+            galeria: GaleriaRostros en vivo para detectar identidades duplicadas (None = no se revisa)
+            umbral_duplicado: Distancia máxima para considerar que una foto es de un registrado
+        """
+        self.al_completar = al_completar
+        self.galeria = galeria
+        self.umbral_duplicado = umbral_duplicado
+        self.procesos = procesos or max(1, min(4, procesos_por_worker() // 2))
+        self._lock = threading.Lock()
+        self._pool = None
+        self._trabajos = {}
+
+    def _obtener_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Se crea desde la petición de /save_user: forkserver, no fork
+                self._pool = crear_pool(self.procesos)
+            return self._pool
+
+    def enviar(self, nombre, apellido, email, fotos, permitir_duplicado=False, referencia=None, calidades=None):
+        """
+        Encola el registro de un usuario
+
+        Args:
+            permitir_duplicado: Registrar aunque el rostro coincida con un estudiante existente
+            calidades: Puntuación de cada foto ya calculada al capturarla (la de la ráfaga que
+                       mostró la interfaz); se guarda como quality_score en lugar de calidad_rostro
+            referencia: Dato de quien lo encola que vuelve en el trabajo (token de la sesión de registro)
+
+        Returns:
+            dict: Copia del trabajo (id, estado 'pendiente', ...)
+        """
+        trabajo = {
+            'id': uuid.uuid4().hex,
+            'estado': 'pendiente',
+            'mensaje': 'En cola',
+            'nombre': nombre,
+            'apellido': apellido,
+            'id_usuario': None,
+            'embeddings': 0,
+            'fotos': [],
+            'duplicado': None,
+            'referencia': referencia,
+            'creado_en': time.time(),
+            'finalizado_en': None,
+        }
+        with self._lock:
+            self._trabajos[trabajo['id']] = trabajo
+            self._podar()
+
+        hilo = threading.Thread(target=self._ejecutar,
+                                args=(trabajo, email, list(fotos), permitir_duplicado, calidades),
+                                daemon=True)
+        hilo.start()
+        return dict(trabajo)
+
+    def estado(self, id_trabajo):
+        """Copia del trabajo o None si no existe (o ya se descartó)"""
+        with self._lock:
+            trabajo = self._trabajos.get(id_trabajo)
+            return dict(trabajo) if trabajo else None
+
+    def _podar(self):
+        terminados = sorted(
+            (t for t in self._trabajos.values() if t['finalizado_en'] is not None),
+            key=lambda t: t['finalizado_en'])
+        for trabajo in terminados[:max(0, len(terminados) - MAX_TRABAJOS)]:
+            del self._trabajos[trabajo['id']]
+
+    def _actualizar(self, trabajo, **cambios):
+        with self._lock:
+            trabajo.update(cambios)
+
+    def buscar_duplicado(self, embeddings):
+        """
+        Estudiante registrado con el que coincide la mayoría de las fotos
+
+        Args:
+            embeddings: Embeddings en bytes de las fotos del registro
+
+        Returns:
+            dict: id_usuario, nombre, distancia, fotos (o None si no hay duplicado)
+        """
+        if self.galeria is None or not embeddings:
+            return None
+
+        encodings = np.stack([np.frombuffer(e, dtype=np.float64) for e in embeddings])
+        candidatos = self.galeria.duplicados(encodings, self.umbral_duplicado)
+        if candidatos and candidatos[0]['fotos'] * 2 > len(embeddings):
+            candidato = candidatos[0]
+            return dict(candidato, distancia=round(candidato['distancia'], 4))
+        return None
+
+    def _ejecutar(self, trabajo, email, fotos, permitir_duplicado=False, calidades=None):
+        self._actualizar(trabajo, estado='procesando', mensaje=f'Procesando {len(fotos)} fotos')
+        inicio = time.perf_counter()
+        try:
+            resultados = self._obtener_pool().map(_codificar_foto, fotos)
+            if calidades is not None:
+                for resultado, calidad in zip(resultados, calidades):
+                    resultado['calidad'] = float(calidad)
+            for i, resultado in enumerate(resultados):
+                if resultado['estado'] == 'ok':
+                    print(f"  🧠 Foto {i+1}: {resultado['rostros']} caras, embedding generado "
+                          f"(calidad {resultado['calidad']:.2f})")
+                elif resultado['estado'] == 'sin_rostro':
+                    print(f"⚠️ Foto {i+1}: No se encontraron caras en la imagen")
+                else:
+                    print(f"❌ Error procesando foto {i+1}: {resultado['detalle']}")
+
+            embeddings = [(r['embedding'], r['calidad']) for r in resultados if r['estado'] == 'ok']
+            fotos_estado = [
+                {'estado': r['estado'], 'rostros': r['rostros'], 'calidad': round(r['calidad'], 3)}
+                for r in resultados
+            ]
+            duplicado = self.buscar_duplicado([e for e, _ in embeddings])
+            if not embeddings:
+                self._actualizar(
+                    trabajo, estado='error', fotos=fotos_estado,
+                    mensaje="No se pudo generar ningún embedding válido. "
+                            "Asegúrate de que las fotos muestren claramente el rostro.")
+            elif duplicado and not permitir_duplicado:
+                print(f"⚠️ {trabajo['nombre']} {trabajo['apellido']} coincide con {duplicado['nombre']} "
+                      f"(id {duplicado['id_usuario']}, distancia {duplicado['distancia']:.3f}); no se registra")
+                self._actualizar(
+                    trabajo, estado='duplicado', fotos=fotos_estado, duplicado=duplicado,
+                    mensaje=f"El rostro coincide con {duplicado['nombre']}, ya registrado "
+                            f"({duplicado['fotos']} de {len(embeddings)} fotos). "
+                            f"Si es otra persona, confirma el registro de nuevo.")
+            else:
+                id_usuario = self._guardar(trabajo['nombre'], trabajo['apellido'], email, embeddings)
+                self._actualizar(
+                    trabajo, estado='completado', id_usuario=id_usuario, embeddings=len(embeddings),
+                    fotos=fotos_estado, duplicado=duplicado,
+                    mensaje=f"Usuario registrado exitosamente con {len(embeddings)} fotos")
+                if duplicado:
+                    print(f"⚠️ Registrado aunque coincide con {duplicado['nombre']} "
+                          f"(id {duplicado['id_usuario']}): posible duplicado")
+                print(f"✅ Usuario {trabajo['nombre']} {trabajo['apellido']} registrado con "
+                      f"{len(embeddings)} embeddings en {time.perf_counter() - inicio:.1f}s")
+        except Exception as e:
+            print(f"❌ Error guardando usuario: {e}")
+            self._actualizar(trabajo, estado='error', mensaje=f"Error: {str(e)}")
+
+        self._actualizar(trabajo, finalizado_en=time.time())
+        if self.al_completar:
+            try:
+                self.al_completar(dict(trabajo))
+            except Exception as e:
+                print(f"❌ Error notificando el registro {trabajo['id']}: {e}")
+
+    def _guardar(self, nombre, apellido, email, embeddings):
+        """
+        Usuario y embeddings en una transacción; devuelve el id_usuario
+
+        Args:
+            embeddings: Lista de (embedding en bytes, calidad)
+        """
+        if not email:
+            email = f"{nombre.lower()}.{apellido.lower()}@estudiante.local"
+
+        conn = psycopg2.connect(**DATABASE_CONFIG)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO usuarios (nombre, apellido, correo, contrasena_hash, rol, estado)
+                VALUES (%s, %s, %s, %s, 'estudiante', 'activo')
+                RETURNING id_usuario
+            """, (nombre, apellido, email, CONTRASENA_POR_DEFECTO))
+            id_usuario = cursor.fetchone()[0]
+
+            execute_values(cursor, """
+                INSERT INTO embeddings_faciales (id_usuario, embedding_vector, quality_score, detection_confidence, activo)
+                VALUES %s
+            """, [(id_usuario, psycopg2.Binary(e), calidad) for e, calidad in embeddings],
+                template="(%s, %s, %s, 0.90, true)")
+            conn.commit()
+            return id_usuario
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def cerrar(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+            self._pool = None
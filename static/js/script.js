@@ -183,6 +183,7 @@ document.addEventListener("DOMContentLoaded", function () {
 let currentStep = 1;
 let capturedPhotos = [];
 let isCapturing = false;
+let registrationToken = null; // Sesión de registro propia (las cámaras siguen tomando asistencia)
 
 function initUserRegistration() {
     const modal = document.getElementById('registerModal');
@@ -291,6 +292,7 @@ async function enterRegistrationMode() {
         const result = await response.json();
         
         if (result.success) {
+            registrationToken = result.token;
             showStep('step-capture');
             currentStep = 2;
             isCapturing = true;
@@ -311,9 +313,10 @@ async function exitRegistrationMode() {
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ mode: 'asistencia' })
+                body: JSON.stringify({ mode: 'asistencia', token: registrationToken })
             });
             isCapturing = false;
+            registrationToken = null;
         }
     } catch (error) {
         console.error('Error al salir del modo registro:', error);
@@ -330,14 +333,15 @@ async function capturePhoto() {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
-            }
+            },
+            body: JSON.stringify({ token: registrationToken })
         });
         
         const result = await response.json();
         
         if (result.success) {
             updatePhotoCounter(result.capture_count);
-            addPhotoThumbnail(result.capture_count);
+            showCaptureThumbnails(result.thumbnails);
             
             if (result.capture_count >= 4) {
                 // Captura completa, mostrar preview
@@ -358,30 +362,26 @@ function updatePhotoCounter(count) {
     document.getElementById('photo-counter').textContent = `${count}/4`;
 }
 
-function addPhotoThumbnail(photoNumber) {
+function showCaptureThumbnails(thumbnails) {
     const thumbnailsContainer = document.getElementById('photo-thumbnails');
     
-    // Crear thumbnail placeholder (se actualizará después)
-    const thumbnail = document.createElement('div');
-    thumbnail.className = 'photo-thumbnail-placeholder';
-    thumbnail.innerHTML = `
-        <div class="photo-thumbnail bg-success d-flex align-items-center justify-content-center text-white">
-            <i class="fas fa-check"></i>
+    // Miniaturas reales (JPEG pequeño, cacheable) de las fotos capturadas hasta ahora
+    thumbnailsContainer.innerHTML = thumbnails.map((url, index) => `
+        <div class="photo-thumbnail-placeholder">
+            <img src="${url}" alt="Foto ${index + 1}" class="photo-thumbnail">
         </div>
-    `;
-    
-    thumbnailsContainer.appendChild(thumbnail);
+    `).join('');
 }
 
 async function showPhotoPreview() {
     try {
         // Obtener las fotos capturadas del servidor
-        const response = await fetch('/get_captured_photos');
+        const response = await fetch('/get_captured_photos?token=' + encodeURIComponent(registrationToken));
         const result = await response.json();
         
         if (result.success) {
             capturedPhotos = result.photos;
-            displayPhotoPreview(result.photos);
+            displayPhotoPreview(result.photos, result.thumbnails);
             showStep('step-preview');
             currentStep = 3;
         } else {
@@ -393,17 +393,24 @@ async function showPhotoPreview() {
     }
 }
 
-function displayPhotoPreview(photos) {
+function displayPhotoPreview(photos, thumbnails) {
     const previewGrid = document.getElementById('photo-preview-grid');
     
+    // Primero las miniaturas; cada foto completa reemplaza la suya al terminar de descargarse
     previewGrid.innerHTML = photos.map((photo, index) => `
         <div class="col-md-3 col-6 mb-3">
             <div class="photo-item">
-                <img src="${photo}" alt="Foto ${index + 1}" class="photo-preview">
+                <img src="${thumbnails[index]}" alt="Foto ${index + 1}" class="photo-preview">
                 <div class="photo-label">Foto ${index + 1}</div>
             </div>
         </div>
     `).join('');
+    
+    previewGrid.querySelectorAll('img.photo-preview').forEach((img, index) => {
+        const full = new Image();
+        full.onload = () => { img.src = photos[index]; };
+        full.src = photos[index];
+    });
 }
 
 async function resetCapture() {
@@ -412,7 +419,8 @@ async function resetCapture() {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
-            }
+            },
+            body: JSON.stringify({ token: registrationToken })
         });
         
         const result = await response.json();
@@ -435,7 +443,7 @@ function retakePhotos() {
     resetCapture();
 }
 
-async function confirmRegistration() {
+async function confirmRegistration(allowDuplicate) {
     const name = document.getElementById('user-name').value.trim();
     const lastname = document.getElementById('user-lastname').value.trim();
     const email = document.getElementById('user-email').value.trim();
@@ -457,13 +465,56 @@ async function confirmRegistration() {
             body: JSON.stringify({
                 nombre: name,
                 apellido: lastname,
-                email: email
+                email: email,
+                token: registrationToken,
+                // true solo al reconfirmar un posible duplicado (el click pasa el evento)
+                allow_duplicate: allowDuplicate === true
             })
         });
         
         const result = await response.json();
         
         if (result.success) {
+            // El registro se procesa en segundo plano: consultar su estado
+            waitForEnrollment(result.job_id);
+        } else {
+            alert('Error al registrar usuario: ' + result.message);
+            showStep('step-preview'); // Volver al preview
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('Error de conexión al guardar usuario');
+        showStep('step-preview'); // Volver al preview
+    }
+}
+
+async function waitForEnrollment(jobId) {
+    try {
+        const response = await fetch(`/enrollment_status/${jobId}`);
+        const result = await response.json();
+        
+        if (!result.success) {
+            alert('Error al registrar usuario: ' + result.message);
+            showStep('step-preview');
+            return;
+        }
+        
+        if (result.status === 'pendiente' || result.status === 'procesando') {
+            setTimeout(() => waitForEnrollment(jobId), 1000);
+            return;
+        }
+        
+        if (result.status === 'duplicado') {
+            // El rostro coincide con un estudiante ya registrado: registrar solo si se confirma
+            if (confirm(result.message + '\n\n¿Registrar de todas formas como una persona distinta?')) {
+                confirmRegistration(true);
+            } else {
+                showStep('step-preview');
+            }
+            return;
+        }
+        
+        if (result.status === 'completado') {
             alert('¡Usuario registrado exitosamente!\n' + result.message);
             
             // Cerrar modal
@@ -473,14 +524,13 @@ async function confirmRegistration() {
             // Actualizar contadores
             updateAttendanceTable();
             initStudentCount();
-            
         } else {
             alert('Error al registrar usuario: ' + result.message);
             showStep('step-preview'); // Volver al preview
         }
     } catch (error) {
         console.error('Error:', error);
-        alert('Error de conexión al guardar usuario');
-        showStep('step-preview'); // Volver al preview
+        // Error de red momentáneo: seguir consultando
+        setTimeout(() => waitForEnrollment(jobId), 2000);
     }
-}
\ No newline at end of file
+}
@@ -0,0 +1,124 @@
+"""
+Prueba de concurrencia de la asignación de numero_sesion
+Lanza varios hilos, cada uno con su propia conexión, que crean sesiones al
+mismo tiempo en los mismos (período, curso) y comprueba que:
+    - no hay números repetidos por (año, semestre, corte, id_curso)
+    - los números de cada curso son consecutivos 1..N (sin huecos)
+    - ninguna sesión sobrescribió a otra (cada nombre insertado sigue existiendo)
+
+Escribe y borra sesiones del período 2000-2, así que solo corre contra la base
+de pruebas indicada en PRUEBAS_DATABASE_URL (con las migraciones aplicadas y
+al menos un curso); sin esa variable se omite. Nunca usa la base de la app.
+
+Uso:
+    PRUEBAS_DATABASE_URL=postgresql://postgres@localhost/prototipo_pruebas python -m pytest tests
+"""
+
+import os
+import threading
+from collections import defaultdict
+from datetime import date, time as hora
+
+import pytest
+
+DSN = os.environ.get('PRUEBAS_DATABASE_URL')
+
+pytestmark = pytest.mark.skipif(not DSN, reason='PRUEBAS_DATABASE_URL no está definida')
+
+psycopg2 = pytest.importorskip('psycopg2')
+
+AÑO, SEMESTRE, CORTE = 2000, '2000-2', 1
+FECHA = date(2000, 8, 7)
+HILOS = 16
+SESIONES_POR_HILO = 50
+
+INSERTAR = """
+    INSERT INTO sesiones_academicas (
+        año, semestre, corte, id_curso, nombre_sesion, fecha_programada,
+        hora_inicio, hora_fin, dia_semana, estado, tipo_clase
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'lunes', 'programada', 'prueba')
+    RETURNING numero_sesion
+"""
+
+
+def crear_sesiones(hilo, cursos, cantidad, barrera, errores):
+    """Trabajo de un hilo: crea `cantidad` sesiones repartidas entre `cursos`"""
+    conn = psycopg2.connect(DSN)
+    cursor = conn.cursor()
+    barrera.wait()
+
+    for i in range(cantidad):
+        id_curso = cursos[(hilo + i) % len(cursos)]
+        try:
+            cursor.execute(INSERTAR, (AÑO, SEMESTRE, CORTE, id_curso, f"prueba-{hilo}-{i}",
+                                      FECHA, hora(8, 0), hora(10, 0)))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            errores.append(f"hilo {hilo}: {e}".splitlines()[0])
+
+    cursor.close()
+    conn.close()
+
+
+def limpiar(cursor):
+    cursor.execute("DELETE FROM sesiones_academicas WHERE año = %s AND semestre = %s", (AÑO, SEMESTRE))
+    cursor.execute("DELETE FROM estadisticas_corte WHERE año = %s AND semestre = %s", (AÑO, SEMESTRE))
+    cursor.execute("DELETE FROM resumen_asistencia_estudiante WHERE año = %s AND semestre = %s", (AÑO, SEMESTRE))
+    cursor.execute("DELETE FROM contadores_sesion WHERE año = %s AND semestre = %s", (AÑO, SEMESTRE))
+
+
+@pytest.fixture
+def cursor_pruebas():
+    """Cursor sobre la base de pruebas con el período 2000-2 vacío antes y después"""
+    conn = psycopg2.connect(DSN)
+    cursor = conn.cursor()
+    limpiar(cursor)
+    conn.commit()
+    try:
+        yield cursor
+    finally:
+        conn.rollback()
+        limpiar(cursor)
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+
+def test_numero_sesion_sin_duplicados_ni_huecos(cursor_pruebas):
+    cursor_pruebas.execute("SELECT id_curso FROM cursos ORDER BY id_curso LIMIT 2")
+    cursos = [fila[0] for fila in cursor_pruebas.fetchall()]
+    if not cursos:
+        pytest.skip('Se necesita al menos un curso en la tabla cursos')
+
+    barrera = threading.Barrier(HILOS)
+    errores = []
+    trabajadores = [
+        threading.Thread(target=crear_sesiones, args=(h, cursos, SESIONES_POR_HILO, barrera, errores))
+        for h in range(HILOS)
+    ]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+
+    assert not errores, f"{len(errores)} inserciones fallidas, p. ej.: {errores[0]}"
+
+    cursor_pruebas.execute("""
+        SELECT id_curso, numero_sesion, nombre_sesion
+        FROM sesiones_academicas
+        WHERE año = %s AND semestre = %s AND corte = %s
+    """, (AÑO, SEMESTRE, CORTE))
+    filas = cursor_pruebas.fetchall()
+
+    por_curso = defaultdict(list)
+    for id_curso, numero, _ in filas:
+        por_curso[id_curso].append(numero)
+
+    for id_curso, numeros in por_curso.items():
+        assert sorted(numeros) == list(range(1, len(numeros) + 1)), \
+            f"curso {id_curso}: números repetidos o no consecutivos"
+
+    esperadas = {f"prueba-{h}-{i}" for h in range(HILOS) for i in range(SESIONES_POR_HILO)}
+    perdidas = esperadas - {nombre for _, _, nombre in filas}
+    assert not perdidas, f"{len(perdidas)} sesiones sobrescritas o no creadas"